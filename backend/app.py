@@ -6,29 +6,44 @@ if __name__ == '__main__' and __package__ is None:
 
 from flask import Flask, jsonify
 from flask_cors import CORS
+from sqlalchemy import inspect
 from backend.config import Config
-from backend.db import db
+from backend.db import db, init_sqlite_tuning, sqlite_pragmas, active_sqlite_pragmas, close_replica_session
 from backend.auth import jwt
+from backend.writer import add_lock_wait_header, writer_stats
+from backend.cache import identity_cache, init_identity_cache
+from backend.jobs import job_stats
+from backend.fileserve import serve_file
+from backend.ingest import IngestRequest
 
 
-def create_app():
+def create_app(config_overrides=None):
     app = Flask(__name__, static_folder=None)
+    # multipart files stream straight into UPLOAD_FOLDER/.incoming (backend/ingest.py)
+    app.request_class = IngestRequest
     app.config.from_object(Config)
+    if config_overrides:
+        app.config.update(config_overrides)
 
     # ✅ FIXED CORS (allows Railway + tokens + other devices)
     CORS(
         app,
         supports_credentials=True,
         resources={r"/*": {"origins": "*"}},
-        allow_headers=["Content-Type", "Authorization"],
-        methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"]
+        allow_headers=["Content-Type", "Authorization", "Upload-Offset"],
+        methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
+        expose_headers=["X-Next-Cursor", "X-Total-Count", "X-DB-Lock-Wait-Ms", "ETag", "Upload-Offset", "Location"]
     )
 
     db.init_app(app)
+    init_sqlite_tuning(app)
+    app.teardown_appcontext(close_replica_session)
     jwt.init_app(app)
+    init_identity_cache(app)
+    app.after_request(add_lock_wait_header)
 
     with app.app_context():
-        # ensure models are imported so SQLAlchemy metadata includes them before create_all()
+        # ensure models are imported so SQLAlchemy metadata includes them
         try:
             print('IMPORTING backend.models')
             from . import models  # noqa: F401 - import for side-effects (register models)
@@ -37,8 +52,10 @@ def create_app():
         except Exception as e:
             print('FAILED to import backend.models', e)
             app.logger.exception('Failed to import backend.models')
-        # create db tables
-        db.create_all()
+        # schema changes are applied once per deploy (scripts/migrate.py), not by every worker
+        if app.config.get('AUTO_MIGRATE'):
+            from .migrations import upgrade
+            upgrade(log=app.logger.info)
 
     # register blueprints
     from .routes.auth import auth_bp
@@ -52,55 +69,48 @@ def create_app():
     # Serve uploaded files
     @app.route('/uploads/<path:relpath>')
     def serve_upload(relpath):
-<<<<<<< HEAD
-        import os
-        from flask import send_from_directory, abort
-        uploads_root = app.config.get('UPLOAD_FOLDER')
-        # Normalize to a safe OS path for filesystem checks
-        rel_parts = [p for p in relpath.replace('\\', '/').split('/') if p and p != '..']
-        full = os.path.join(uploads_root, *rel_parts)
-        if not os.path.isfile(full):
+        resp = serve_file(relpath)
+        if resp is None:
             # Don't leak filesystem details; return a simple 404 JSON
             return jsonify({'success': False, 'message': 'File not found'}), 404
-        # For send_from_directory, use a POSIX-style relative path
-        rel_for_send = '/'.join(rel_parts)
-        try:
-            return send_from_directory(uploads_root, rel_for_send)
-        except Exception:
-            # If send_from_directory fails for any reason, return generic 404
-            return jsonify({'success': False, 'message': 'File not found'}), 404
-=======
-        from flask import send_from_directory
-        uploads_root = app.config.get('UPLOAD_FOLDER')
-        relpath_os = relpath.replace('/', os.sep)
-        full = os.path.join(uploads_root, relpath_os)
-
-        if not os.path.exists(full):
-            return jsonify({'success': False, 'message': 'File not found'}), 404
+        return resp
 
-        return send_from_directory(uploads_root, relpath_os)
->>>>>>> ea0322aa0fb8e8c7191951e35114c50dcc953a1c
+    # database internals (paths, PRAGMAs, lock and cache counters): admins only
+    from .routes.admin import admin_only
+    from flask_jwt_extended import jwt_required
 
     @app.get('/debug/db')
+    @jwt_required()
+    @admin_only
     def debug_db():
         uri = app.config.get('SQLALCHEMY_DATABASE_URI')
         info = {'SQLALCHEMY_DATABASE_URI': uri}
 
         if uri and uri.startswith('sqlite'):
-            rel = uri.split('sqlite:///')[-1]
-            info['resolved_path'] = os.path.abspath(rel)
-            info['exists'] = os.path.exists(info['resolved_path'])
-
+            url = db.engine.url
+            database = url.database
+            in_memory = database in (None, '', ':memory:') or url.query.get('mode') == 'memory'
+            if not in_memory:
+                info['resolved_path'] = os.path.abspath(database)
+                info['exists'] = os.path.exists(info['resolved_path'])
             try:
-                import sqlite3
-                conn = sqlite3.connect(info['resolved_path'])
-                cur = conn.cursor()
-                cur.execute("SELECT name FROM sqlite_master WHERE type='table'")
-                info['tables'] = [r[0] for r in cur.fetchall()]
-                conn.close()
+                info['tables'] = inspect(db.engine).get_table_names()
             except Exception as e:
                 info['tables_error'] = str(e)
 
+            info['sqlite_profile'] = app.config.get('SQLITE_PROFILE')
+            try:
+                configured = sqlite_pragmas(app.config)
+                info['pragmas'] = active_sqlite_pragmas(db.engine, configured.keys())
+            except Exception as e:
+                info['pragmas_error'] = str(e)
+
+        info['writer'] = writer_stats()
+        info['identity_cache'] = identity_cache.stats()
+        try:
+            info['jobs'] = job_stats(db.session)
+        except Exception as e:
+            info['jobs_error'] = str(e)
         return jsonify(info)
 
     @app.get('/')
@@ -112,11 +122,10 @@ def create_app():
 
 # ✅ RAILWAY-SAFE RUN
 if __name__ == '__main__':
-<<<<<<< HEAD
-    # Allow overriding the port with the PORT env var (default to 5001 for local dev)
-    port = int(os.environ.get('PORT', 5001))
-    create_app().run(host='0.0.0.0', port=port, debug=True)
-=======
     port = int(os.environ.get("PORT", 5000))
-    create_app().run(host='0.0.0.0', port=port, debug=False)
->>>>>>> ea0322aa0fb8e8c7191951e35114c50dcc953a1c
+    app = create_app()
+    # single-process dev server: bring the local database up to date first
+    with app.app_context():
+        from backend.migrations import upgrade
+        upgrade(log=app.logger.info)
+    app.run(host='0.0.0.0', port=port, debug=False)
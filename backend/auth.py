@@ -1,3 +1,66 @@
-from flask_jwt_extended import JWTManager
+import threading
+import time
+from flask import current_app
+from flask_jwt_extended import JWTManager, create_access_token, create_refresh_token
 
 jwt = JWTManager()
+
+# Tokens carry the user's role and token version ('tv') as claims, so admin
+# checks need no database round trip. Changing a
+# user's status bumps users.token_version, which revokes every token issued
+# with an older version. Versions are cached per process for
+# TOKEN_VERSION_CACHE_SECONDS; bumps made in this process apply immediately.
+
+_token_versions = {}
+_token_versions_lock = threading.Lock()
+
+
+def token_claims(user) -> dict:
+    return {
+        'role': user.role or 'student',
+        'tv': user.token_version or 0,
+    }
+
+
+def issue_tokens(user):
+    """Return (access_token, refresh_token) carrying the user's claims."""
+    claims = token_claims(user)
+    return (
+        create_access_token(identity=user.id, additional_claims=claims),
+        create_refresh_token(identity=user.id, additional_claims=claims),
+    )
+
+
+def remember_token_version(user_id, version):
+    with _token_versions_lock:
+        _token_versions[user_id] = (version, time.monotonic())
+
+
+def forget_token_version(user_id):
+    with _token_versions_lock:
+        _token_versions.pop(user_id, None)
+
+
+def current_token_version(user_id):
+    """Current token version for user_id, or None if the user no longer exists."""
+    ttl = current_app.config.get('TOKEN_VERSION_CACHE_SECONDS', 30)
+    with _token_versions_lock:
+        cached = _token_versions.get(user_id)
+    if cached is not None and time.monotonic() - cached[1] < ttl:
+        return cached[0]
+    from .db import db
+    from .models import User
+    row = db.session.query(User.token_version).filter(User.id == user_id).first()
+    version = (row[0] or 0) if row else None
+    remember_token_version(user_id, version)
+    return version
+
+
+@jwt.token_in_blocklist_loader
+def _token_revoked(jwt_header, jwt_payload):
+    version = jwt_payload.get('tv')
+    if version is None:
+        # issued before claims were added; such tokens simply expire
+        return False
+    current = current_token_version(jwt_payload['sub'])
+    return current is None or version < current
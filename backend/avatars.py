@@ -0,0 +1,157 @@
+"""Avatars sent inline as ``data:`` URIs are stored as files.
+
+Clients may set ``avatarUrl`` to a base64 ``data:image/...`` URI. Kept in
+``profiles.avatar_url``, that made each profile row tens or hundreds of
+kilobytes, and every student listing carried the images in full. The profile
+PUT now decodes such URIs into the blob store (``store_data_uri_avatar``) and
+saves the short ``/uploads/blobs/...`` URL instead. The blob is held by an
+``('avatar', profile.id)`` ref, released when the avatar changes or the
+student is deleted. ``extract_data_uri_avatars`` (``python -m
+backend.scripts.extract_avatars``) converts rows written before this.
+"""
+import base64
+import binascii
+import os
+import re
+from urllib.parse import unquote_to_bytes
+from flask import current_app
+from .blobstore import attach_blob, blob_key, put_blob, release_refs
+from .db import db
+from .ingest import HashingSpool, INCOMING_DIR
+from .models import Profile
+from .utils import sniff_image_type
+from .variants import schedule_variants
+from .writer import run_write
+
+DATA_URI = re.compile(r'^data:(?P<mime>[^;,]*)(?P<params>(?:;[^;,]*)*),(?P<data>.*)$', re.S)
+# sniffed format -> stored extension
+IMAGE_EXTENSIONS = {
+    'jpeg': 'jpg', 'png': 'png', 'gif': 'gif', 'webp': 'webp', 'tiff': 'tiff', 'bmp': 'bmp', 'ico': 'ico',
+}
+# ISO-BMFF images sniff alike, so the declared type names the extension. SVG
+# is not accepted: it can carry script and would be served from our origin.
+MIME_EXTENSIONS = {'image/avif': 'avif', 'image/heic': 'heic'}
+
+
+class InvalidAvatar(ValueError):
+    """The data: URI is malformed, too large, or not an image."""
+
+
+def is_data_uri(value) -> bool:
+    return isinstance(value, str) and value[:5].lower() == 'data:'
+
+
+def decode_data_uri(value: str):
+    """(bytes, extension) of an image data: URI; raises InvalidAvatar."""
+    match = DATA_URI.match(value.strip())
+    if not match:
+        raise InvalidAvatar('Malformed data: URI')
+    mime = match.group('mime').lower()
+    max_bytes = current_app.config.get('AVATAR_MAX_BYTES', 2 * 1024 * 1024)
+    payload = match.group('data')
+    if ';base64' in match.group('params').lower():
+        # base64 is 4/3 of the decoded size; refuse before allocating
+        if len(payload) > max_bytes * 4 // 3 + 4:
+            raise InvalidAvatar('Avatar is too large')
+        try:
+            data = base64.b64decode(re.sub(r'\s+', '', payload), validate=True)
+        except (binascii.Error, ValueError):
+            raise InvalidAvatar('Invalid base64 in data: URI')
+    else:
+        data = unquote_to_bytes(payload)
+    if not data:
+        raise InvalidAvatar('Empty avatar')
+    if len(data) > max_bytes:
+        raise InvalidAvatar('Avatar is too large')
+    sniffed = sniff_image_type(data[:64])
+    ext = IMAGE_EXTENSIONS.get(sniffed) or MIME_EXTENSIONS.get(mime)
+    if ext is None or sniffed is None:
+        raise InvalidAvatar('Avatar is not a supported image')
+    return data, ext
+
+
+def spool_data_uri(value: str):
+    """Decode ``value`` into a hashed spool already written to storage.
+    Returns (spool, file name); the caller closes the spool."""
+    data, ext = decode_data_uri(value)
+    spool = HashingSpool(os.path.join(current_app.config.get('UPLOAD_FOLDER'), INCOMING_DIR))
+    try:
+        spool.write(data)
+        filename = f'avatar.{ext}'
+        put_blob(spool, filename)
+    except Exception:
+        spool.close()
+        raise
+    return spool, filename
+
+
+def store_data_uri_avatar(profile, spool, filename) -> str:
+    """Point ``profile`` at the stored avatar, in the current transaction."""
+    release_refs('avatar', [profile.id])
+    key = attach_blob(spool, filename, 'avatar', profile.id)
+    profile.avatar_url = f'/uploads/{key}'
+    return profile.avatar_url
+
+
+def extract_data_uri_avatars(batch_size: int = 100, dry_run: bool = False, log=print) -> dict:
+    """Move data: URI avatars already in ``profiles`` into the blob store.
+
+    Rows are read and rewritten ``batch_size`` at a time; each rewrite is
+    conditional on the row still holding the same URI, so edits made while
+    this runs win and the command can be re-run until nothing is left.
+    """
+    stats = {'profiles': 0, 'invalid': 0, 'bytes_before': 0, 'bytes_after': 0}
+    last_id = ''
+    while True:
+        rows = (
+            db.session.query(Profile.id, Profile.avatar_url)
+            .filter(Profile.avatar_url.like('data:%'), Profile.id > last_id)
+            .order_by(Profile.id)
+            .limit(batch_size)
+            .all()
+        )
+        db.session.rollback()
+        if not rows:
+            return stats
+        last_id = rows[-1].id
+        prepared = []
+        try:
+            for row in rows:
+                try:
+                    if dry_run:
+                        decode_data_uri(row.avatar_url)
+                        log(f'would extract avatar of profile {row.id} ({len(row.avatar_url)} bytes)')
+                        stats['profiles'] += 1
+                        stats['bytes_before'] += len(row.avatar_url)
+                        continue
+                    prepared.append((row, *spool_data_uri(row.avatar_url)))
+                except InvalidAvatar as e:
+                    log(f'skipping profile {row.id}: {e}')
+                    stats['invalid'] += 1
+
+            def rewrite():
+                done = []
+                for row, spool, filename in prepared:
+                    url = f'/uploads/{blob_key(spool.sha256, filename)}'
+                    updated = (
+                        db.session.query(Profile)
+                        .filter(Profile.id == row.id, Profile.avatar_url == row.avatar_url)
+                        .update({Profile.avatar_url: url}, synchronize_session=False)
+                    )
+                    # a row edited meanwhile keeps its new value
+                    if updated:
+                        attach_blob(spool, filename, 'avatar', row.id)
+                        done.append((row, url))
+                schedule_variants([url for _, url in done])
+                return done
+
+            done = run_write(rewrite) if prepared else []
+        finally:
+            for _, spool, _ in prepared:
+                spool.close()
+        for row, url in done:
+            stats['profiles'] += 1
+            stats['bytes_before'] += len(row.avatar_url)
+            stats['bytes_after'] += len(url)
+        if done:
+            log(f"extracted {stats['profiles']} avatar(s)")
@@ -0,0 +1,419 @@
+"""Content-addressed, deduplicating storage for uploaded files.
+
+Every uploaded file is stored once, under the key ``blobs/ab/cd/<sha256>.<ext>``
+of the configured storage backend (``backend/storage.py``), however many daily
+uploads or feedback attachments point at it. The ``blobs`` table lists stored
+files and ``blob_refs`` links each one to its owners (``('upload',
+daily_upload.id)`` or ``('feedback', feedback.id)``). Deleting an owner only
+drops its refs; ``collect_garbage`` (``python -m backend.scripts.gc_blobs``)
+later removes blobs nobody references.
+
+Ordering is what keeps this safe without cross-process locks. ``attach_blob`` runs
+inside the owner's write transaction: it flushes the blob and ref rows first,
+which takes SQLite's write lock, and only then checks that the bytes are stored
+(``put_blob`` may already have uploaded them outside the lock). The collector
+deletes a blob row and its object under that same lock, so the two never
+interleave. Objects left behind by a rolled-back upload have no row and are
+swept once they are older than the grace period.
+
+With a remote backend, ``stage_blob`` and ``enqueue_blob`` let a request skip
+the upload: the rows are committed together with a ``store_blob`` job, which
+writes the bytes afterwards (see ``backend/jobs.py``). The collector keeps the
+blob meanwhile because it is referenced.
+
+``migrate_legacy_files`` (``python -m backend.scripts.migrate_storage``) turns
+files from before the blob store, ``<user_id>/<name>`` trees, into blobs, and
+copies blobs between backends.
+"""
+import json
+import os
+import shutil
+import time
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import or_, text
+from werkzeug.utils import secure_filename
+from .db import db
+from .ingest import HashingSpool, INCOMING_DIR
+from .jobs import enqueue
+from .models import Blob, BlobRef, DailyUpload, Feedback, ImageVariant, Profile
+from .serializers import decode_attachments
+from .storage import LocalStorage, get_storage, upload_key
+from .writer import run_write
+
+BLOB_DIR = 'blobs'
+# files waiting for a store_blob job; under .incoming, so never served
+STAGED_DIR = os.path.join(INCOMING_DIR, 'staged')
+DEFAULT_GRACE_SECONDS = 24 * 3600
+
+
+def blob_key(sha256: str, filename: str = '') -> str:
+    """Relative path (also the served /uploads/ path) for content ``sha256``."""
+    name = secure_filename(filename or '')
+    ext = name.rsplit('.', 1)[1].lower() if '.' in name else ''
+    suffix = f'.{ext}' if ext.isalnum() and len(ext) <= 10 else ''
+    return f'{BLOB_DIR}/{sha256[:2]}/{sha256[2:4]}/{sha256}{suffix}'
+
+
+def spool_upload(file) -> HashingSpool:
+    """The hashed spool behind an uploaded FileStorage. Streams that did not
+    come through IngestRequest are copied into a new spool once."""
+    if isinstance(file.stream, HashingSpool):
+        return file.stream
+    uploads_root = current_app.config.get('UPLOAD_FOLDER')
+    spool = HashingSpool(os.path.join(uploads_root, INCOMING_DIR))
+    file.stream.seek(0)
+    while True:
+        chunk = file.stream.read(64 * 1024)
+        if not chunk:
+            break
+        spool.write(chunk)
+    # closed (and removed if unused) with the request's other files
+    file.stream = spool
+    return spool
+
+
+def put_blob(spool: HashingSpool, filename: str) -> str:
+    """Store the spooled bytes under their blob key unless already present.
+
+    Call before the write transaction so slow backends are not written to
+    under the database lock; ``attach_blob`` re-checks afterwards.
+    """
+    key = blob_key(spool.sha256, filename)
+    storage = get_storage()
+    if not storage.exists(key):
+        spool.flush()
+        storage.put_file(key, spool.path)
+    return key
+
+
+def register_blob(key: str, sha256: str, size: int, owner_type: str, owner_id: str):
+    """Upsert the blob row and add the owner's ref in the current transaction,
+    then flush, which takes the database write lock."""
+    session = db.session
+    blob = session.get(Blob, key)
+    now = datetime.utcnow()
+    if blob is None:
+        session.add(Blob(key=key, sha256=sha256, size=size, created_at=now, last_seen_at=now))
+    else:
+        blob.last_seen_at = now
+    _add_ref(key, owner_type, owner_id)
+    session.flush()
+
+
+def ref_blob(key: str, owner_type: str, owner_id: str) -> bool:
+    """Add the owner's ref to an already stored blob, in the current
+    transaction. Returns False when no blob has that key."""
+    blob = db.session.get(Blob, key)
+    if blob is None:
+        return False
+    blob.last_seen_at = datetime.utcnow()
+    _add_ref(key, owner_type, owner_id)
+    db.session.flush()
+    return True
+
+
+def _add_ref(key: str, owner_type: str, owner_id: str):
+    session = db.session
+    exists = session.query(BlobRef.id).filter_by(owner_type=owner_type, owner_id=owner_id, blob_key=key).first()
+    if exists is None:
+        session.add(BlobRef(blob_key=key, owner_type=owner_type, owner_id=owner_id))
+
+
+def attach_blob(spool: HashingSpool, filename: str, owner_type: str, owner_id: str) -> str:
+    """Register ``spool`` as a blob referenced by the owner, in the current
+    transaction, and make sure its bytes are stored. Returns the blob key.
+
+    Call from inside a ``run_write`` callable; safe to re-run on retry.
+    """
+    key = blob_key(spool.sha256, filename)
+    # the flush takes the database write lock before the object is checked
+    register_blob(key, spool.sha256, spool.size, owner_type, owner_id)
+    storage = get_storage()
+    if not storage.exists(key):
+        spool.flush()
+        storage.put_file(key, spool.path)
+    return key
+
+
+def stage_blob(spool: HashingSpool) -> str:
+    """Link the spooled bytes to a file that outlives the request, for
+    ``enqueue_blob``. The caller removes it if the transaction fails."""
+    spool.flush()
+    directory = os.path.join(current_app.config.get('UPLOAD_FOLDER'), STAGED_DIR)
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, os.path.basename(spool.path))
+    try:
+        os.link(spool.path, path)
+    except OSError:
+        shutil.copyfile(spool.path, path)
+    return path
+
+
+def enqueue_blob(spool: HashingSpool, filename: str, staged: str, owner_type: str, owner_id: str) -> str:
+    """Like ``attach_blob``, but the bytes are written by a ``store_blob`` job
+    after commit; the URL serves once a worker has run it. Returns the key."""
+    key = blob_key(spool.sha256, filename)
+    register_blob(key, spool.sha256, spool.size, owner_type, owner_id)
+    enqueue('store_blob', {'key': key, 'path': staged})
+    return key
+
+
+def release_refs(owner_type: str, owner_ids):
+    """Drop the refs held by these owners in the current transaction. The blobs
+    themselves are left for ``collect_garbage``."""
+    owner_ids = list(owner_ids)
+    if not owner_ids:
+        return 0
+    return (
+        db.session.query(BlobRef)
+        .filter(BlobRef.owner_type == owner_type, BlobRef.owner_id.in_(owner_ids))
+        .delete(synchronize_session=False)
+    )
+
+
+def is_blob_url(file_url: str) -> bool:
+    return bool(file_url) and file_url.lstrip('/').replace('uploads/', '', 1).startswith(BLOB_DIR + '/')
+
+
+def collect_garbage(grace_seconds: float = DEFAULT_GRACE_SECONDS, dry_run: bool = False, log=print) -> dict:
+    """Remove unreferenced blobs not referenced within ``grace_seconds`` (with
+    their image variants), and stray objects under blobs/ or variants/ with no
+    row that are older than that."""
+    from .variants import VARIANT_DIR, delete_variants
+    storage = get_storage()
+    cutoff = datetime.utcnow() - timedelta(seconds=grace_seconds)
+    session = db.session
+    stats = {'blobs': 0, 'bytes': 0, 'stray_files': 0}
+
+    candidates = (
+        session.query(Blob.key, Blob.size)
+        .filter(Blob.last_seen_at < cutoff)
+        .filter(~session.query(BlobRef.id).filter(BlobRef.blob_key == Blob.key).exists())
+        .all()
+    )
+    session.rollback()
+    for key, size in candidates:
+        if dry_run:
+            log(f'would delete {key} ({size} bytes)')
+            stats['blobs'] += 1
+            stats['bytes'] += size
+            continue
+        # re-checked under the write lock: an upload may have re-referenced it since
+        deleted = session.execute(
+            text(
+                'DELETE FROM blobs WHERE key = :key AND last_seen_at < :cutoff '
+                'AND NOT EXISTS (SELECT 1 FROM blob_refs WHERE blob_key = :key)'
+            ),
+            {'key': key, 'cutoff': cutoff.isoformat(' ')},
+        ).rowcount
+        if deleted:
+            storage.delete(key)
+            delete_variants(key, storage)
+            log(f'deleted {key} ({size} bytes)')
+            stats['blobs'] += 1
+            stats['bytes'] += size
+        session.commit()
+
+    def has_row(key):
+        if key.startswith(VARIANT_DIR + '/'):
+            return session.query(ImageVariant.key).filter_by(key=key).first() is not None
+        return session.get(Blob, key) is not None
+
+    cutoff_ts = time.time() - grace_seconds
+    objects = list(storage.iter_objects(BLOB_DIR + '/')) + list(storage.iter_objects(VARIANT_DIR + '/'))
+    for obj in objects:
+        if obj.mtime >= cutoff_ts:
+            continue
+        if dry_run:
+            if not has_row(obj.key):
+                log(f'would delete stray file {obj.key}')
+                stats['stray_files'] += 1
+            continue
+        # a no-op write takes the write lock, so no attach_blob is mid-flight
+        session.execute(text('UPDATE blobs SET key = key WHERE 0'))
+        if not has_row(obj.key):
+            storage.delete(obj.key)
+            log(f'deleted stray file {obj.key}')
+            stats['stray_files'] += 1
+        session.commit()
+    return stats
+
+
+def _spool_object(storage, key: str) -> HashingSpool:
+    spool = HashingSpool(os.path.join(current_app.config.get('UPLOAD_FOLDER'), INCOMING_DIR))
+    for chunk in storage.stream(key):
+        spool.write(chunk)
+    spool.flush()
+    return spool
+
+
+def _legacy_batches(query, column, batch_size):
+    """Rows of ``query`` in id order, ``batch_size`` at a time; committed
+    batches never match again, skipped ones are passed by the keyset."""
+    last_id = ''
+    while True:
+        rows = query.filter(column > last_id).order_by(column).limit(batch_size).all()
+        db.session.rollback()
+        if not rows:
+            return
+        last_id = getattr(rows[-1], column.key)
+        yield rows
+
+
+def migrate_legacy_files(source=None, batch_size: int = 100, dry_run: bool = False,
+                         delete_source: bool = False, log=print) -> dict:
+    """Move files stored before the blob store (``<user_id>/<time>_<name>`` under
+    UPLOAD_FOLDER, or absolute paths) into content-addressed blobs of the
+    configured storage, rewriting the rows that point at them.
+
+    Each batch is hashed and uploaded first, then its rows are updated in one
+    short write transaction, conditional on the old URL, so the site keeps
+    serving throughout and an interrupted run can simply be started again.
+    """
+    uploads_root = current_app.config.get('UPLOAD_FOLDER')
+    source = source or LocalStorage(uploads_root)
+    stats = {'uploads': 0, 'attachments': 0, 'avatars': 0, 'missing': 0, 'bytes': 0}
+    moved = []
+
+    def to_blob(url, filename, kind):
+        """(old key, spool) for a legacy URL, or None when there is nothing to write."""
+        old_key = upload_key(url, uploads_root)
+        obj = source.stat(old_key)
+        if obj is None:
+            log(f'missing {url}')
+            stats['missing'] += 1
+            return None
+        if dry_run:
+            log(f'would migrate {old_key}')
+            stats[kind] += 1
+            stats['bytes'] += obj.size
+            return None
+        spool = _spool_object(source, old_key)
+        try:
+            put_blob(spool, filename or old_key)
+        except Exception:
+            spool.close()
+            raise
+        return old_key, spool
+
+    legacy_upload = ~or_(DailyUpload.file_url.like(f'{BLOB_DIR}/%'), DailyUpload.file_url.like(f'/uploads/{BLOB_DIR}/%'))
+    uploads = db.session.query(DailyUpload.id, DailyUpload.file_url, DailyUpload.file_name).filter(legacy_upload)
+    for rows in _legacy_batches(uploads, DailyUpload.id, batch_size):
+        prepared = []
+
+        def rewrite_uploads():
+            done = []
+            for row, old_key, spool in prepared:
+                key = blob_key(spool.sha256, row.file_name or old_key)
+                updated = (
+                    db.session.query(DailyUpload)
+                    .filter(DailyUpload.id == row.id, DailyUpload.file_url == row.file_url)
+                    .update({DailyUpload.file_url: f'/uploads/{key}', DailyUpload.sha256: spool.sha256,
+                             DailyUpload.file_size: spool.size}, synchronize_session=False)
+                )
+                if not updated:
+                    continue
+                attach_blob(spool, row.file_name or old_key, 'upload', row.id)
+                # avatars were set to the URL the upload returned
+                avatars = (
+                    db.session.query(Profile)
+                    .filter(Profile.avatar_url.in_([f'/uploads/{old_key}', row.file_url]))
+                    .update({Profile.avatar_url: f'/uploads/{key}'}, synchronize_session=False)
+                )
+                done.append((old_key, spool.size, avatars))
+            return done
+
+        try:
+            for row in rows:
+                found = to_blob(row.file_url, row.file_name, 'uploads')
+                if found:
+                    prepared.append((row, *found))
+            if not prepared:
+                continue
+            for old_key, size, avatars in run_write(rewrite_uploads):
+                moved.append(old_key)
+                stats['uploads'] += 1
+                stats['avatars'] += avatars
+                stats['bytes'] += size
+        finally:
+            for _, _, spool in prepared:
+                spool.close()
+        log(f"migrated {stats['uploads']} upload(s)")
+
+    feedback = db.session.query(Feedback.id, Feedback.attachments).filter(Feedback.attachments.isnot(None))
+    for rows in _legacy_batches(feedback, Feedback.id, batch_size):
+        prepared = []
+
+        def rewrite_attachments():
+            done = []
+            for row, urls, found in prepared:
+                keys = {url: blob_key(spool.sha256, old_key) for url, (old_key, spool) in found.items()}
+                updated = (
+                    db.session.query(Feedback)
+                    .filter(Feedback.id == row.id, Feedback.attachments == row.attachments)
+                    .update({Feedback.attachments: json.dumps([
+                        f'/uploads/{keys[url]}' if url in keys else url for url in urls
+                    ])}, synchronize_session=False)
+                )
+                if not updated:
+                    continue
+                for url, (old_key, spool) in found.items():
+                    attach_blob(spool, old_key, 'feedback', row.id)
+                    done.append((old_key, spool.size))
+            return done
+
+        try:
+            for row in rows:
+                urls = decode_attachments(row.attachments)
+                found = {}
+                for url in urls:
+                    if not is_blob_url(url):
+                        item = to_blob(url, None, 'attachments')
+                        if item:
+                            found[url] = item
+                if found:
+                    prepared.append((row, urls, found))
+            if not prepared:
+                continue
+            for old_key, size in run_write(rewrite_attachments):
+                moved.append(old_key)
+                stats['attachments'] += 1
+                stats['bytes'] += size
+        finally:
+            for _, _, found in prepared:
+                for _, spool in found.values():
+                    spool.close()
+        log(f"migrated {stats['attachments']} attachment(s)")
+
+    if delete_source:
+        for old_key in moved:
+            source.delete(old_key)
+    return stats
+
+
+def copy_blobs(source, target=None, dry_run: bool = False, log=print) -> dict:
+    """Copy blob objects missing from ``target`` (default: the configured
+    storage) from ``source``, e.g. local disk to S3 after switching backends.
+    Safe to re-run; objects already present are skipped."""
+    target = target or get_storage()
+    stats = {'copied': 0, 'bytes': 0}
+    for obj in source.iter_objects(BLOB_DIR + '/'):
+        if target.exists(obj.key):
+            continue
+        if dry_run:
+            log(f'would copy {obj.key}')
+        else:
+            path = source.local_path(obj.key)
+            if path is not None:
+                target.put_file(obj.key, path)
+            else:
+                spool = _spool_object(source, obj.key)
+                try:
+                    target.put_file(obj.key, spool.path)
+                finally:
+                    spool.close()
+            log(f'copied {obj.key}')
+        stats['copied'] += 1
+        stats['bytes'] += obj.size
+    return stats
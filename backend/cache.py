@@ -0,0 +1,156 @@
+"""Bounded per-process cache of user identity snapshots.
+
+``/auth/me``, ``/student/profile``, ``admin_only`` and the admin feedback
+detail keep looking up the same few users. ``cached_identity(user_id)``
+returns a read-only ``UserSnapshot`` (user columns plus the profile) from an
+LRU cache with a TTL, loading it from the primary on a miss.
+
+Session hooks keep the cache honest: flushed User/Profile changes invalidate
+their user id when the transaction commits, and bulk ``query.update()`` /
+``delete()`` on either model clears the whole cache, since the affected ids
+are not known. Writes made by other processes are only picked up once the
+entry expires (``IDENTITY_CACHE_TTL``).
+"""
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from .db import db
+from .serializers import PROFILE_FIELDS
+
+UserSnapshot = namedtuple('UserSnapshot', ('id', 'email', 'role', 'token_version', 'profile'))
+ProfileSnapshot = namedtuple('ProfileSnapshot', PROFILE_FIELDS + ('updated_at',))
+
+DEFAULT_MAXSIZE = 2048
+DEFAULT_TTL = 30.0
+
+
+class IdentityCache:
+    def __init__(self, maxsize: int = DEFAULT_MAXSIZE, ttl: float = DEFAULT_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # bumped by every invalidation so a load that raced with a write is not stored
+        self._generation = 0
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'invalidations': 0}
+
+    def configure(self, maxsize=None, ttl=None):
+        with self._lock:
+            if maxsize is not None:
+                self.maxsize = maxsize
+            if ttl is not None:
+                self.ttl = ttl
+            self._entries.clear()
+
+    def get(self, key, loader):
+        """Return the cached value for ``key``, calling ``loader(key)`` on a miss.
+
+        ``None`` results (unknown users) are not cached.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > now:
+                self._entries.move_to_end(key)
+                self._stats['hits'] += 1
+                return entry[0]
+            if entry is not None:
+                del self._entries[key]
+            self._stats['misses'] += 1
+            generation = self._generation
+        value = loader(key)
+        if value is None or self.maxsize <= 0:
+            return value
+        with self._lock:
+            if generation == self._generation:
+                self._entries[key] = (value, time.monotonic() + self.ttl)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+                    self._stats['evictions'] += 1
+        return value
+
+    def invalidate(self, *keys):
+        with self._lock:
+            self._generation += 1
+            for key in keys:
+                if self._entries.pop(key, None) is not None:
+                    self._stats['invalidations'] += 1
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._stats['invalidations'] += len(self._entries)
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self._stats, 'size': len(self._entries), 'maxsize': self.maxsize, 'ttl': self.ttl}
+
+
+identity_cache = IdentityCache()
+
+
+def init_identity_cache(app):
+    identity_cache.configure(
+        maxsize=app.config.get('IDENTITY_CACHE_SIZE', DEFAULT_MAXSIZE),
+        ttl=app.config.get('IDENTITY_CACHE_TTL', DEFAULT_TTL),
+    )
+
+
+def _load_identity(user_id):
+    from .models import User
+    # always the primary: a replica may not have the user's latest write yet
+    user = db.session.get(User, user_id)
+    if user is None:
+        return None
+    profile = user.profile
+    return UserSnapshot(
+        id=user.id,
+        email=user.email,
+        role=user.role,
+        token_version=user.token_version or 0,
+        profile=ProfileSnapshot(*(getattr(profile, name) for name in ProfileSnapshot._fields)) if profile else None,
+    )
+
+
+def cached_identity(user_id):
+    """UserSnapshot for ``user_id``, or None if the user does not exist."""
+    return identity_cache.get(user_id, _load_identity)
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_identity_changes(session, flush_context):
+    from .models import User, Profile
+    changed = session.info.setdefault('identity_changed', set())
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, User):
+            changed.add(obj.id)
+        elif isinstance(obj, Profile):
+            changed.add(obj.user_id)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _collect_bulk_identity_changes(orm_execute_state):
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    from .models import User, Profile
+    if any(m.class_ in (User, Profile) for m in orm_execute_state.all_mappers):
+        orm_execute_state.session.info['identity_clear'] = True
+
+
+@event.listens_for(Session, 'after_commit')
+def _apply_identity_changes(session):
+    changed = session.info.pop('identity_changed', None)
+    if session.info.pop('identity_clear', False):
+        identity_cache.clear()
+    elif changed:
+        identity_cache.invalidate(*changed)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _drop_identity_changes(session):
+    session.info.pop('identity_changed', None)
+    session.info.pop('identity_clear', None)
@@ -0,0 +1,49 @@
+"""Conditional GET support for the polled JSON endpoints.
+
+A validator is computed with one aggregate query over the collection the
+route is about to list: row count plus the newest change timestamps. If the
+client's If-None-Match still matches it, the route answers 304 before running
+the list query or serializing anything. The request's query string (filters,
+sort, limit, cursor) and the caller's identity are part of the tag, so each
+page and each user gets its own validator.
+
+Tags are weak (``W/"..."``): two workers may encode the same data with a
+different JSON encoder, so the bytes are not guaranteed identical.
+"""
+import hashlib
+from flask import current_app, request
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy import func
+
+CACHE_CONTROL = 'private, no-cache'
+
+
+def make_etag(*parts) -> str:
+    return hashlib.sha1(repr(parts).encode('utf-8')).hexdigest()
+
+
+def collection_etag(query, *changed_columns, related=()) -> str:
+    """Validator for everything ``query`` would return.
+
+    ``changed_columns`` are timestamp columns whose maximum moves whenever a
+    row is added or modified; the row count catches deletions. ``related`` are
+    extra scalar expressions (e.g. the newest profile change for lists that
+    embed student names) evaluated in the same round trip.
+    """
+    aggregates = [func.count()] + [func.max(c) for c in changed_columns] + list(related)
+    row = query.order_by(None).with_entities(*aggregates).one()
+    return make_etag(tuple(row), get_jwt_identity(), request.full_path)
+
+
+def not_modified(etag):
+    """304 response when the request's If-None-Match matches ``etag``, else None."""
+    if not request.if_none_match.contains_weak(etag):
+        return None
+    resp = current_app.response_class(status=304)
+    return with_etag(resp, etag)
+
+
+def with_etag(resp, etag):
+    resp.set_etag(etag, weak=True)
+    resp.headers['Cache-Control'] = CACHE_CONTROL
+    return resp
@@ -22,7 +22,30 @@ class Config:
         db_path = f'sqlite:///{db_path}'
     SQLALCHEMY_DATABASE_URI = db_path
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Optional read-only replica (e.g. a periodically synced copy of the SQLite
+    # file). Listing endpoints read from it via backend.db.read_session().
+    replica_path = os.environ.get('READ_REPLICA_URL')
+    if replica_path and not replica_path.startswith('sqlite:///'):
+        replica_path = f'sqlite:///{replica_path}'
+    SQLALCHEMY_BINDS = {'replica': replica_path} if replica_path else {}
+    # After a user's own write, their reads stay on the primary for this long
+    READ_YOUR_WRITES_SECONDS = float(os.environ.get('READ_YOUR_WRITES_SECONDS', 5))
+    # SQLite PRAGMA profile applied to every connection (see backend/db.py:
+    # 'production' or 'default'), plus optional per-PRAGMA overrides from env
+    SQLITE_PROFILE = os.environ.get('SQLITE_PROFILE', 'production')
+    SQLITE_PRAGMAS = {
+        key: os.environ[f'SQLITE_{key.upper()}']
+        for key in ('journal_mode', 'synchronous', 'mmap_size', 'cache_size', 'temp_store', 'busy_timeout', 'foreign_keys')
+        if os.environ.get(f'SQLITE_{key.upper()}')
+    }
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY', 'change-me-secret')
+    # How long a worker trusts its cached users.token_version before re-reading it.
+    # This is the revocation window: a suspended student (or demoted admin) keeps
+    # working tokens on other workers for up to this long. 0 re-reads every request.
+    TOKEN_VERSION_CACHE_SECONDS = float(os.environ.get('TOKEN_VERSION_CACHE_SECONDS', 30))
+    # Per-process LRU cache of user/profile snapshots (backend/cache.py)
+    IDENTITY_CACHE_SIZE = int(os.environ.get('IDENTITY_CACHE_SIZE', 2048))
+    IDENTITY_CACHE_TTL = float(os.environ.get('IDENTITY_CACHE_TTL', 30))
     # Use absolute path for uploads folder
     upload_folder = os.environ.get('UPLOAD_FOLDER')
     if not upload_folder:
@@ -31,3 +54,71 @@ class Config:
     # Ensure uploads directory exists
     os.makedirs(upload_folder, exist_ok=True)
     MAX_CONTENT_LENGTH = 50 * 1024 * 1024  # 50MB
+    # POST /student/uploads/batch: files per request and threads checking them
+    BATCH_UPLOAD_MAX_FILES = int(os.environ.get('BATCH_UPLOAD_MAX_FILES', 20))
+    BATCH_UPLOAD_WORKERS = int(os.environ.get('BATCH_UPLOAD_WORKERS', 4))
+    # Resumable uploads (/student/uploads/sessions): the same total size cap as a
+    # single POST, and how long an idle session is kept before it expires
+    UPLOAD_SESSION_MAX_SIZE = int(os.environ.get('UPLOAD_SESSION_MAX_SIZE', 50 * 1024 * 1024))
+    UPLOAD_SESSION_TTL = int(os.environ.get('UPLOAD_SESSION_TTL', 24 * 3600))
+    # Hand file bodies to the front proxy: '' (serve from the worker), 'x-accel-redirect'
+    # (nginx; FILE_OFFLOAD_PREFIX must be an internal location aliased to UPLOAD_FOLDER)
+    # or 'x-sendfile' (Apache mod_xsendfile, lighttpd)
+    FILE_OFFLOAD = os.environ.get('FILE_OFFLOAD', '').lower()
+    FILE_OFFLOAD_PREFIX = os.environ.get('FILE_OFFLOAD_PREFIX', '/protected-uploads/')
+    # Where file bytes live (backend/storage.py): 'local' (UPLOAD_FOLDER) or 's3'
+    # (any S3-compatible service; needs boto3). STORAGE_FALLBACK_LOCAL keeps reading
+    # files not yet copied by scripts/migrate_storage.py from UPLOAD_FOLDER.
+    STORAGE_BACKEND = os.environ.get('STORAGE_BACKEND', 'local').lower()
+    S3_BUCKET = os.environ.get('S3_BUCKET')
+    S3_PREFIX = os.environ.get('S3_PREFIX', '')
+    S3_ENDPOINT_URL = os.environ.get('S3_ENDPOINT_URL')
+    S3_REGION = os.environ.get('S3_REGION')
+    STORAGE_FALLBACK_LOCAL = os.environ.get('STORAGE_FALLBACK_LOCAL', 'false').lower() == 'true'
+    # Redirect downloads of remote objects to presigned URLs valid this many seconds
+    STORAGE_PRESIGN_DOWNLOADS = os.environ.get('STORAGE_PRESIGN_DOWNLOADS', 'true').lower() == 'true'
+    PRESIGN_EXPIRES = int(os.environ.get('PRESIGN_EXPIRES', 300))
+    # Image variants (backend/variants.py, needs Pillow): name -> longest side in px,
+    # e.g. IMAGE_VARIANTS=thumb:96,medium:640; generated by build_variants jobs
+    IMAGE_VARIANTS = {
+        name: int(side)
+        for name, side in (
+            item.split(':') for item in os.environ.get('IMAGE_VARIANTS', 'thumb:96,medium:640').split(',') if item
+        )
+    }
+    IMAGE_VARIANT_FORMAT = os.environ.get('IMAGE_VARIANT_FORMAT', 'WEBP').upper()
+    IMAGE_VARIANT_QUALITY = int(os.environ.get('IMAGE_VARIANT_QUALITY', 80))
+    # Largest decoded data: URI avatar accepted by the profile PUT (backend/avatars.py)
+    AVATAR_MAX_BYTES = int(os.environ.get('AVATAR_MAX_BYTES', 2 * 1024 * 1024))
+    # Background jobs (backend/jobs.py, run by `python -m backend.scripts.run_jobs`):
+    # failed jobs retry after JOB_RETRY_BASE_DELAY seconds, doubling up to the max;
+    # JOB_CONCURRENCY caps running jobs per type, e.g. send_email:2,store_blob:4
+    JOB_WORKER_THREADS = int(os.environ.get('JOB_WORKER_THREADS', 4))
+    JOB_POLL_INTERVAL = float(os.environ.get('JOB_POLL_INTERVAL', 1.0))
+    JOB_LEASE_SECONDS = int(os.environ.get('JOB_LEASE_SECONDS', 300))
+    JOB_RETRY_BASE_DELAY = float(os.environ.get('JOB_RETRY_BASE_DELAY', 10.0))
+    JOB_RETRY_MAX_DELAY = float(os.environ.get('JOB_RETRY_MAX_DELAY', 3600.0))
+    JOB_RETENTION_HOURS = float(os.environ.get('JOB_RETENTION_HOURS', 24 * 7))
+    JOB_CONCURRENCY = {
+        name: int(limit)
+        for name, limit in (item.split(':') for item in os.environ.get('JOB_CONCURRENCY', '').split(',') if item)
+    }
+    # Outgoing mail (backend/mail.py); without MAIL_SERVER messages are only logged
+    MAIL_SERVER = os.environ.get('MAIL_SERVER')
+    MAIL_PORT = int(os.environ.get('MAIL_PORT', 587))
+    MAIL_USE_TLS = os.environ.get('MAIL_USE_TLS', 'true').lower() == 'true'
+    MAIL_USERNAME = os.environ.get('MAIL_USERNAME')
+    MAIL_PASSWORD = os.environ.get('MAIL_PASSWORD')
+    MAIL_FROM = os.environ.get('MAIL_FROM', 'no-reply@studenthub.local')
+    MAIL_TIMEOUT = float(os.environ.get('MAIL_TIMEOUT', 30))
+    # Most ids accepted by one bulk admin request (/admin/students/bulk, /admin/uploads/bulk-status)
+    ADMIN_BULK_MAX_ITEMS = int(os.environ.get('ADMIN_BULK_MAX_ITEMS', 1000))
+    # Write coordination (backend/writer.py): commits are serialized per process
+    # and "database is locked" errors are retried with jittered backoff
+    WRITE_RETRY_ATTEMPTS = int(os.environ.get('WRITE_RETRY_ATTEMPTS', 5))
+    WRITE_RETRY_BASE_DELAY = float(os.environ.get('WRITE_RETRY_BASE_DELAY', 0.05))
+    WRITE_RETRY_MAX_DELAY = float(os.environ.get('WRITE_RETRY_MAX_DELAY', 1.0))
+    WRITE_QUEUE_TIMEOUT = float(os.environ.get('WRITE_QUEUE_TIMEOUT', 30.0))
+    # Run pending schema migrations inside create_app(). Off by default: run
+    # `python -m backend.scripts.migrate` once per deploy instead.
+    AUTO_MIGRATE = os.environ.get('AUTO_MIGRATE', '').lower() in ('1', 'true', 'yes')
@@ -1,3 +1,155 @@
+import threading
+import time
+from flask import current_app, g, has_request_context
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
+from sqlalchemy.orm import Session
 
 db = SQLAlchemy()
+
+# Per-connection PRAGMA sets, selected with Config.SQLITE_PROFILE. 'production'
+# lets readers run alongside a writer (WAL) and makes writers wait for the lock
+# instead of failing immediately with "database is locked". Foreign key
+# enforcement is opt-in (SQLITE_FOREIGN_KEYS=ON): a database that already has
+# orphaned rows would start failing writes, so check it first with
+# `python -m backend.scripts.migrate --check-foreign-keys`.
+SQLITE_PROFILES = {
+    'default': {},
+    'production': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'mmap_size': 256 * 1024 * 1024,
+        'cache_size': -64 * 1024,  # negative = KiB, i.e. 64 MiB per connection
+        'temp_store': 'MEMORY',
+        'busy_timeout': 5000,
+    },
+}
+
+
+def sqlite_pragmas(config) -> dict:
+    """Resolve the profile named by SQLITE_PROFILE plus any SQLITE_PRAGMAS overrides."""
+    name = config.get('SQLITE_PROFILE') or 'default'
+    if name not in SQLITE_PROFILES:
+        raise ValueError(f'Unknown SQLITE_PROFILE {name!r}; expected one of {sorted(SQLITE_PROFILES)}')
+    pragmas = dict(SQLITE_PROFILES[name])
+    pragmas.update(config.get('SQLITE_PRAGMAS') or {})
+    return pragmas
+
+
+def init_sqlite_tuning(app):
+    """Apply the configured PRAGMAs to every new connection of each SQLite engine."""
+    pragmas = sqlite_pragmas(app.config)
+    if not pragmas:
+        return
+
+    def apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for key, value in pragmas.items():
+                cursor.execute(f'PRAGMA {key}={value}')
+        finally:
+            cursor.close()
+
+    with app.app_context():
+        for engine in db.engines.values():
+            if engine.dialect.name == 'sqlite':
+                event.listen(engine, 'connect', apply_pragmas)
+
+
+def active_sqlite_pragmas(engine, names) -> dict:
+    """Read back the current value of each PRAGMA on a pooled connection."""
+    values = {}
+    with engine.connect() as conn:
+        for name in names:
+            row = conn.exec_driver_sql(f'PRAGMA {name}').first()
+            values[name] = row[0] if row else None
+    return values
+
+
+# --- read replica routing -------------------------------------------------
+#
+# When SQLALCHEMY_BINDS has a 'replica' engine, read-only endpoints query it
+# through read_session(). A user who has just written keeps reading from the
+# primary for READ_YOUR_WRITES_SECONDS so they always see their own changes.
+# The window is tracked per process, which matches how requests from one
+# client mostly land on the same worker; it is not a cross-worker guarantee.
+
+REPLICA_BIND = 'replica'
+_recent_writes = {}
+_recent_writes_lock = threading.Lock()
+
+
+def _current_identity():
+    try:
+        from flask_jwt_extended import get_jwt_identity
+        return get_jwt_identity()
+    except Exception:
+        return None
+
+
+def note_write(user_id):
+    if user_id:
+        with _recent_writes_lock:
+            _recent_writes[user_id] = time.monotonic()
+
+
+def wrote_recently(user_id) -> bool:
+    if not user_id:
+        return False
+    window = current_app.config.get('READ_YOUR_WRITES_SECONDS', 0)
+    with _recent_writes_lock:
+        last = _recent_writes.get(user_id)
+        if last is not None and time.monotonic() - last > window:
+            del _recent_writes[user_id]
+            last = None
+    return last is not None
+
+
+@event.listens_for(Session, 'after_flush')
+def _mark_session_wrote(session, flush_context):
+    session.info['wrote'] = True
+
+
+@event.listens_for(Session, 'after_commit')
+def _record_committed_write(session):
+    if session.info.pop('wrote', False) and has_request_context():
+        note_write(_current_identity())
+
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_rolled_back_write(session):
+    session.info.pop('wrote', None)
+
+
+def read_session():
+    """Session for read-only queries: the replica when configured, else db.session."""
+    if REPLICA_BIND not in db.engines:
+        return db.session
+    if has_request_context() and wrote_recently(_current_identity()):
+        return db.session
+    session = g.get('_replica_session')
+    if session is None:
+        session = Session(bind=db.engines[REPLICA_BIND])
+        g._replica_session = session
+    return session
+
+
+def close_replica_session(exc=None):
+    session = g.pop('_replica_session', None)
+    if session is not None:
+        session.close()
+
+
+def sync_replica(engine_key: str = REPLICA_BIND):
+    """Copy the primary SQLite database into the replica file (online backup API)."""
+    import sqlite3
+    primary = db.engine.url.database
+    replica = db.engines[engine_key].url.database
+    source = sqlite3.connect(primary)
+    target = sqlite3.connect(replica)
+    try:
+        source.backup(target)
+    finally:
+        target.close()
+        source.close()
+    db.engines[engine_key].dispose()
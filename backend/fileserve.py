@@ -0,0 +1,168 @@
+"""Serving stored upload files with validators, caching headers and ranges.
+
+``serve_file`` replaces bare ``send_from_directory``/``send_file`` calls:
+
+* a strong ETag built from the file's content metadata (a content hash when
+  the caller knows one, otherwise size + mtime), with Last-Modified;
+* ``Cache-Control: public, max-age=31536000, immutable`` for content-addressed
+  paths (files named by their sha256), revalidation for everything else;
+* If-None-Match / If-Modified-Since (304), If-Range, and single or
+  multipart/byteranges 206 responses;
+* ``FILE_OFFLOAD = 'x-accel-redirect'`` (nginx) or ``'x-sendfile'`` (Apache,
+  lighttpd): the worker sends headers only and the proxy streams the bytes,
+  handling ranges itself;
+* ``STORAGE_PRESIGN_DOWNLOADS``: objects in a remote backend (S3) are served
+  by redirecting to a presigned URL instead of proxying them.
+
+Files are read through ``storage.get_storage()``; keys are the paths after
+``/uploads/``.
+"""
+import mimetypes
+import os
+import re
+import uuid
+from datetime import datetime, timezone
+from urllib.parse import quote
+from flask import current_app, redirect, request
+from werkzeug.wsgi import wrap_file
+from .storage import get_storage, normalize_key
+
+CHUNK_SIZE = 64 * 1024
+# more ranges than this in one request is served as a plain 200
+MAX_RANGES = 16
+IMMUTABLE = 'public, max-age=31536000, immutable'
+# <sha256>.<ext> blobs and <sha256>.<variant>.<ext> image variants
+CONTENT_ADDRESSED = re.compile(r'(^|/)[0-9a-f]{64}(\.[A-Za-z0-9]+){0,2}$')
+
+
+def is_content_addressed(rel_path: str) -> bool:
+    return bool(CONTENT_ADDRESSED.search(rel_path))
+
+
+def _satisfiable_ranges(size):
+    rng = request.range
+    if rng is None or rng.units != 'bytes' or len(rng.ranges) > MAX_RANGES:
+        return None
+    spans = []
+    for start, stop in rng.ranges:
+        if start < 0:
+            start, stop = max(size + start, 0), size
+        else:
+            stop = size if stop is None else min(stop, size)
+        if start < stop:
+            spans.append((start, stop))
+    return spans
+
+
+def _multipart_body(storage, key, spans, size, mimetype, boundary):
+    for start, stop in spans:
+        yield (
+            f'\r\n--{boundary}\r\nContent-Type: {mimetype}\r\n'
+            f'Content-Range: bytes {start}-{stop - 1}/{size}\r\n\r\n'
+        ).encode('latin-1')
+        yield from storage.stream(key, start, stop, CHUNK_SIZE)
+    yield f'\r\n--{boundary}--\r\n'.encode('latin-1')
+
+
+def _multipart_length(spans, size, mimetype, boundary):
+    length = len(f'\r\n--{boundary}--\r\n')
+    for start, stop in spans:
+        length += len(
+            f'\r\n--{boundary}\r\nContent-Type: {mimetype}\r\n'
+            f'Content-Range: bytes {start}-{stop - 1}/{size}\r\n\r\n'
+        ) + (stop - start)
+    return length
+
+
+def _offload(resp, full_path, key):
+    mode = (current_app.config.get('FILE_OFFLOAD') or '').lower()
+    if mode == 'x-accel-redirect':
+        prefix = current_app.config.get('FILE_OFFLOAD_PREFIX', '/protected-uploads/')
+        resp.headers['X-Accel-Redirect'] = prefix.rstrip('/') + '/' + quote(key)
+        return True
+    if mode == 'x-sendfile':
+        resp.headers['X-Sendfile'] = os.path.abspath(full_path)
+        return True
+    return False
+
+
+def serve_file(key, download_name=None, as_attachment=False, content_hash=None, cache_control=None):
+    """Response for the stored object ``key``, or None if it does not exist."""
+    key = normalize_key(key)
+    if key is None:
+        # hidden entries such as the .incoming spool directory are never served
+        return None
+    storage, obj = get_storage().resolve(key)
+    if obj is None:
+        return None
+
+    size = obj.size
+    mimetype = mimetypes.guess_type(download_name or key)[0] or 'application/octet-stream'
+    etag = content_hash or obj.etag
+    last_modified = datetime.fromtimestamp(int(obj.mtime), tz=timezone.utc)
+    if cache_control is None:
+        cache_control = IMMUTABLE if is_content_addressed(key) else 'public, no-cache'
+
+    resp = current_app.response_class(mimetype=mimetype)
+    resp.set_etag(etag)
+    resp.last_modified = last_modified
+    resp.headers['Cache-Control'] = cache_control
+    resp.headers['Accept-Ranges'] = 'bytes'
+    if download_name or as_attachment:
+        disposition = 'attachment' if as_attachment else 'inline'
+        name = download_name or key.rsplit('/', 1)[-1]
+        resp.headers['Content-Disposition'] = f"{disposition}; filename*=UTF-8''{quote(name)}"
+
+    if request.if_none_match:
+        fresh = request.if_none_match.contains_weak(etag)
+    else:
+        fresh = bool(request.if_modified_since) and last_modified <= request.if_modified_since
+    if fresh:
+        resp.status_code = 304
+        return resp
+
+    full_path = storage.local_path(key)
+    if full_path is None:
+        if current_app.config.get('STORAGE_PRESIGN_DOWNLOADS'):
+            url = storage.presign(key, current_app.config.get('PRESIGN_EXPIRES', 300), download_name)
+            if url:
+                return redirect(url, 302)
+    elif _offload(resp, full_path, key):
+        return resp
+
+    spans = None
+    if request.range is not None:
+        # If-Range only honours the Range header while the file is unchanged
+        if_range = request.if_range
+        if not (if_range.etag or if_range.date) or if_range.etag == etag or (
+            if_range.date is not None and if_range.date >= last_modified
+        ):
+            spans = _satisfiable_ranges(size)
+            if spans == []:
+                resp.status_code = 416
+                resp.headers['Content-Range'] = f'bytes */{size}'
+                return resp
+
+    if not spans:
+        if full_path is not None:
+            # wsgi.file_wrapper lets servers such as gunicorn use sendfile()
+            resp.response = wrap_file(request.environ, open(full_path, 'rb'), CHUNK_SIZE)
+            resp.direct_passthrough = True
+        else:
+            resp.response = storage.stream(key, 0, None, CHUNK_SIZE)
+        resp.content_length = size
+        return resp
+
+    resp.status_code = 206
+    if len(spans) == 1:
+        start, stop = spans[0]
+        resp.response = storage.stream(key, start, stop, CHUNK_SIZE)
+        resp.content_length = stop - start
+        resp.headers['Content-Range'] = f'bytes {start}-{stop - 1}/{size}'
+        return resp
+
+    boundary = uuid.uuid4().hex
+    resp.response = _multipart_body(storage, key, spans, size, mimetype, boundary)
+    resp.content_length = _multipart_length(spans, size, mimetype, boundary)
+    resp.headers['Content-Type'] = f'multipart/byteranges; boundary={boundary}'
+    return resp
@@ -0,0 +1,92 @@
+"""Create the model-declared indexes on existing databases and report query plans.
+
+``db.create_all()`` only creates indexes together with a brand new table, so
+databases created before an index was declared never get it. ``ensure_indexes``
+creates whatever is missing; ``explain_route_queries`` runs EXPLAIN QUERY PLAN
+for the hot route queries so the index each one uses can be checked.
+"""
+from datetime import datetime
+from sqlalchemy import inspect
+from .db import db
+from .models import Profile, DailyUpload, Feedback
+
+
+def missing_indexes(bind=None):
+    """Return the declared indexes that do not exist in the database yet."""
+    inspector = inspect(bind if bind is not None else db.engine)
+    missing = []
+    for table in db.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {ix['name'] for ix in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                missing.append(index)
+    return missing
+
+
+def ensure_indexes(bind=None, dry_run: bool = False):
+    """Create missing indexes; returns the names that were (or would be) created."""
+    bind = bind if bind is not None else db.engine
+    created = []
+    for index in missing_indexes(bind):
+        if not dry_run:
+            index.create(bind=bind, checkfirst=True)
+        created.append(index.name)
+    return created
+
+
+def route_queries():
+    """The queries the routes issue, keyed by route, built by the routes' own
+    query builders so the plans checked are those of the real SQL."""
+    from .routes import admin, student
+    from .pagination import keyset_filter
+
+    session = db.session
+    sample_user = 'user-id'
+    sample_time = datetime(2000, 1, 1)
+
+    def uploads(args):
+        return admin._upload_query(session, args).order_by(*admin.UPLOAD_ORDER)
+
+    def feedback(args):
+        return admin._feedback_query(session, args).order_by(*admin.FEEDBACK_ORDER)
+
+    def students(args, sort_key='created_at'):
+        order = admin._student_order(admin.STUDENT_SORT_KEYS[sort_key])
+        return admin._student_query(session, args).order_by(*order)
+
+    return {
+        'student.get_uploads': student._own_uploads_query(session, sample_user)
+            .order_by(DailyUpload.created_at.desc()),
+        'student.feedback (GET)': student._own_feedback_query(session, sample_user)
+            .order_by(Feedback.created_at.desc()),
+        'student.feedback (daily limit)': student._feedback_since_query(sample_user, sample_time),
+        # cache._load_identity and forgot_username look profiles up the same way
+        'student.profile / auth.me': Profile.query.filter_by(user_id=sample_user),
+        'auth.forgot_username': Profile.query.filter_by(email='someone@example.com'),
+        'admin.get_students': students({}),
+        'admin.get_students (status)': students({'status': 'pending'}),
+        'admin.get_uploads': uploads({}),
+        'admin.get_uploads (status)': uploads({'status': 'pending'}),
+        'admin.get_uploads (student)': uploads({'user_id': sample_user}),
+        'admin.get_uploads (next page)': uploads({}).filter(
+            keyset_filter(DailyUpload.created_at, DailyUpload.id, sample_time, 'upload-id')
+        ),
+        'admin.list_feedback': feedback({'start': sample_time.isoformat()}),
+        'admin.list_feedback (status)': feedback({'status': 'submitted'}),
+        'admin.list_feedback (category)': feedback({'category': 'Mentor'}),
+    }
+
+
+def explain_route_queries():
+    """Return {route: [plan detail, ...]} from SQLite's EXPLAIN QUERY PLAN."""
+    plans = {}
+    with db.engine.connect() as conn:
+        for name, query in route_queries().items():
+            statement = query.statement
+            compiled = statement.compile(dialect=db.engine.dialect)
+            params = tuple(compiled.params[key] for key in compiled.positiontup)
+            rows = conn.exec_driver_sql(f'EXPLAIN QUERY PLAN {compiled}', params)
+            plans[name] = [row[-1] for row in rows]
+    return plans
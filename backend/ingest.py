@@ -0,0 +1,81 @@
+"""Single-pass ingest of multipart file uploads.
+
+By default Werkzeug spools each uploaded file to a temporary file, which then
+had to be copied into UPLOAD_FOLDER and re-read to measure. ``IngestRequest``
+(installed as the app's request class) instead points the form parser at
+``HashingSpool``: a file in ``UPLOAD_FOLDER/.incoming`` that computes the
+SHA-256 and the size as the parser writes into it. Storing the upload is then
+a hard link into the local storage backend, on the same filesystem, or one
+upload to a remote one (see ``blobstore.put_blob``). The spool is deleted when
+the request closes its files.
+"""
+import hashlib
+import os
+import uuid
+from flask import current_app
+from flask import Request
+
+INCOMING_DIR = '.incoming'
+CHUNK_SIZE = 64 * 1024
+
+
+class HashingSpool:
+    """Writable, seekable temp file that hashes and counts what is written."""
+
+    def __init__(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, f'{uuid.uuid4().hex}.part')
+        self._file = open(self.path, 'w+b')
+        self._hash = hashlib.sha256()
+        self.size = 0
+
+    @classmethod
+    def from_file(cls, path: str):
+        """Adopt a file that was written some other way (e.g. assembled from
+        resumable chunks), hashing it in one sequential read."""
+        spool = cls.__new__(cls)
+        spool.path = path
+        spool._file = open(path, 'r+b')
+        spool._hash = hashlib.sha256()
+        spool.size = 0
+        for chunk in iter(lambda: spool._file.read(CHUNK_SIZE), b''):
+            spool._hash.update(chunk)
+            spool.size += len(chunk)
+        spool._file.seek(0)
+        return spool
+
+    def write(self, data) -> int:
+        self._hash.update(data)
+        self.size += len(data)
+        return self._file.write(data)
+
+    @property
+    def sha256(self) -> str:
+        return self._hash.hexdigest()
+
+    def close(self, discard: bool = True):
+        if not self._file.closed:
+            self._file.close()
+        if discard:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+
+    @property
+    def closed(self) -> bool:
+        return self._file.closed
+
+    def __getattr__(self, name):
+        # read/seek/tell/readable/... for sniffing and for FileStorage
+        return getattr(self._file, name)
+
+    def __iter__(self):
+        return iter(self._file)
+
+
+class IngestRequest(Request):
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        uploads_root = current_app.config.get('UPLOAD_FOLDER')
+        return HashingSpool(os.path.join(uploads_root, INCOMING_DIR))
+
@@ -0,0 +1,269 @@
+"""Durable background jobs stored in the database.
+
+Side effects that do not need to finish inside the request (deleting files,
+sending mail, uploading to a remote storage backend) are queued as rows of
+the ``jobs`` table (migration 12). Call ``enqueue`` in the same transaction
+as the change that needs the job: a rolled-back request leaves no job, and a
+committed one cannot lose it. The request then returns without waiting on
+disk or mail latency.
+
+``python -m backend.scripts.run_jobs`` starts a ``Worker``: a thread pool that
+claims due jobs, runs their handler and records the outcome. A failed job is
+queued again after an exponential backoff (``JOB_RETRY_BASE_DELAY`` doubling
+up to ``JOB_RETRY_MAX_DELAY``) until it has run ``max_attempts`` times, then
+it is left as ``failed`` with its last error. Each job type runs at most
+``concurrency`` jobs at once across all workers; ``JOB_CONCURRENCY`` overrides
+the handler's default.
+
+Handlers are registered with ``@job_handler`` in ``backend/tasks.py`` and
+receive the payload as keyword arguments. They must be safe to re-run: a
+worker that dies mid-job leaves it ``running`` until its lease
+(``JOB_LEASE_SECONDS``) runs out, and then another worker claims it again.
+"""
+import json
+import os
+import random
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import and_, func, or_
+from .db import db
+from .models import Job
+from .writer import WriteConflict, run_write
+
+
+class JobHandler:
+    def __init__(self, func, concurrency: int, max_attempts: int):
+        self.func = func
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+
+
+_handlers = {}
+
+
+def job_handler(job_type: str, concurrency: int = 1, max_attempts: int = 5):
+    """Register ``func(**payload)`` as the handler of ``job_type``."""
+    def register(func):
+        _handlers[job_type] = JobHandler(func, concurrency, max_attempts)
+        return func
+    return register
+
+
+def handlers() -> dict:
+    from . import tasks  # noqa: F401  registers the app's handlers
+    return _handlers
+
+
+def concurrency_limit(job_type: str) -> int:
+    limits = current_app.config.get('JOB_CONCURRENCY', {})
+    return limits.get(job_type, handlers()[job_type].concurrency)
+
+
+def enqueue(job_type: str, payload: dict = None, delay: float = 0, max_attempts: int = None) -> Job:
+    """Stage a job in the current transaction; it becomes visible to workers
+    when the caller commits."""
+    handler = handlers().get(job_type)
+    if handler is None:
+        raise ValueError(f'Unknown job type: {job_type}')
+    job = Job(
+        id=str(uuid.uuid4()),
+        type=job_type,
+        payload=json.dumps(payload or {}),
+        status='queued',
+        attempts=0,
+        max_attempts=max_attempts or handler.max_attempts,
+        run_at=datetime.utcnow() + timedelta(seconds=delay),
+    )
+    db.session.add(job)
+    return job
+
+
+def retry_delay(attempts: int) -> float:
+    """Seconds to wait before the next attempt, with jitter so failures
+    caused by one outage do not all retry at the same moment."""
+    config = current_app.config
+    base = config.get('JOB_RETRY_BASE_DELAY', 10.0)
+    cap = config.get('JOB_RETRY_MAX_DELAY', 3600.0)
+    delay = min(cap, base * 2 ** max(attempts - 1, 0))
+    return delay * random.uniform(0.5, 1.0)
+
+
+def claim(worker_id: str, types=None):
+    """Mark the oldest due job of a type below its concurrency limit as
+    running for ``worker_id``. Returns (id, type, payload) or None.
+
+    Jobs whose lease ran out count as due again. The running counts are read
+    in the same write transaction, so limits hold across worker processes.
+    """
+    registered = handlers()
+    types = [t for t in (types or registered) if t in registered]
+    lease = timedelta(seconds=current_app.config.get('JOB_LEASE_SECONDS', 300))
+
+    def take():
+        now = datetime.utcnow()
+        live = and_(Job.status == 'running', Job.locked_at >= now - lease)
+        running = dict(
+            db.session.query(Job.type, func.count()).filter(live, Job.type.in_(types)).group_by(Job.type).all()
+        )
+        open_types = [t for t in types if running.get(t, 0) < concurrency_limit(t)]
+        if not open_types:
+            return None
+        job = (
+            db.session.query(Job)
+            .filter(
+                Job.type.in_(open_types),
+                or_(
+                    and_(Job.status == 'queued', Job.run_at <= now),
+                    and_(Job.status == 'running', Job.locked_at < now - lease),
+                ),
+            )
+            .order_by(Job.run_at)
+            .first()
+        )
+        if job is None:
+            return None
+        job.status = 'running'
+        job.locked_by = worker_id
+        job.locked_at = now
+        job.attempts += 1
+        return job.id, job.type, json.loads(job.payload)
+
+    return run_write(take)
+
+
+def _record(job_id: str, worker_id: str, error: str = None):
+    def record():
+        job = db.session.get(Job, job_id)
+        # the lease ran out and another worker took the job over
+        if job is None or job.status != 'running' or job.locked_by != worker_id:
+            return
+        now = datetime.utcnow()
+        job.locked_by = None
+        job.locked_at = None
+        job.last_error = error
+        if error is None:
+            job.status = 'done'
+            job.finished_at = now
+        elif job.attempts >= job.max_attempts:
+            job.status = 'failed'
+            job.finished_at = now
+        else:
+            job.status = 'queued'
+            job.run_at = now + timedelta(seconds=retry_delay(job.attempts))
+
+    run_write(record)
+
+
+def run_job(worker_id: str, job_id: str, job_type: str, payload: dict) -> bool:
+    """Run one claimed job and record the outcome; True if it succeeded."""
+    error = None
+    try:
+        handlers()[job_type].func(**payload)
+    except Exception as e:
+        current_app.logger.exception('job %s (%s) failed', job_id, job_type)
+        error = f'{type(e).__name__}: {e}'
+    finally:
+        db.session.rollback()
+    _record(job_id, worker_id, error)
+    return error is None
+
+
+def run_pending(worker_id: str = None, types=None, limit: int = None) -> int:
+    """Run due jobs one at a time in this thread until none are left (or
+    ``limit`` have run); returns how many ran. Used by ``run_jobs --once``
+    and tests."""
+    worker_id = worker_id or new_worker_id()
+    count = 0
+    while limit is None or count < limit:
+        claimed = claim(worker_id, types)
+        if claimed is None:
+            return count
+        run_job(worker_id, *claimed)
+        count += 1
+    return count
+
+
+def purge_jobs(older_than: timedelta) -> int:
+    """Delete jobs that finished successfully more than ``older_than`` ago.
+    Failed jobs are kept for inspection."""
+    cutoff = datetime.utcnow() - older_than
+
+    def purge():
+        return (
+            db.session.query(Job)
+            .filter(Job.status == 'done', Job.finished_at < cutoff)
+            .delete(synchronize_session=False)
+        )
+
+    return run_write(purge)
+
+
+def job_stats(session) -> dict:
+    """{type: {status: count}} for /debug/db."""
+    stats = {}
+    for job_type, status, count in session.query(Job.type, Job.status, func.count()).group_by(Job.type, Job.status):
+        stats.setdefault(job_type, {})[status] = count
+    return stats
+
+
+def new_worker_id() -> str:
+    return f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+
+
+class Worker:
+    """Claims jobs on one thread and runs them on a pool of ``threads``."""
+
+    def __init__(self, app, threads: int = None, types=None, poll_interval: float = None):
+        self.app = app
+        self.threads = threads or app.config.get('JOB_WORKER_THREADS', 4)
+        self.types = types
+        self.poll_interval = poll_interval or app.config.get('JOB_POLL_INTERVAL', 1.0)
+        self.id = new_worker_id()
+        self.stop_event = threading.Event()
+
+    def stop(self):
+        self.stop_event.set()
+
+    def _run(self, claimed):
+        with self.app.app_context():
+            run_job(self.id, *claimed)
+
+    def _claim(self):
+        with self.app.app_context():
+            try:
+                return claim(self.id, self.types)
+            except WriteConflict:
+                return None
+
+    def _purge(self):
+        hours = self.app.config.get('JOB_RETENTION_HOURS', 24 * 7)
+        with self.app.app_context():
+            try:
+                purged = purge_jobs(timedelta(hours=hours))
+            except WriteConflict:
+                return
+        if purged:
+            self.app.logger.info('purged %d finished job(s)', purged)
+
+    def run(self):
+        """Process jobs until ``stop`` is called."""
+        purge_every = 600.0
+        next_purge = 0.0
+        with ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix='jobs') as pool:
+            running = set()
+            while not self.stop_event.is_set():
+                running = {future for future in running if not future.done()}
+                claimed = self._claim() if len(running) < self.threads else None
+                if claimed is not None:
+                    running.add(pool.submit(self._run, claimed))
+                    continue
+                now = time.monotonic()
+                if now >= next_purge:
+                    self._purge()
+                    next_purge = now + purge_every
+                self.stop_event.wait(self.poll_interval)
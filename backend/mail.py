@@ -0,0 +1,31 @@
+"""Outgoing email over SMTP.
+
+Messages are sent by the ``send_email`` job (backend/tasks.py), never from a
+request. Without ``MAIL_SERVER`` nothing is sent and the message is only
+logged, which is enough for development.
+"""
+import smtplib
+from email.message import EmailMessage
+from flask import current_app
+
+
+def send_mail(to: str, subject: str, body: str) -> bool:
+    """Send a plain-text message; returns False when mail is not configured.
+    SMTP errors propagate so the job is retried."""
+    config = current_app.config
+    server = config.get('MAIL_SERVER')
+    if not server:
+        current_app.logger.info('MAIL_SERVER not set; not sending %r to %s', subject, to)
+        return False
+    message = EmailMessage()
+    message['From'] = config.get('MAIL_FROM')
+    message['To'] = to
+    message['Subject'] = subject
+    message.set_content(body)
+    with smtplib.SMTP(server, config.get('MAIL_PORT', 587), timeout=config.get('MAIL_TIMEOUT', 30)) as smtp:
+        if config.get('MAIL_USE_TLS', True):
+            smtp.starttls()
+        if config.get('MAIL_USERNAME'):
+            smtp.login(config['MAIL_USERNAME'], config.get('MAIL_PASSWORD') or '')
+        smtp.send_message(message)
+    return True
@@ -0,0 +1,255 @@
+"""Versioned schema migrations for the SQLite database.
+
+Migrations are ordered, idempotent steps registered with ``@migration``. Each
+applied step is recorded in the ``schema_migrations`` table, so ``upgrade()``
+only runs what is pending and can be run once per deploy:
+
+    python -m backend.scripts.migrate [--dry-run] [--status]
+
+Schema changes run in one transaction per step. Data backfills go through
+``MigrationContext.backfill``, which updates rows in small committed chunks
+so live traffic can take the write lock between them.
+"""
+import time
+from datetime import datetime
+from sqlalchemy import inspect, text
+from .db import db
+
+VERSION_TABLE = 'schema_migrations'
+DEFAULT_BATCH_SIZE = 1000
+# pause between backfill chunks so waiting writers get the lock
+DEFAULT_BATCH_PAUSE = 0.05
+
+MIGRATIONS = []
+
+
+def migration(version: int, name: str):
+    """Register a migration step. Steps must be safe to re-run."""
+    def decorator(fn):
+        MIGRATIONS.append((version, name, fn))
+        MIGRATIONS.sort(key=lambda m: m[0])
+        return fn
+    return decorator
+
+
+class MigrationContext:
+    def __init__(self, conn, dry_run: bool = False, batch_size: int = DEFAULT_BATCH_SIZE,
+                 batch_pause: float = DEFAULT_BATCH_PAUSE, log=print):
+        self.conn = conn
+        self.dry_run = dry_run
+        self.batch_size = batch_size
+        self.batch_pause = batch_pause
+        self.log = log
+
+    def has_table(self, table: str) -> bool:
+        return inspect(self.conn).has_table(table)
+
+    def columns(self, table: str):
+        return {row[1] for row in self.conn.exec_driver_sql(f'PRAGMA table_info({table})')}
+
+    def execute(self, sql: str, **params):
+        self.log(f'  {sql}')
+        if not self.dry_run:
+            return self.conn.execute(text(sql), params)
+
+    def add_column(self, table: str, column: str, ddl_type: str):
+        # a missing table is created with every current column by create_tables
+        if not self.has_table(table) or column in self.columns(table):
+            return
+        self.execute(f'ALTER TABLE {table} ADD COLUMN {column} {ddl_type}')
+
+    def create_tables(self):
+        """Create tables that are declared on the models but missing in the database."""
+        for table in db.metadata.sorted_tables:
+            if not self.has_table(table.name):
+                self.log(f'  CREATE TABLE {table.name}')
+                if not self.dry_run:
+                    table.create(bind=self.conn)
+
+    def create_indexes(self):
+        from .indexes import ensure_indexes
+        for name in ensure_indexes(bind=self.conn, dry_run=self.dry_run):
+            self.log(f'  CREATE INDEX {name}')
+
+    def backfill(self, table: str, assignments: str, where: str, **params) -> int:
+        """UPDATE ``table`` in committed chunks of ``batch_size`` rows.
+
+        ``where`` must stop matching a row once it has been updated, otherwise
+        the loop never terminates. Returns the number of rows updated (or, in
+        dry-run mode, the number that would be).
+        """
+        if not self.has_table(table):
+            return 0
+        if self.dry_run:
+            pending = self.conn.execute(text(f'SELECT COUNT(*) FROM {table} WHERE {where}'), params).scalar()
+            self.log(f'  would backfill {pending} row(s) in {table}: SET {assignments} WHERE {where}')
+            return pending
+        # finish the step's DDL transaction so each chunk commits on its own
+        self.conn.commit()
+        total = 0
+        sql = text(
+            f'UPDATE {table} SET {assignments} WHERE rowid IN '
+            f'(SELECT rowid FROM {table} WHERE {where} LIMIT :_batch_size)'
+        )
+        while True:
+            updated = self.conn.execute(sql, {**params, '_batch_size': self.batch_size}).rowcount
+            self.conn.commit()
+            total += updated
+            if updated < self.batch_size:
+                break
+            if self.batch_pause:
+                time.sleep(self.batch_pause)
+        self.log(f'  backfilled {total} row(s) in {table}')
+        return total
+
+
+def _ensure_version_table(conn):
+    conn.exec_driver_sql(
+        f'CREATE TABLE IF NOT EXISTS {VERSION_TABLE} '
+        '(version INTEGER PRIMARY KEY, name VARCHAR NOT NULL, applied_at DATETIME NOT NULL)'
+    )
+    conn.commit()
+
+
+def applied_versions(conn) -> set:
+    if not inspect(conn).has_table(VERSION_TABLE):
+        return set()
+    return {row[0] for row in conn.exec_driver_sql(f'SELECT version FROM {VERSION_TABLE}')}
+
+
+def foreign_key_violations(conn):
+    """[(table, parent table, orphaned rows)] from PRAGMA foreign_key_check;
+    must be empty before SQLITE_FOREIGN_KEYS=ON is enabled."""
+    counts = {}
+    for table, _rowid, parent, _fkid in conn.exec_driver_sql('PRAGMA foreign_key_check'):
+        counts[(table, parent)] = counts.get((table, parent), 0) + 1
+    return [(table, parent, count) for (table, parent), count in sorted(counts.items())]
+
+
+def pending_migrations(conn):
+    done = applied_versions(conn)
+    return [m for m in MIGRATIONS if m[0] not in done]
+
+
+def upgrade(engine=None, dry_run: bool = False, batch_size: int = DEFAULT_BATCH_SIZE,
+            batch_pause: float = DEFAULT_BATCH_PAUSE, log=print):
+    """Apply pending migrations in order; returns the versions applied."""
+    from . import models  # noqa: F401 - register tables on db.metadata
+    engine = engine or db.engine
+    applied = []
+    with engine.connect() as conn:
+        if not dry_run:
+            _ensure_version_table(conn)
+        for version, name, fn in pending_migrations(conn):
+            log(f'{"[dry-run] " if dry_run else ""}Applying {version:04d}_{name}')
+            ctx = MigrationContext(conn, dry_run=dry_run, batch_size=batch_size, batch_pause=batch_pause, log=log)
+            try:
+                fn(ctx)
+                if not dry_run:
+                    conn.execute(
+                        text(f'INSERT INTO {VERSION_TABLE} (version, name, applied_at) VALUES (:v, :n, :t)'),
+                        {'v': version, 'n': name, 't': datetime.utcnow().isoformat(' ')},
+                    )
+                    conn.commit()
+                else:
+                    conn.rollback()
+            except Exception:
+                conn.rollback()
+                raise
+            applied.append(version)
+    return applied
+
+
+@migration(1, 'initial_schema')
+def _initial_schema(ctx):
+    ctx.create_tables()
+
+
+@migration(2, 'profile_course_fields')
+def _profile_course_fields(ctx):
+    # replaces scripts/add_course_fields.py
+    for column in ('course_name', 'course_mode', 'course_duration'):
+        ctx.add_column('profiles', column, 'VARCHAR')
+
+
+@migration(3, 'profile_city_pincode')
+def _profile_city_pincode(ctx):
+    # replaces scripts/add_city_pincode_columns.py
+    for column in ('city', 'pincode'):
+        ctx.add_column('profiles', column, 'VARCHAR')
+
+
+@migration(4, 'route_indexes')
+def _route_indexes(ctx):
+    ctx.create_indexes()
+
+
+@migration(5, 'backfill_created_at')
+def _backfill_created_at(ctx):
+    # keyset pagination orders by created_at, so rows without one would never be listed
+    now = datetime.utcnow().isoformat(' ')
+    ctx.backfill('profiles', 'created_at = COALESCE(updated_at, :now)', 'created_at IS NULL', now=now)
+    ctx.backfill('daily_uploads', 'created_at = COALESCE(upload_date, :now)', 'created_at IS NULL', now=now)
+    ctx.backfill('feedbacks', 'created_at = COALESCE(updated_at, :now)', 'created_at IS NULL', now=now)
+
+
+@migration(6, 'user_token_version')
+def _user_token_version(ctx):
+    ctx.add_column('users', 'token_version', 'INTEGER NOT NULL DEFAULT 0')
+
+
+@migration(7, 'upload_sha256')
+def _upload_sha256(ctx):
+    ctx.add_column('daily_uploads', 'sha256', 'VARCHAR(64)')
+
+
+@migration(8, 'blob_store')
+def _blob_store(ctx):
+    ctx.create_tables()
+    ctx.create_indexes()
+
+
+@migration(9, 'upload_sessions')
+def _upload_sessions(ctx):
+    ctx.create_tables()
+    ctx.create_indexes()
+
+
+@migration(10, 'image_variants')
+def _image_variants(ctx):
+    ctx.create_tables()
+    ctx.create_indexes()
+
+
+def _canonicalize_urls(ctx, table: str, column: str, uploads_root: str):
+    # mirrors storage.canonical_url: backslashes, then absolute paths under the
+    # uploads root, then bare keys all become /uploads/<key>
+    external = f"{column} NOT LIKE 'http://%' AND {column} NOT LIKE 'https://%' AND {column} NOT LIKE 'data:%'"
+    ctx.backfill(table, f"{column} = REPLACE({column}, '\\', '/')", f"{column} LIKE '%\\%' AND {external}")
+    if uploads_root:
+        ctx.backfill(
+            table,
+            f"{column} = '/uploads/' || SUBSTR({column}, LENGTH(:root) + 1)",
+            f"SUBSTR({column}, 1, LENGTH(:root)) = :root AND {column} NOT LIKE '/uploads/%'",
+            root=uploads_root,
+        )
+    ctx.backfill(
+        table,
+        f"{column} = '/uploads/' || {column}",
+        f"{column} != '' AND {column} NOT LIKE '/%' AND {column} NOT LIKE '_:/%' AND {external}",
+    )
+
+
+@migration(11, 'canonical_file_urls')
+def _canonical_file_urls(ctx):
+    from flask import current_app
+    root = (current_app.config.get('UPLOAD_FOLDER') or '').replace('\\', '/').rstrip('/')
+    root = root + '/' if root else ''
+    _canonicalize_urls(ctx, 'daily_uploads', 'file_url', root)
+    _canonicalize_urls(ctx, 'profiles', 'avatar_url', root)
+
+
+@migration(12, 'jobs')
+def _jobs(ctx):
+    ctx.create_tables()
+    ctx.create_indexes()
@@ -8,6 +8,8 @@ class User(db.Model):
     email = db.Column(db.String, unique=True, nullable=False)
     password_hash = db.Column(db.String, nullable=False)
     role = db.Column(db.String, default='student')  # student or admin
+    # bumped to revoke issued JWTs when the account's role/status changes
+    token_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
     profile = db.relationship('Profile', backref='user', uselist=False, cascade='all, delete')
@@ -34,6 +36,13 @@ class Profile(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    __table_args__ = (
+        db.Index('ix_profiles_user_id', 'user_id'),
+        db.Index('ix_profiles_email', 'email'),
+        db.Index('ix_profiles_status_created_at', 'status', 'created_at', 'id'),
+        db.Index('ix_profiles_created_at', 'created_at', 'id'),
+    )
+
 class DailyUpload(db.Model):
     __tablename__ = 'daily_uploads'
     id = db.Column(db.String, primary_key=True, default=lambda: str(uuid.uuid4()))
@@ -42,6 +51,7 @@ class DailyUpload(db.Model):
     file_url = db.Column(db.String, nullable=False)
     file_type = db.Column(db.String, nullable=True)
     file_size = db.Column(db.Integer, nullable=True)
+    sha256 = db.Column(db.String(64), nullable=True)
     upload_date = db.Column(db.DateTime, default=datetime.utcnow)
     description = db.Column(db.String, nullable=True)
     status = db.Column(db.String, default='pending')
@@ -50,6 +60,12 @@ class DailyUpload(db.Model):
     reviewed_at = db.Column(db.DateTime, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    __table_args__ = (
+        db.Index('ix_daily_uploads_user_id_created_at', 'user_id', 'created_at', 'id'),
+        db.Index('ix_daily_uploads_status_created_at', 'status', 'created_at', 'id'),
+        db.Index('ix_daily_uploads_created_at', 'created_at', 'id'),
+    )
+
 class Feedback(db.Model):
     __tablename__ = 'feedbacks'
     id = db.Column(db.String, primary_key=True, default=lambda: str(uuid.uuid4()))
@@ -66,3 +82,88 @@ class Feedback(db.Model):
     responded_at = db.Column(db.DateTime, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_feedbacks_user_id_created_at', 'user_id', 'created_at', 'id'),
+        db.Index('ix_feedbacks_status_created_at', 'status', 'created_at', 'id'),
+        db.Index('ix_feedbacks_category_created_at', 'category', 'created_at', 'id'),
+        db.Index('ix_feedbacks_created_at', 'created_at', 'id'),
+    )
+
+class Blob(db.Model):
+    """A stored file, named by its content hash (see backend/blobstore.py)."""
+    __tablename__ = 'blobs'
+    key = db.Column(db.String, primary_key=True)  # path under UPLOAD_FOLDER, e.g. blobs/ab/cd/<sha256>.pdf
+    sha256 = db.Column(db.String(64), nullable=False)
+    size = db.Column(db.Integer, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # last time a reference was added; garbage collection waits out a grace period after it
+    last_seen_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class BlobRef(db.Model):
+    __tablename__ = 'blob_refs'
+    id = db.Column(db.Integer, primary_key=True)
+    blob_key = db.Column(db.String, db.ForeignKey('blobs.key'), nullable=False)
+    owner_type = db.Column(db.String, nullable=False)  # upload, feedback or avatar
+    owner_id = db.Column(db.String, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.UniqueConstraint('owner_type', 'owner_id', 'blob_key', name='uq_blob_refs_owner_blob'),
+        db.Index('ix_blob_refs_blob_key', 'blob_key'),
+    )
+
+class UploadSession(db.Model):
+    """A resumable upload in progress (see backend/resumable.py)."""
+    __tablename__ = 'upload_sessions'
+    id = db.Column(db.String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    user_id = db.Column(db.String, db.ForeignKey('users.id'), nullable=False)
+    file_name = db.Column(db.String, nullable=False)
+    file_type = db.Column(db.String, nullable=True)
+    description = db.Column(db.String, nullable=True)
+    total_size = db.Column(db.Integer, nullable=False)
+    received = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_upload_sessions_user_id', 'user_id'),
+        db.Index('ix_upload_sessions_expires_at', 'expires_at'),
+    )
+
+class ImageVariant(db.Model):
+    """A resized copy of an image blob (see backend/variants.py)."""
+    __tablename__ = 'image_variants'
+    source_key = db.Column(db.String, primary_key=True)  # blob key of the original
+    name = db.Column(db.String, primary_key=True)  # thumb, medium, ...
+    key = db.Column(db.String, nullable=False)
+    width = db.Column(db.Integer, nullable=False)
+    height = db.Column(db.Integer, nullable=False)
+    size = db.Column(db.Integer, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_image_variants_key', 'key'),
+        db.Index('ix_image_variants_created_at', 'created_at'),
+    )
+
+class Job(db.Model):
+    """Queued background work (see backend/jobs.py)."""
+    __tablename__ = 'jobs'
+    id = db.Column(db.String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    type = db.Column(db.String, nullable=False)
+    payload = db.Column(db.Text, nullable=False, default='{}')  # JSON
+    status = db.Column(db.String, nullable=False, default='queued')  # queued, running, done or failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=5)
+    run_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    locked_by = db.Column(db.String, nullable=True)
+    locked_at = db.Column(db.DateTime, nullable=True)
+    last_error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        db.Index('ix_jobs_status_run_at', 'status', 'run_at'),
+        db.Index('ix_jobs_type_status', 'type', 'status'),
+    )
@@ -0,0 +1,86 @@
+"""Keyset (cursor) pagination helpers shared by the listing routes.
+
+A cursor is the sort key of the last row of a page plus its primary key, so
+the next page is answered by an index range scan instead of OFFSET.
+"""
+import base64
+import binascii
+import json
+from datetime import datetime
+from sqlalchemy import and_, or_
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 500
+# rows returned to clients that send neither ``limit`` nor ``after``; the rest
+# is still reachable through X-Next-Cursor
+UNPAGED_LIMIT = 1000
+
+
+def page_limit(args, default: int = DEFAULT_LIMIT, maximum: int = MAX_LIMIT) -> int:
+    """Page size requested by ``args``. Clients that do not page at all get
+    ``UNPAGED_LIMIT`` rows, so older callers keep working without a full scan."""
+    if args.get('limit') is None and args.get('after') is None:
+        return UNPAGED_LIMIT
+    return parse_limit(args.get('limit'), default, maximum)
+
+
+def parse_limit(raw, default: int = DEFAULT_LIMIT, maximum: int = MAX_LIMIT) -> int:
+    try:
+        limit = int(raw)
+    except (TypeError, ValueError):
+        return default
+    return max(1, min(limit, maximum))
+
+
+def parse_datetime(raw):
+    """Parse an ISO-8601 query value, returning None when missing or malformed."""
+    if not raw:
+        return None
+    try:
+        return datetime.fromisoformat(raw)
+    except (TypeError, ValueError):
+        return None
+
+
+def encode_cursor(sort_value, row_id: str) -> str:
+    if isinstance(sort_value, datetime):
+        sort_value = sort_value.isoformat()
+    raw = json.dumps([sort_value, row_id], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(raw: str, is_datetime: bool = True):
+    """Decode a cursor into (sort_value, id).
+
+    Accepts both the opaque form produced by encode_cursor and the plain
+    ``<created_at>,<id>`` form. Raises ValueError for anything else.
+    """
+    if not raw:
+        raise ValueError('empty cursor')
+    try:
+        if ',' in raw:
+            sort_value, row_id = raw.rsplit(',', 1)
+        else:
+            padded = raw + '=' * (-len(raw) % 4)
+            sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        if is_datetime:
+            sort_value = datetime.fromisoformat(sort_value)
+    except (TypeError, ValueError, UnicodeError, binascii.Error):
+        # decoded JSON of the wrong shape or type is as malformed as bad base64
+        raise ValueError('malformed cursor')
+    if not isinstance(row_id, str):
+        raise ValueError('malformed cursor')
+    return sort_value, row_id
+
+
+def keyset_filter(sort_column, id_column, sort_value, row_id, descending: bool = True):
+    """Rows strictly after (sort_value, row_id) in (sort_column, id_column) order."""
+    if descending:
+        return or_(sort_column < sort_value, and_(sort_column == sort_value, id_column < row_id))
+    return or_(sort_column > sort_value, and_(sort_column == sort_value, id_column > row_id))
+
+
+def fetch_page(query, limit: int):
+    """Fetch one page plus a look-ahead row; returns (rows, has_more)."""
+    rows = query.limit(limit + 1).all()
+    return rows[:limit], len(rows) > limit
@@ -0,0 +1,87 @@
+"""Resumable chunked uploads.
+
+A client creates a session with the file's name, type and total size, then
+PUTs the bytes in any number of chunks, each tagged with an ``Upload-Offset``
+header that must equal the bytes received so far. After a dropped connection
+it asks for the current offset and carries on from there. Chunks are appended
+to ``UPLOAD_FOLDER/.incoming/sessions/<id>.part`` straight from the request
+stream. Completing the session hashes the assembled file once, stores it
+through the blob store and creates the same DailyUpload row as
+``POST /student/uploads``.
+
+Idle sessions expire after ``UPLOAD_SESSION_TTL`` seconds (each chunk extends
+the deadline). ``expire_sessions`` (``python -m
+backend.scripts.expire_upload_sessions``) deletes expired rows and their
+part files.
+"""
+import os
+from datetime import datetime, timedelta
+from flask import current_app
+from .db import db
+from .ingest import INCOMING_DIR, CHUNK_SIZE
+from .models import UploadSession
+
+SESSIONS_DIR = 'sessions'
+
+
+class ChunkTooLarge(Exception):
+    """The chunk would take the upload past its declared size."""
+
+
+def part_path(session_id: str) -> str:
+    return os.path.join(current_app.config.get('UPLOAD_FOLDER'), INCOMING_DIR, SESSIONS_DIR, f'{session_id}.part')
+
+
+def new_expiry() -> datetime:
+    return datetime.utcnow() + timedelta(seconds=current_app.config.get('UPLOAD_SESSION_TTL', 24 * 3600))
+
+
+def create_part_file(session_id: str):
+    path = part_path(session_id)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    open(path, 'wb').close()
+
+
+def write_chunk(upload_session, offset: int, stream) -> int:
+    """Write the request body at ``offset`` of the part file; returns bytes written.
+
+    Anything past ``offset`` left by an interrupted earlier chunk is
+    discarded first, so the file always matches the recorded offset.
+    """
+    remaining = upload_session.total_size - offset
+    written = 0
+    with open(part_path(upload_session.id), 'r+b') as f:
+        f.truncate(offset)
+        f.seek(offset)
+        while True:
+            chunk = stream.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            written += len(chunk)
+            if written > remaining:
+                f.truncate(offset)
+                raise ChunkTooLarge()
+            f.write(chunk)
+    return written
+
+
+def discard(session_ids):
+    """Delete the part files of these sessions (rows are the caller's job)."""
+    for session_id in session_ids:
+        try:
+            os.remove(part_path(session_id))
+        except FileNotFoundError:
+            pass
+
+
+def expire_sessions(now=None, log=print) -> int:
+    """Delete expired sessions and their part files; returns how many."""
+    now = now or datetime.utcnow()
+    expired = [row.id for row in db.session.query(UploadSession.id).filter(UploadSession.expires_at < now)]
+    if not expired:
+        return 0
+    db.session.query(UploadSession).filter(UploadSession.id.in_(expired)).delete(synchronize_session=False)
+    db.session.commit()
+    discard(expired)
+    log(f'expired {len(expired)} upload session(s)')
+    return len(expired)
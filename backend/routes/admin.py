@@ -1,65 +1,169 @@
 from flask import Blueprint, request, jsonify, current_app
 import os
-from ..db import db
-from ..models import Profile, DailyUpload, User, Feedback
-from flask_jwt_extended import jwt_required, get_jwt_identity
+import json
+from datetime import datetime
+from ..db import db, read_session
+from ..models import Profile, DailyUpload, User, Feedback, UploadSession
+from ..writer import run_write, WriteConflict, busy_response
+from ..auth import forget_token_version
+from ..cache import cached_identity
+from ..blobstore import is_blob_url, release_refs
+from ..variants import variant_urls, variants_changed_at
+from ..jobs import enqueue
+from ..storage import upload_key
+from ..conditional import collection_etag, not_modified, with_etag
+from ..serializers import (
+    PROFILE_FIELDS, UPLOAD_FIELDS, FEEDBACK_FIELDS, columns,
+    serialize_profile, serialize_upload, serialize_feedback, json_response, dumps,
+)
+from ..pagination import page_limit, parse_datetime, decode_cursor, encode_cursor, keyset_filter, fetch_page
+from flask_jwt_extended import jwt_required, get_jwt, get_jwt_identity
+from sqlalchemy import case, func
 from sqlalchemy.exc import IntegrityError
 
 admin_bp = Blueprint('admin', __name__)
 
 def admin_only(fn):
-    # simple decorator to check role
+    # role comes from the token's claims, so the check costs no query
     from functools import wraps
     @wraps(fn)
     def wrapper(*args, **kwargs):
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
-        if not user or user.role != 'admin':
+        role = get_jwt().get('role')
+        if role is None:
+            # token issued before role claims existed: fall back to the database
+            user = cached_identity(get_jwt_identity())
+            role = user.role if user else None
+        if role != 'admin':
             return jsonify({'success': False, 'message': 'Admin access required'}), 403
         return fn(*args, **kwargs)
     return wrapper
 
+def _revoke_tokens(user_id):
+    """Bump the user's token version in the current transaction."""
+    db.session.query(User).filter(User.id == user_id).update(
+        {User.token_version: User.token_version + 1}, synchronize_session=False
+    )
+
+# ids per IN (...) list in bulk statements, well under SQLite's bound-parameter limit
+BULK_CHUNK = 400
+
+def _chunks(values, size=BULK_CHUNK):
+    values = list(values)
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+def _bulk_items(data, *fields):
+    """Normalize a bulk body to [{'id': ..., field: ...}]: either ``items``
+    (per-item values) or ``ids`` sharing the top-level values. Returns
+    (items, error message)."""
+    if 'items' in data:
+        items = data.get('items')
+        if not isinstance(items, list) or not all(isinstance(item, dict) for item in items):
+            return None, 'items must be a list of objects'
+        items = [{'id': item.get('id'), **{f: item.get(f, data.get(f)) for f in fields}} for item in items]
+    else:
+        ids = data.get('ids')
+        if not isinstance(ids, list):
+            return None, 'ids or items is required'
+        items = [{'id': i, **{f: data.get(f) for f in fields}} for i in ids]
+    if not items:
+        return None, 'No items given'
+    limit = current_app.config.get('ADMIN_BULK_MAX_ITEMS', 1000)
+    if len(items) > limit:
+        return None, f'At most {limit} items per request'
+    return items, None
+
+def _bulk_response(results):
+    updated = sum(1 for r in results if r['success'])
+    return jsonify({'success': True, 'updated': updated, 'failed': len(results) - updated, 'results': results})
+
+def _outcome(item_id, error=None, **extra):
+    if error:
+        return {'id': item_id, 'success': False, 'message': error}
+    return {'id': item_id, 'success': True, **extra}
+
+def _mark_duplicates(items, results):
+    """Reject repeated ids (every occurrence after the first); returns the rest."""
+    seen = set()
+    kept = []
+    for i, item in enumerate(items):
+        if not isinstance(item['id'], str) or not item['id']:
+            results[i] = _outcome(item['id'], 'id is required')
+        elif item['id'] in seen:
+            results[i] = _outcome(item['id'], 'Duplicate id')
+        else:
+            seen.add(item['id'])
+            kept.append((i, item))
+    return kept
+
+# exact-match filters accepted by GET /students
+STUDENT_FILTERS = ('status', 'college_name', 'city', 'pincode', 'course_name', 'course_mode')
+# sort keys are limited to non-null columns so the keyset cursor stays well defined
+STUDENT_SORT_KEYS = {
+    'created_at': Profile.created_at,
+    'full_name': Profile.full_name,
+    'email': Profile.email,
+}
+
+# list order of the upload and feedback listings (and their exports); the
+# keyset cursor and the (created_at, id) indexes depend on it
+UPLOAD_ORDER = (DailyUpload.created_at.desc(), DailyUpload.id.desc())
+FEEDBACK_ORDER = (Feedback.created_at.desc(), Feedback.id.desc())
+
+def _student_order(sort_column, descending=True):
+    if descending:
+        return sort_column.desc(), Profile.id.desc()
+    return sort_column.asc(), Profile.id.asc()
+
+def _student_query(session, args):
+    q = session.query(*columns(Profile, PROFILE_FIELDS))
+    for field in STUDENT_FILTERS:
+        value = args.get(field)
+        if value:
+            q = q.filter(getattr(Profile, field) == value)
+    return q
+
 @admin_bp.route('/students', methods=['GET'])
 @jwt_required()
 @admin_only
 def get_students():
     try:
-        profiles = Profile.query.order_by(Profile.created_at.desc()).all()
-        result = []
-        uploads_root = current_app.config.get('UPLOAD_FOLDER')
-        for p in profiles:
-            avatar_url = p.avatar_url
+        limit = page_limit(request.args)
+        sort = request.args.get('sort') or '-created_at'
+        descending = sort.startswith('-')
+        sort_key = sort.lstrip('-')
+        if sort_key not in STUDENT_SORT_KEYS:
+            return jsonify({'success': False, 'message': f'Invalid sort key: {sort_key}'}), 400
+        sort_column = STUDENT_SORT_KEYS[sort_key]
+
+        session = read_session()
+        q = _student_query(session, request.args)
+        etag = collection_etag(q, Profile.created_at, Profile.updated_at, related=[variants_changed_at(session)])
+        unchanged = not_modified(etag)
+        if unchanged:
+            return unchanged
+        # counted before the cursor is applied so every page reports the same total
+        total = q.order_by(None).count()
+
+        after = request.args.get('after')
+        if after:
             try:
-                if avatar_url and not (avatar_url.startswith('data:') or avatar_url.startswith('http') or avatar_url.startswith('/uploads/')):
-                    # if it's stored as an absolute path, make it a predictable URL like /uploads/<rel>
-                    import os
-                    rel = os.path.relpath(avatar_url, uploads_root)
-                    rel = rel.replace('\\', '/')
-                    avatar_url = f"/uploads/{rel}"
-            except Exception:
-                # fallback to raw avatar_url
-                pass
-
-            result.append({
-                'id': p.id,
-                'user_id': p.user_id,
-                'username': p.username,
-                'email': p.email,
-                'full_name': p.full_name,
-                'contact_number': p.contact_number,
-                'college_name': p.college_name,
-                'college_id': p.college_id,
-                'city': p.city,
-                'pincode': p.pincode,
-                'college_email': p.college_email,
-                'course_name': p.course_name,
-                'course_mode': p.course_mode,
-                'course_duration': p.course_duration,
-                'avatar_url': avatar_url,
-                'status': p.status,
-                'created_at': p.created_at.isoformat() if p.created_at else None
-            })
-        return jsonify(result)
+                after_value, after_id = decode_cursor(after, is_datetime=(sort_key == 'created_at'))
+            except ValueError:
+                return jsonify({'success': False, 'message': 'Invalid cursor'}), 400
+            q = q.filter(keyset_filter(sort_column, Profile.id, after_value, after_id, descending=descending))
+        q = q.order_by(*_student_order(sort_column, descending))
+        profiles, has_more = fetch_page(q, limit)
+
+        # the grid shows avatars as thumbnails: variant URLs spare clients the originals
+        variants = variant_urls(session, [p.avatar_url for p in profiles])
+        result = [serialize_profile(p, variants=variants) for p in profiles]
+        resp = with_etag(json_response(result), etag)
+        resp.headers['X-Total-Count'] = str(total)
+        if has_more:
+            last = profiles[-1]
+            resp.headers['X-Next-Cursor'] = encode_cursor(getattr(last, sort_key), last.id)
+        return resp
     except Exception as e:
         return jsonify({'success': False, 'message': f'Failed to fetch students: {str(e)}'}), 500
 
@@ -81,11 +185,17 @@ def approve_student(profile_id):
     if not profile:
         return jsonify({'success': False, 'message': 'Profile not found'}), 404
     
-    try:
+    def apply_approval():
         profile.username = username
         profile.status = 'active'
-        db.session.commit()
+        _revoke_tokens(profile.user_id)
+
+    try:
+        run_write(apply_approval)
+        forget_token_version(profile.user_id)
         return jsonify({'success': True, 'message': f'Student approved with username: {username}'})
+    except WriteConflict:
+        return busy_response()
     except IntegrityError as e:
         db.session.rollback()
         if 'username' in str(e.orig).lower() or 'unique' in str(e.orig).lower():
@@ -104,7 +214,9 @@ def suspend_student(profile_id):
         if not profile:
             return jsonify({'success': False, 'message': 'Profile not found'}), 404
         profile.status = 'suspended'
+        _revoke_tokens(profile.user_id)
         db.session.commit()
+        forget_token_version(profile.user_id)
         return jsonify({'success': True, 'message': 'Student suspended successfully.'})
     except Exception as e:
         db.session.rollback()
@@ -119,55 +231,157 @@ def activate_student(profile_id):
         if not profile:
             return jsonify({'success': False, 'message': 'Profile not found'}), 404
         profile.status = 'active'
+        _revoke_tokens(profile.user_id)
         db.session.commit()
+        forget_token_version(profile.user_id)
         return jsonify({'success': True, 'message': 'Student activated successfully.'})
     except Exception as e:
         db.session.rollback()
         return jsonify({'success': False, 'message': f'Failed to activate student: {str(e)}'}), 500
 
+STUDENT_ACTIONS = {'approve': 'active', 'activate': 'active', 'suspend': 'suspended'}
+
+@admin_bp.route('/students/bulk', methods=['POST'])
+@jwt_required()
+@admin_only
+def bulk_update_students():
+    """Approve, activate or suspend many students in one transaction.
+
+    Body: ``{"action": "suspend", "ids": [...]}``, or for approvals
+    ``{"action": "approve", "items": [{"id": ..., "username": ...}]}``.
+    Returns one result per item, in order; failed items do not stop the rest.
+    """
+    data = request.get_json() or {}
+    action = data.get('action')
+    if action not in STUDENT_ACTIONS:
+        return jsonify({'success': False, 'message': 'action must be approve, activate or suspend'}), 400
+    items, error = _bulk_items(data, 'username')
+    if error:
+        return jsonify({'success': False, 'message': error}), 400
+    status = STUDENT_ACTIONS[action]
+
+    def apply_bulk():
+        results = [None] * len(items)
+        kept = _mark_duplicates(items, results)
+        ids = [item['id'] for _, item in kept]
+        user_ids = {}
+        for chunk in _chunks(ids):
+            user_ids.update(db.session.query(Profile.id, Profile.user_id).filter(Profile.id.in_(chunk)).all())
+        # username -> ids asking for it, and -> the profile already holding it
+        wanted, taken, usernames = {}, {}, {}
+        if action == 'approve':
+            for _, item in kept:
+                if item['username']:
+                    wanted.setdefault(item['username'], []).append(item['id'])
+            for chunk in _chunks(wanted):
+                taken.update(
+                    db.session.query(Profile.username, Profile.id).filter(Profile.username.in_(chunk)).all()
+                )
+        for i, item in kept:
+            if item['id'] not in user_ids:
+                results[i] = _outcome(item['id'], 'Profile not found')
+            elif action == 'approve':
+                username = item['username']
+                if not username:
+                    results[i] = _outcome(item['id'], 'username is required')
+                elif len(wanted[username]) > 1 or taken.get(username, item['id']) != item['id']:
+                    results[i] = _outcome(item['id'], f'Username "{username}" is already taken')
+                else:
+                    usernames[item['id']] = username
+        ok = [item['id'] for i, item in kept if results[i] is None]
+        for chunk in _chunks(ok):
+            values = {Profile.status: status}
+            if action == 'approve':
+                values[Profile.username] = case({pid: usernames[pid] for pid in chunk}, value=Profile.id)
+            db.session.query(Profile).filter(Profile.id.in_(chunk)).update(values, synchronize_session=False)
+            # like the single-student routes, a status change revokes issued tokens
+            db.session.query(User).filter(User.id.in_([user_ids[pid] for pid in chunk])).update(
+                {User.token_version: User.token_version + 1}, synchronize_session=False
+            )
+        for i, item in kept:
+            if results[i] is None:
+                results[i] = _outcome(item['id'], status=status)
+                if action == 'approve':
+                    results[i]['username'] = usernames[item['id']]
+        return results, [user_ids[pid] for pid in ok]
+
+    try:
+        results, revoked = run_write(apply_bulk)
+    except WriteConflict:
+        return busy_response()
+    except IntegrityError:
+        # a username was claimed by another request after the check
+        db.session.rollback()
+        return jsonify({'success': False, 'message': 'A username was taken meanwhile; nothing was changed. Please retry.'}), 409
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'message': f'Failed to update students: {str(e)}'}), 500
+    for user_id in revoked:
+        forget_token_version(user_id)
+    return _bulk_response(results)
+
+def _profiles_changed_at(session):
+    # scalar subquery, evaluated in the same statement as the list's validator
+    return session.query(func.max(Profile.updated_at)).scalar_subquery()
+
+def _upload_query(session, args):
+    status = args.get('status')
+    user_id = args.get('user_id')
+    start = parse_datetime(args.get('start'))
+    end = parse_datetime(args.get('end'))
+    # student name comes from a correlated subquery so a page costs one query
+    student_name = (
+        session.query(Profile.full_name)
+        .filter(Profile.user_id == DailyUpload.user_id)
+        .limit(1)
+        .correlate(DailyUpload)
+        .scalar_subquery()
+    )
+    q = session.query(*columns(DailyUpload, UPLOAD_FIELDS), student_name.label('student_name'))
+    if status:
+        q = q.filter(DailyUpload.status == status)
+    if user_id:
+        q = q.filter(DailyUpload.user_id == user_id)
+    if start:
+        q = q.filter(DailyUpload.created_at >= start)
+    if end:
+        q = q.filter(DailyUpload.created_at <= end)
+    return q
+
 @admin_bp.route('/uploads', methods=['GET'])
 @jwt_required()
 @admin_only
 def get_uploads():
-    import os
     try:
-        uploads = DailyUpload.query.order_by(DailyUpload.created_at.desc()).all()
-        # fetch profile names
-        result = []
-        uploads_root = current_app.config.get('UPLOAD_FOLDER')
-        for u in uploads:
-            profile = Profile.query.filter_by(user_id=u.user_id).first()
-            file_url = u.file_url
-            if not file_url.startswith('/uploads/'):
-                try:
-                    rel = os.path.relpath(file_url, uploads_root)
-                    # Convert to forward slashes for URL
-                    rel = rel.replace('\\', '/')
-                    file_url = f"/uploads/{rel}"
-                except Exception:
-                    pass
-            else:
-                # Ensure forward slashes in stored URL paths
-                file_url = file_url.replace('\\', '/')
-            result.append({
-                **{
-                    'id': u.id,
-                    'user_id': u.user_id,
-                    'file_name': u.file_name,
-                    'file_url': file_url,
-                    'file_type': u.file_type,
-                    'file_size': u.file_size,
-                    'upload_date': u.upload_date.isoformat() if u.upload_date else None,
-                    'description': u.description,
-                    'status': u.status,
-                    'admin_feedback': u.admin_feedback,
-                    'reviewed_by': u.reviewed_by,
-                    'reviewed_at': u.reviewed_at.isoformat() if u.reviewed_at else None,
-                    'created_at': u.created_at.isoformat() if u.created_at else None,
-                },
-                'student_name': profile.full_name if profile else 'Unknown'
-            })
-        return jsonify(result)
+        limit = page_limit(request.args)
+        session = read_session()
+        q = _upload_query(session, request.args)
+        # student names are embedded, so a renamed profile must change the tag too
+        etag = collection_etag(
+            q, DailyUpload.created_at, DailyUpload.reviewed_at,
+            related=[_profiles_changed_at(session), variants_changed_at(session)],
+        )
+        unchanged = not_modified(etag)
+        if unchanged:
+            return unchanged
+        after = request.args.get('after')
+        if after:
+            try:
+                after_created, after_id = decode_cursor(after)
+            except ValueError:
+                return jsonify({'success': False, 'message': 'Invalid cursor'}), 400
+            q = q.filter(keyset_filter(DailyUpload.created_at, DailyUpload.id, after_created, after_id))
+        q = q.order_by(*UPLOAD_ORDER)
+        rows, has_more = fetch_page(q, limit)
+
+        variants = variant_urls(session, [row.file_url for row in rows])
+        result = [serialize_upload(row, row.student_name, with_student=True, variants=variants) for row in rows]
+        resp = with_etag(json_response(result), etag)
+        # the body stays a plain list; the next page is advertised in a header
+        if has_more:
+            last = rows[-1]
+            resp.headers['X-Next-Cursor'] = encode_cursor(last.created_at, last.id)
+        return resp
     except Exception as e:
         return jsonify({'success': False, 'message': f'Failed to fetch uploads: {str(e)}'}), 500
 
@@ -184,16 +398,118 @@ def update_upload_status(upload_id):
         upload = DailyUpload.query.get(upload_id)
         if not upload:
             return jsonify({'success': False, 'message': 'Upload not found'}), 404
-        upload.status = status
-        upload.admin_feedback = feedback
-        upload.reviewed_by = get_jwt_identity()
-        upload.reviewed_at = __import__('datetime').datetime.utcnow()
-        db.session.commit()
+        reviewer_id = get_jwt_identity()
+
+        def apply_review():
+            upload.status = status
+            upload.admin_feedback = feedback
+            upload.reviewed_by = reviewer_id
+            upload.reviewed_at = __import__('datetime').datetime.utcnow()
+
+        run_write(apply_review)
         return jsonify({'success': True, 'message': f'Upload marked as {status}.'})
+    except WriteConflict:
+        return busy_response()
     except Exception as e:
         db.session.rollback()
         return jsonify({'success': False, 'message': f'Failed to update upload status: {str(e)}'}), 500
 
+UPLOAD_REVIEW_STATUSES = ('reviewed', 'approved', 'rejected')
+
+@admin_bp.route('/uploads/bulk-status', methods=['POST'])
+@jwt_required()
+@admin_only
+def bulk_update_upload_status():
+    """Review many uploads in one transaction.
+
+    Body: ``{"status": "approved", "feedback": "...", "ids": [...]}``, or
+    ``{"items": [{"id": ..., "status": ..., "feedback": ...}]}`` where each item
+    may override the top-level status and feedback. Returns one result per
+    item, in order.
+    """
+    data = request.get_json() or {}
+    items, error = _bulk_items(data, 'status', 'feedback')
+    if error:
+        return jsonify({'success': False, 'message': error}), 400
+    reviewer_id = get_jwt_identity()
+
+    def apply_bulk():
+        results = [None] * len(items)
+        kept = _mark_duplicates(items, results)
+        found = set()
+        for chunk in _chunks([item['id'] for _, item in kept]):
+            rows = db.session.query(DailyUpload.id).filter(DailyUpload.id.in_(chunk))
+            found.update(upload_id for (upload_id,) in rows)
+        # one UPDATE per distinct (status, feedback) pair
+        groups = {}
+        for i, item in kept:
+            if item['status'] not in UPLOAD_REVIEW_STATUSES:
+                results[i] = _outcome(item['id'], 'Invalid status')
+            elif item['id'] not in found:
+                results[i] = _outcome(item['id'], 'Upload not found')
+            else:
+                groups.setdefault((item['status'], item['feedback']), []).append(item['id'])
+                results[i] = _outcome(item['id'], status=item['status'])
+        now = datetime.utcnow()
+        for (status, feedback), ids in groups.items():
+            for chunk in _chunks(ids):
+                db.session.query(DailyUpload).filter(DailyUpload.id.in_(chunk)).update({
+                    DailyUpload.status: status,
+                    DailyUpload.admin_feedback: feedback,
+                    DailyUpload.reviewed_by: reviewer_id,
+                    DailyUpload.reviewed_at: now,
+                }, synchronize_session=False)
+        return results
+
+    try:
+        results = run_write(apply_bulk)
+    except WriteConflict:
+        return busy_response()
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'message': f'Failed to update uploads: {str(e)}'}), 500
+    return _bulk_response(results)
+
+def _feedback_query(session, args):
+    category = args.get('category')
+    rating = args.get('rating')
+    status = args.get('status')
+    start = parse_datetime(args.get('start'))
+    end = parse_datetime(args.get('end'))
+    student_name = (
+        session.query(Profile.full_name)
+        .filter(Profile.user_id == Feedback.user_id)
+        .limit(1)
+        .correlate(Feedback)
+        .scalar_subquery()
+    )
+    student_email = (
+        session.query(Profile.email)
+        .filter(Profile.user_id == Feedback.user_id)
+        .limit(1)
+        .correlate(Feedback)
+        .scalar_subquery()
+    )
+    q = session.query(
+        *columns(Feedback, FEEDBACK_FIELDS),
+        student_name.label('student_name'),
+        student_email.label('student_email'),
+    )
+    if category:
+        q = q.filter(Feedback.category == category)
+    if rating:
+        try:
+            q = q.filter(Feedback.rating == float(rating))
+        except ValueError:
+            pass
+    if status:
+        q = q.filter(Feedback.status == status)
+    if start:
+        q = q.filter(Feedback.created_at >= start)
+    if end:
+        q = q.filter(Feedback.created_at <= end)
+    return q
+
 
 # Feedback management
 @admin_bp.route('/feedback', methods=['GET'])
@@ -201,64 +517,29 @@ def update_upload_status(upload_id):
 @admin_only
 def list_feedback():
     try:
-        # filters
-        category = request.args.get('category')
-        rating = request.args.get('rating')
-        status = request.args.get('status')
-        start = request.args.get('start')
-        end = request.args.get('end')
-
-        q = Feedback.query
-        if category:
-            q = q.filter_by(category=category)
-        if rating:
+        limit = page_limit(request.args)
+        session = read_session()
+        q = _feedback_query(session, request.args)
+        etag = collection_etag(q, Feedback.created_at, Feedback.updated_at, related=[_profiles_changed_at(session)])
+        unchanged = not_modified(etag)
+        if unchanged:
+            return unchanged
+        after = request.args.get('after')
+        if after:
             try:
-                q = q.filter_by(rating=int(rating))
-            except Exception:
-                pass
-        if status:
-            q = q.filter_by(status=status)
-        if start:
-            try:
-                from datetime import datetime
-                s = datetime.fromisoformat(start)
-                q = q.filter(Feedback.created_at >= s)
-            except Exception:
-                pass
-        if end:
-            try:
-                from datetime import datetime
-                e = datetime.fromisoformat(end)
-                q = q.filter(Feedback.created_at <= e)
-            except Exception:
-                pass
-        fbs = q.order_by(Feedback.created_at.desc()).all()
-        result = []
-        for f in fbs:
-            profile = Profile.query.filter_by(user_id=f.user_id).first()
-            attachments = []
-            try:
-                import json
-                attachments = json.loads(f.attachments) if f.attachments else []
-            except Exception:
-                attachments = []
-            result.append({
-                'id': f.id,
-                'user_id': f.user_id,
-                'student_name': profile.full_name if profile else None,
-                'student_email': profile.email if profile else None,
-                'category': f.category,
-                'subject': f.subject,
-                'message': f.message,
-                'rating': f.rating,
-                'attachments': attachments,
-                'status': f.status,
-                'admin_response': f.admin_response,
-                'responded_by': f.responded_by,
-                'responded_at': f.responded_at.isoformat() if f.responded_at else None,
-                'created_at': f.created_at.isoformat() if f.created_at else None,
-            })
-        return jsonify(result)
+                after_created, after_id = decode_cursor(after)
+            except ValueError:
+                return jsonify({'success': False, 'message': 'Invalid cursor'}), 400
+            q = q.filter(keyset_filter(Feedback.created_at, Feedback.id, after_created, after_id))
+        q = q.order_by(*FEEDBACK_ORDER)
+        rows, has_more = fetch_page(q, limit)
+
+        result = [serialize_feedback(row, row.student_name, row.student_email, with_student=True) for row in rows]
+        resp = with_etag(json_response(result), etag)
+        if has_more:
+            last = rows[-1]
+            resp.headers['X-Next-Cursor'] = encode_cursor(last.created_at, last.id)
+        return resp
     except Exception as e:
         return jsonify({'success': False, 'message': f'Failed to list feedback: {str(e)}'}), 500
 
@@ -271,25 +552,14 @@ def get_feedback(feedback_id):
         f = Feedback.query.get(feedback_id)
         if not f:
             return jsonify({'success': False, 'message': 'Feedback not found'}), 404
-        profile = Profile.query.filter_by(user_id=f.user_id).first()
-        import json
-        attachments = json.loads(f.attachments) if f.attachments else []
-        return jsonify({
-            'id': f.id,
-            'user_id': f.user_id,
-            'student_name': profile.full_name if profile else None,
-            'student_email': profile.email if profile else None,
-            'category': f.category,
-            'subject': f.subject,
-            'message': f.message,
-            'rating': f.rating,
-            'attachments': attachments,
-            'status': f.status,
-            'admin_response': f.admin_response,
-            'responded_by': f.responded_by,
-            'responded_at': f.responded_at.isoformat() if f.responded_at else None,
-            'created_at': f.created_at.isoformat() if f.created_at else None,
-        })
+        student = cached_identity(f.user_id)
+        profile = student.profile if student else None
+        return json_response(serialize_feedback(
+            f,
+            profile.full_name if profile else None,
+            profile.email if profile else None,
+            with_student=True,
+        ))
     except Exception as e:
         return jsonify({'success': False, 'message': f'Failed to fetch feedback: {str(e)}'}), 500
 
@@ -349,25 +619,28 @@ def delete_student(profile_id):
         if not profile:
             return jsonify({'success': False, 'message': 'Profile not found'}), 404
 
-        # Delete uploads from disk and DB
+        # Delete uploads from the DB; their files are removed by a job after commit
         uploads = DailyUpload.query.filter_by(user_id=profile.user_id).all()
-        uploads_root = current_app.config.get('UPLOAD_FOLDER')
+        # blob-backed files may be shared; their refs are dropped below and gc_blobs reclaims them
+        legacy_keys = [upload_key(u.file_url) for u in uploads if not is_blob_url(u.file_url)]
+        legacy_keys = [key for key in legacy_keys if key]
+        if legacy_keys:
+            enqueue('delete_objects', {'keys': legacy_keys})
         for u in uploads:
-            # try to delete file if exists
-            try:
-                file_path = u.file_url
-                if not file_path.startswith('/'):
-                    # stored as absolute path
-                    path = file_path
-                else:
-                    # relative URL like /uploads/relpath
-                    rel = file_path.replace('/uploads/', '')
-                    path = os.path.join(uploads_root, rel.replace('/', os.sep))
-                if os.path.exists(path):
-                    os.remove(path)
-            except Exception:
-                pass
             db.session.delete(u)
+        release_refs('upload', [u.id for u in uploads])
+        release_refs('avatar', [profile.id])
+
+        # Feedback rows reference users.id; remove them before the user (SQLITE_FOREIGN_KEYS=ON)
+        feedback_ids = [row.id for row in db.session.query(Feedback.id).filter_by(user_id=profile.user_id)]
+        release_refs('feedback', feedback_ids)
+        Feedback.query.filter_by(user_id=profile.user_id).delete(synchronize_session=False)
+
+        # unfinished resumable uploads also reference users.id
+        session_ids = [row.id for row in db.session.query(UploadSession.id).filter_by(user_id=profile.user_id)]
+        if session_ids:
+            UploadSession.query.filter(UploadSession.id.in_(session_ids)).delete(synchronize_session=False)
+            enqueue('discard_upload_parts', {'session_ids': session_ids})
 
         # Delete profile and user
         user = User.query.get(profile.user_id)
@@ -380,3 +653,77 @@ def delete_student(profile_id):
     except Exception as e:
         db.session.rollback()
         return jsonify({'success': False, 'message': f'Failed to delete student: {str(e)}'}), 500
+
+
+# Streaming exports
+EXPORT_BATCH_SIZE = 1000
+EXPORT_FLUSH_BYTES = 64 * 1024
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+# CSV header of each export, written even when no row matches
+EXPORT_COLUMNS = {
+    'students': PROFILE_FIELDS,
+    'uploads': UPLOAD_FIELDS + ('student_name',),
+    'feedback': FEEDBACK_FIELDS + ('student_name', 'student_email'),
+}
+
+def _export_rows(kind, session, args):
+    """Yield export dicts from a server-side cursor, EXPORT_BATCH_SIZE rows at a time."""
+    if kind == 'students':
+        q = _student_query(session, args).order_by(*_student_order(Profile.created_at))
+        for p in q.yield_per(EXPORT_BATCH_SIZE):
+            yield serialize_profile(p)
+    elif kind == 'uploads':
+        q = _upload_query(session, args).order_by(*UPLOAD_ORDER)
+        for row in q.yield_per(EXPORT_BATCH_SIZE):
+            yield serialize_upload(row, row.student_name, with_student=True)
+    else:
+        q = _feedback_query(session, args).order_by(*FEEDBACK_ORDER)
+        for row in q.yield_per(EXPORT_BATCH_SIZE):
+            yield serialize_feedback(row, row.student_name, row.student_email, with_student=True)
+
+@admin_bp.route('/export/<kind>', methods=['GET'])
+@jwt_required()
+@admin_only
+def export(kind):
+    import csv
+    import io
+    from datetime import datetime
+    from flask import Response, stream_with_context
+    if kind not in ('students', 'uploads', 'feedback'):
+        return jsonify({'success': False, 'message': 'Unknown export'}), 404
+    fmt = request.args.get('format', 'csv')
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({'success': False, 'message': 'format must be csv or ndjson'}), 400
+    rows = _export_rows(kind, read_session(), request.args)
+
+    def generate():
+        buffer = io.StringIO()
+        first = True
+        if fmt == 'csv':
+            writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS[kind])
+            writer.writeheader()
+        for row in rows:
+            if fmt == 'ndjson':
+                buffer.write(dumps(row))
+                buffer.write('\n')
+            else:
+                if 'attachments' in row:
+                    row = {**row, 'attachments': json.dumps(row['attachments'])}
+                writer.writerow(row)
+            # send the first row straight away, then in EXPORT_FLUSH_BYTES chunks
+            if first or buffer.tell() >= EXPORT_FLUSH_BYTES:
+                first = False
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue()
+
+    filename = f"{kind}-{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}.{fmt}"
+    resp = Response(stream_with_context(generate()), mimetype=EXPORT_FORMATS[fmt])
+    resp.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    resp.headers['Cache-Control'] = 'no-store'
+    return resp
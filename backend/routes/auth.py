@@ -1,8 +1,12 @@
 from flask import Blueprint, request, jsonify, current_app
 from ..db import db
+from ..cache import cached_identity
 from ..models import User, Profile
 from ..utils import hash_password, verify_password
-from flask_jwt_extended import create_access_token, create_refresh_token, jwt_required, get_jwt_identity
+from ..writer import run_write, WriteConflict, busy_response
+from ..auth import issue_tokens, token_claims
+from ..jobs import enqueue
+from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
 from sqlalchemy.exc import IntegrityError
 
 auth_bp = Blueprint('auth', __name__)
@@ -26,8 +30,10 @@ def signup():
     if not email or not password or not full_name:
         return jsonify({'success': False, 'message': 'email, password, and full_name are required'}), 400
 
-    try:
-        user = User(email=email, password_hash=hash_password(password))
+    password_hash = hash_password(password)
+
+    def create_account():
+        user = User(email=email, password_hash=password_hash)
         db.session.add(user)
         db.session.flush()  # Get user.id without committing
 
@@ -47,9 +53,14 @@ def signup():
             course_duration=course_duration
         )
         db.session.add(profile)
-        db.session.commit()
+        return user
+
+    try:
+        user = run_write(create_account)
 
         return jsonify({'success': True, 'message': 'Signup successful', 'user': {'id': user.id, 'email': user.email}})
+    except WriteConflict:
+        return busy_response()
     except IntegrityError as e:
         db.session.rollback()
         if 'email' in str(e.orig).lower() or 'unique' in str(e.orig).lower():
@@ -93,8 +104,7 @@ def login():
                 elif profile and profile.status == 'suspended':
                     return jsonify({'success': False, 'message': 'Your account has been suspended. Please contact support.'}), 403
 
-        access = create_access_token(identity=user.id)
-        refresh = create_refresh_token(identity=user.id)
+        access, refresh = issue_tokens(user)
 
         return jsonify({
             'success': True,
@@ -115,8 +125,7 @@ def login():
 @auth_bp.route('/me', methods=['GET'])
 @jwt_required()
 def me():
-    user_id = get_jwt_identity()
-    user = User.query.get(user_id)
+    user = cached_identity(get_jwt_identity())
     if not user:
         return jsonify({'success': False, 'message': 'User not found'}), 404
     profile = user.profile
@@ -150,7 +159,11 @@ def me():
 @jwt_required(refresh=True)
 def refresh():
     user_id = get_jwt_identity()
-    access = create_access_token(identity=user_id)
+    # re-read the user so the new access token carries the current role and version
+    user = User.query.get(user_id)
+    if not user:
+        return jsonify({'success': False, 'message': 'User not found'}), 401
+    access = create_access_token(identity=user.id, additional_claims=token_claims(user))
     return jsonify({'success': True, 'access_token': access})
 
 @auth_bp.route('/forgot-username', methods=['POST'])
@@ -160,7 +173,19 @@ def forgot_username():
     if not email:
         return jsonify({'success': True, 'message': 'If an account exists, your username will be sent to your email.'})
     profile = Profile.query.filter_by(email=email).first()
-    # For now, just pretend to send email
+    if profile:
+        # queued here, sent by the job worker (backend/jobs.py)
+        username = profile.username or profile.email
+        def queue_email():
+            enqueue('send_email', {
+                'to': profile.email,
+                'subject': 'Your StudentHub username',
+                'body': f'Hello {profile.full_name},\n\nYour StudentHub username is: {username}\n',
+            })
+        try:
+            run_write(queue_email)
+        except WriteConflict:
+            return busy_response()
     return jsonify({'success': True, 'message': 'If an account exists, your username will be sent to your email.'})
 
 @auth_bp.route('/forgot-password', methods=['POST'])
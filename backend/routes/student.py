@@ -1,52 +1,53 @@
-from flask import Blueprint, request, jsonify, current_app, send_file
-from ..db import db
-from ..models import User, Profile, DailyUpload, Feedback
-from ..utils import allowed_file, save_upload_file, ALLOWED_EXTENSIONS
+from flask import Blueprint, request, jsonify, current_app
+from ..db import db, read_session
+from ..models import User, Profile, DailyUpload, Feedback, UploadSession
+from ..utils import allowed_file, check_upload_type, ALLOWED_EXTENSIONS
+from ..blobstore import (
+    spool_upload, put_blob, attach_blob, blob_key, is_blob_url, ref_blob, release_refs, stage_blob, enqueue_blob,
+)
+from ..avatars import InvalidAvatar, is_data_uri, spool_data_uri, store_data_uri_avatar
+from ..ingest import HashingSpool
+from .. import resumable
+from ..variants import schedule_variants, variant_urls, variants_changed_at
+from ..serializers import UPLOAD_FIELDS, FEEDBACK_FIELDS, columns, serialize_profile, serialize_upload, serialize_feedback, json_response
+from ..writer import run_write, WriteConflict, busy_response
+from ..cache import cached_identity
+from ..fileserve import serve_file
+from ..storage import canonical_url, get_storage, upload_key
+from ..conditional import make_etag, collection_etag, not_modified, with_etag
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 import os
 
 student_bp = Blueprint('student', __name__)
 
+def _own_uploads_query(session, user_id):
+    return session.query(*columns(DailyUpload, UPLOAD_FIELDS)).filter(DailyUpload.user_id == user_id)
+
+def _own_feedback_query(session, user_id):
+    return session.query(*columns(Feedback, FEEDBACK_FIELDS)).filter(Feedback.user_id == user_id)
+
+def _feedback_since_query(user_id, since):
+    """The student's feedback created at or after ``since`` (the one-per-day rule)."""
+    return Feedback.query.filter_by(user_id=user_id).filter(Feedback.created_at >= since)
+
 @student_bp.route('/uploads', methods=['GET'])
 @jwt_required()
 def get_uploads():
-    import os
     try:
         user_id = get_jwt_identity()
-        uploads = DailyUpload.query.filter_by(user_id=user_id).order_by(DailyUpload.created_at.desc()).all()
-        result = []
-        uploads_root = current_app.config.get('UPLOAD_FOLDER')
-        for u in uploads:
-            file_url = u.file_url
-            if not file_url.startswith('/uploads/'):
-                try:
-                    rel = os.path.relpath(file_url, uploads_root)
-                    # Convert to forward slashes for URL
-                    rel = rel.replace('\\', '/')
-                    file_url = f"/uploads/{rel}"
-                except Exception:
-                    # leave as is if conversion fails
-                    pass
-            else:
-                # Ensure forward slashes in stored URL paths
-                file_url = file_url.replace('\\', '/')
-            result.append({
-                'id': u.id,
-                'user_id': u.user_id,
-                'file_name': u.file_name,
-                'file_url': file_url,
-                'file_type': u.file_type,
-                'file_size': u.file_size,
-                'upload_date': u.upload_date.isoformat() if u.upload_date else None,
-                'description': u.description,
-                'status': u.status,
-                'admin_feedback': u.admin_feedback,
-                'reviewed_by': u.reviewed_by,
-                'reviewed_at': u.reviewed_at.isoformat() if u.reviewed_at else None,
-                'created_at': u.created_at.isoformat() if u.created_at else None,
-            })
-        return jsonify(result)
+        session = read_session()
+        q = _own_uploads_query(session, user_id)
+        # image variants are generated after the upload, so they move the tag too
+        etag = collection_etag(q, DailyUpload.created_at, DailyUpload.reviewed_at, related=[variants_changed_at(session)])
+        unchanged = not_modified(etag)
+        if unchanged:
+            return unchanged
+        uploads = q.order_by(DailyUpload.created_at.desc()).all()
+        variants = variant_urls(session, [u.file_url for u in uploads])
+        result = [serialize_upload(u, variants=variants) for u in uploads]
+        return with_etag(json_response(result), etag)
     except Exception as e:
         import traceback
         traceback.print_exc()
@@ -65,168 +66,397 @@ def upload_file():
 
         if file.filename == '':
             return jsonify({'success': False, 'message': 'No selected file'}), 400
-        # Validate file type using filename extension OR MIME type
-        mimetype = (file.content_type or file.mimetype or '')
-        if not allowed_file(file.filename, mimetype):
-            # Try to sniff the file header (magic bytes) as a fallback for browsers that omit mimetype or extension
-            try:
-                head = file.read(64)
-                # Reset stream position for later file.save()
-                file.seek(0)
-                magic = head[:16]
-                magic_hex = __import__('binascii').hexlify(magic).decode('ascii')
-                sniffed = None
-                if magic.startswith(b'\xff\xd8'):
-                    sniffed = 'jpeg'
-                elif magic.startswith(b'\x89PNG\r\n\x1a\n'):
-                    sniffed = 'png'
-                elif magic.startswith(b'GIF8'):
-                    sniffed = 'gif'
-                elif magic.startswith(b'RIFF') and magic[8:12] == b'WEBP':
-                    sniffed = 'webp'
-                elif magic.startswith(b'II*\x00') or magic.startswith(b'MM\x00*'):
-                    sniffed = 'tiff'
-                elif magic.startswith(b'BM'):
-                    sniffed = 'bmp'
-                elif magic.startswith(b'\x00\x00\x01\x00'):
-                    sniffed = 'ico'
-                elif b'ftyp' in head and (b'avif' in head or b'heic' in head or b'qt  ' in head):
-                    sniffed = 'avif/heic'
-                if sniffed:
-                    current_app.logger.debug(f"Sniffed file type {sniffed} from magic bytes for filename={file.filename!r}")
-                    # allow the upload to continue
-                else:
-                    current_app.logger.debug(f"Rejected upload: filename={file.filename!r}, mimetype={mimetype!r}, magic={magic_hex}")
-                    return jsonify({
-                        'success': False,
-                        'message': f'Invalid file type for {file.filename or "file"}',
-                        'filename': file.filename,
-                        'mimetype': mimetype,
-                        'magic_hex': magic_hex,
-                        'allowed_extensions': sorted(list(ALLOWED_EXTENSIONS))
-                    }), 400
-            except Exception as e:
-                current_app.logger.exception('Error sniffing file header')
-                return jsonify({'success': False, 'message': 'Invalid file type and header sniff failed'}), 400
-
-        path = save_upload_file(file, user_id)
-
-        # Get file size
-        file.seek(0, os.SEEK_END)
-        file_size = file.tell()
-        file.seek(0)  # Reset file pointer
-
-        upload = DailyUpload(
-            user_id=user_id,
-            file_name=file.filename,
-            file_url=path,
-            file_type=file.content_type or file.mimetype,
-            file_size=file_size,
-            description=description,
-        )
-        db.session.add(upload)
-        db.session.commit()
+        # Validate file type using filename extension OR MIME type, then magic bytes
+        rejected = check_upload_type(file)
+        if rejected:
+            return jsonify({'success': False, **rejected}), 400
+
+        # size and hash were computed while the request body was parsed
+        spool = spool_upload(file)
+        # bytes go to storage before the write lock is taken
+        put_blob(spool, file.filename)
+
+        def record_upload():
+            upload = DailyUpload(
+                user_id=user_id,
+                file_name=file.filename,
+                file_url=f'/uploads/{blob_key(spool.sha256, file.filename)}',
+                file_type=file.content_type or file.mimetype,
+                file_size=spool.size,
+                sha256=spool.sha256,
+                description=description,
+            )
+            db.session.add(upload)
+            db.session.flush()
+            # identical bytes already stored are shared instead of stored again
+            attach_blob(spool, file.filename, 'upload', upload.id)
+            schedule_variants([upload.file_url])
+            return upload
+
+        upload = run_write(record_upload)
+        path = upload.file_url
 
         # Return file URL so client can use it (e.g., set profile avatar)
-        return jsonify({'success': True, 'message': 'File uploaded successfully', 'upload': {'id': upload.id, 'file_url': f"/uploads/{path}"}})
+        return jsonify({'success': True, 'message': 'File uploaded successfully', 'upload': {'id': upload.id, 'file_url': path}})
+    except WriteConflict:
+        return busy_response()
     except Exception as e:
         db.session.rollback()
         return jsonify({'success': False, 'message': f'Failed to upload file: {str(e)}'}), 500
 
+@student_bp.route('/uploads/batch', methods=['POST'])
+@jwt_required()
+def upload_batch():
+    # multipart/form-data with files[] and an optional descriptions[] in the same order
+    user_id = get_jwt_identity()
+    try:
+        files = request.files.getlist('files[]') or request.files.getlist('files')
+        files = [f for f in files if f and f.filename]
+        if not files:
+            return jsonify({'success': False, 'message': 'No files'}), 400
+        max_files = current_app.config.get('BATCH_UPLOAD_MAX_FILES', 20)
+        if len(files) > max_files:
+            return jsonify({'success': False, 'message': f'At most {max_files} files per batch'}), 400
+        descriptions = request.form.getlist('descriptions[]') or request.form.getlist('descriptions')
+        default_description = request.form.get('description')
+
+        app = current_app._get_current_object()
+
+        def prepare(file):
+            # type checks and storage writes run off the request thread
+            with app.app_context():
+                rejected = check_upload_type(file)
+                if rejected:
+                    return rejected, None
+                spool = spool_upload(file)
+                put_blob(spool, file.filename)
+                return None, spool
+
+        workers = min(current_app.config.get('BATCH_UPLOAD_WORKERS', 4), len(files))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            prepared = list(pool.map(prepare, files))
+
+        results = [None] * len(files)
+        accepted = []
+        for i, (file, (rejected, spool)) in enumerate(zip(files, prepared)):
+            if rejected:
+                results[i] = {'index': i, 'success': False, **rejected}
+            else:
+                description = descriptions[i] if i < len(descriptions) and descriptions[i] else default_description
+                accepted.append((i, file, spool, description))
+
+        def record_uploads():
+            uploads = []
+            for i, file, spool, description in accepted:
+                upload = DailyUpload(
+                    user_id=user_id,
+                    file_name=file.filename,
+                    file_url=f'/uploads/{blob_key(spool.sha256, file.filename)}',
+                    file_type=file.content_type or file.mimetype,
+                    file_size=spool.size,
+                    sha256=spool.sha256,
+                    description=description,
+                )
+                db.session.add(upload)
+                uploads.append(upload)
+            db.session.flush()
+            for upload, (i, file, spool, _) in zip(uploads, accepted):
+                attach_blob(spool, file.filename, 'upload', upload.id)
+            schedule_variants([upload.file_url for upload in uploads])
+            return uploads
+
+        # every accepted file is recorded in a single commit
+        uploads = run_write(record_uploads) if accepted else []
+        for upload, (i, file, _, _) in zip(uploads, accepted):
+            results[i] = {
+                'index': i,
+                'success': True,
+                'filename': file.filename,
+                'upload': {'id': upload.id, 'file_url': upload.file_url},
+            }
+        ok = bool(uploads)
+        message = f'{len(uploads)} of {len(files)} file(s) uploaded'
+        return jsonify({'success': ok, 'message': message, 'results': results}), 200 if ok else 400
+    except WriteConflict:
+        return busy_response()
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'message': f'Failed to upload files: {str(e)}'}), 500
+
+# Resumable uploads (backend/resumable.py)
+def _session_payload(s):
+    return {'id': s.id, 'offset': s.received, 'size': s.total_size, 'expires_at': s.expires_at.isoformat()}
+
+def _owned_session(session_id, user_id):
+    s = db.session.get(UploadSession, session_id)
+    if not s or s.user_id != user_id or s.expires_at < datetime.utcnow():
+        return None
+    return s
+
+@student_bp.route('/uploads/sessions', methods=['POST'])
+@jwt_required()
+def create_upload_session():
+    user_id = get_jwt_identity()
+    try:
+        data = request.get_json() or {}
+        file_name = data.get('fileName') or data.get('file_name')
+        file_type = data.get('fileType') or data.get('file_type') or ''
+        size = data.get('fileSize') or data.get('file_size')
+        if not file_name:
+            return jsonify({'success': False, 'message': 'fileName is required'}), 400
+        try:
+            size = int(size)
+        except (TypeError, ValueError):
+            return jsonify({'success': False, 'message': 'fileSize is required'}), 400
+        if size <= 0 or size > current_app.config.get('UPLOAD_SESSION_MAX_SIZE'):
+            return jsonify({'success': False, 'message': 'Invalid file size'}), 400
+        if not allowed_file(file_name, file_type):
+            return jsonify({
+                'success': False,
+                'message': f'Invalid file type for {file_name}',
+                'allowed_extensions': sorted(list(ALLOWED_EXTENSIONS)),
+            }), 400
+
+        def open_session():
+            s = UploadSession(
+                user_id=user_id,
+                file_name=file_name,
+                file_type=file_type or None,
+                description=data.get('description'),
+                total_size=size,
+                expires_at=resumable.new_expiry(),
+            )
+            db.session.add(s)
+            db.session.flush()
+            resumable.create_part_file(s.id)
+            return s
+
+        s = run_write(open_session)
+        resp = jsonify({'success': True, 'session': _session_payload(s)})
+        resp.status_code = 201
+        resp.headers['Location'] = f'/student/uploads/sessions/{s.id}'
+        resp.headers['Upload-Offset'] = '0'
+        return resp
+    except WriteConflict:
+        return busy_response()
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'message': f'Failed to create upload session: {str(e)}'}), 500
+
+@student_bp.route('/uploads/sessions/<session_id>', methods=['GET'])
+@jwt_required()
+def get_upload_session(session_id):
+    s = _owned_session(session_id, get_jwt_identity())
+    if not s:
+        return jsonify({'success': False, 'message': 'Upload session not found'}), 404
+    resp = jsonify({'success': True, 'session': _session_payload(s)})
+    resp.headers['Upload-Offset'] = str(s.received)
+    resp.headers['Cache-Control'] = 'no-store'
+    return resp
+
+@student_bp.route('/uploads/sessions/<session_id>', methods=['PUT'])
+@jwt_required()
+def put_upload_chunk(session_id):
+    s = _owned_session(session_id, get_jwt_identity())
+    if not s:
+        return jsonify({'success': False, 'message': 'Upload session not found'}), 404
+    try:
+        offset = int(request.headers.get('Upload-Offset', ''))
+    except ValueError:
+        return jsonify({'success': False, 'message': 'Upload-Offset header is required'}), 400
+    if offset != s.received:
+        # the client resumes from the offset we actually have
+        resp = jsonify({'success': False, 'message': 'Offset mismatch', 'offset': s.received})
+        resp.status_code = 409
+        resp.headers['Upload-Offset'] = str(s.received)
+        return resp
+    try:
+        written = resumable.write_chunk(s, offset, request.stream)
+    except resumable.ChunkTooLarge:
+        return jsonify({'success': False, 'message': 'Chunk exceeds the declared file size'}), 413
+
+    def record_chunk():
+        # conditional on the old offset, so a concurrent duplicate chunk cannot double count
+        return db.session.query(UploadSession).filter(
+            UploadSession.id == s.id, UploadSession.received == offset
+        ).update({UploadSession.received: offset + written, UploadSession.expires_at: resumable.new_expiry()},
+                 synchronize_session=False)
+
+    try:
+        updated = run_write(record_chunk)
+    except WriteConflict:
+        return busy_response()
+    db.session.refresh(s)
+    if not updated:
+        resp = jsonify({'success': False, 'message': 'Offset mismatch', 'offset': s.received})
+        resp.status_code = 409
+    else:
+        resp = jsonify({'success': True, 'session': _session_payload(s)})
+    resp.headers['Upload-Offset'] = str(s.received)
+    return resp
+
+@student_bp.route('/uploads/sessions/<session_id>/complete', methods=['POST'])
+@jwt_required()
+def complete_upload_session(session_id):
+    user_id = get_jwt_identity()
+    s = _owned_session(session_id, user_id)
+    if not s:
+        return jsonify({'success': False, 'message': 'Upload session not found'}), 404
+    if s.received != s.total_size:
+        return jsonify({'success': False, 'message': 'Upload is incomplete', 'offset': s.received}), 409
+    spool = HashingSpool.from_file(resumable.part_path(s.id))
+    completed = False
+    try:
+        put_blob(spool, s.file_name)
+
+        def record_upload():
+            upload = DailyUpload(
+                user_id=user_id,
+                file_name=s.file_name,
+                file_url=f'/uploads/{blob_key(spool.sha256, s.file_name)}',
+                file_type=s.file_type,
+                file_size=spool.size,
+                sha256=spool.sha256,
+                description=s.description,
+            )
+            db.session.add(upload)
+            db.session.delete(s)
+            db.session.flush()
+            attach_blob(spool, s.file_name, 'upload', upload.id)
+            schedule_variants([upload.file_url])
+            return upload
+
+        upload = run_write(record_upload)
+        completed = True
+        return jsonify({'success': True, 'message': 'File uploaded successfully', 'upload': {'id': upload.id, 'file_url': upload.file_url}})
+    except WriteConflict:
+        return busy_response()
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'message': f'Failed to complete upload: {str(e)}'}), 500
+    finally:
+        # once completed the part file goes; after a failure it stays so the
+        # client can retry
+        spool.close(discard=completed)
+
+@student_bp.route('/uploads/sessions/<session_id>', methods=['DELETE'])
+@jwt_required()
+def cancel_upload_session(session_id):
+    s = _owned_session(session_id, get_jwt_identity())
+    if not s:
+        return jsonify({'success': False, 'message': 'Upload session not found'}), 404
+    try:
+        run_write(db.session.delete, s)
+    except WriteConflict:
+        return busy_response()
+    resumable.discard([session_id])
+    return jsonify({'success': True, 'message': 'Upload cancelled'})
+
 @student_bp.route('/profile', methods=['GET', 'PUT'])
 @jwt_required()
 def profile():
     user_id = get_jwt_identity()
+    if request.method == 'GET':
+        identity = cached_identity(user_id)
+        if not identity:
+            return jsonify({'success': False, 'message': 'User not found'}), 404
+        if not identity.profile:
+            return jsonify({'success': False, 'message': 'Profile not found'}), 404
+        # the cached snapshot is the validator, so an unchanged profile costs no query
+        # (variants are only looked up for image avatars)
+        variants = variant_urls(read_session(), [identity.profile.avatar_url])
+        etag = make_etag(identity.profile.id, identity.profile.updated_at, identity.email, sorted(variants.items()))
+        unchanged = not_modified(etag)
+        if unchanged:
+            return unchanged
+        return with_etag(json_response(serialize_profile(identity.profile, variants=variants)), etag)
+
     user = User.query.get(user_id)
     if not user:
         return jsonify({'success': False, 'message': 'User not found'}), 404
     profile = user.profile
     # If profile does not exist, create a default one on PUTs (allow user to save profile/avatar even if missing)
-    if not profile and request.method == 'PUT':
+    if not profile:
         profile = Profile(user_id=user.id, username=None, full_name=user.email or '', email=user.email, status='active')
         db.session.add(profile)
         db.session.commit()
 
-    if not profile:
-        return jsonify({'success': False, 'message': 'Profile not found'}), 404
-    
-    if request.method == 'GET':
-        return jsonify({
-            'id': profile.id,
-            'user_id': profile.user_id,
-            'username': profile.username,
-            'email': profile.email,
-            'full_name': profile.full_name,
-            'contact_number': profile.contact_number,
-            'college_name': profile.college_name,
-            'college_id': profile.college_id,
-            'city': profile.city,
-            'pincode': profile.pincode,
-            'college_email': profile.college_email,
-            'course_name': profile.course_name,
-            'course_mode': profile.course_mode,
-            'course_duration': profile.course_duration,
-            'avatar_url': profile.avatar_url,
-            'status': profile.status,
-        })
-    else:
-        try:
-            data = request.get_json() or {}
-            if 'fullName' in data:
-                profile.full_name = data.get('fullName')
-            if 'contactNumber' in data:
-                profile.contact_number = data.get('contactNumber')
-            if 'collegeName' in data:
-                profile.college_name = data.get('collegeName')
-            if 'collegeId' in data:
-                profile.college_id = data.get('collegeId')
-            if 'collegeEmail' in data:
-                profile.college_email = data.get('collegeEmail')
-            if 'courseName' in data:
-                profile.course_name = data.get('courseName')
-            if 'courseMode' in data:
-                profile.course_mode = data.get('courseMode')
-            if 'courseDuration' in data:
-                profile.course_duration = data.get('courseDuration')
-            # Allow updating avatar URL (either camelCase or snake_case)
-            if 'avatarUrl' in data:
-                profile.avatar_url = data.get('avatarUrl')
-            if 'avatar_url' in data:
-                profile.avatar_url = data.get('avatar_url')
-            # Support updating email (and propagate to User.email) with uniqueness check
-            if 'email' in data and data.get('email'):
-                new_email = data.get('email')
-                if new_email != user.email:
-                    existing = User.query.filter_by(email=new_email).first()
-                    if existing:
-                        return jsonify({'success': False, 'message': 'Email already in use'}), 409
-                    user.email = new_email
-                    profile.email = new_email
-            profile.updated_at = datetime.utcnow()
-            db.session.commit()
-            return jsonify({'success': True, 'message': 'Profile updated'})
-        except Exception as e:
-            db.session.rollback()
-            return jsonify({'success': False, 'message': f'Failed to update profile: {str(e)}'}), 500
+    try:
+        data = request.get_json() or {}
+        if 'fullName' in data:
+            profile.full_name = data.get('fullName')
+        if 'contactNumber' in data:
+            profile.contact_number = data.get('contactNumber')
+        if 'collegeName' in data:
+            profile.college_name = data.get('collegeName')
+        if 'collegeId' in data:
+            profile.college_id = data.get('collegeId')
+        if 'collegeEmail' in data:
+            profile.college_email = data.get('collegeEmail')
+        if 'courseName' in data:
+            profile.course_name = data.get('courseName')
+        if 'courseMode' in data:
+            profile.course_mode = data.get('courseMode')
+        if 'courseDuration' in data:
+            profile.course_duration = data.get('courseDuration')
+        # Support updating email (and propagate to User.email) with uniqueness check;
+        # checked before an avatar is decoded and stored
+        new_email = data.get('email') if 'email' in data else None
+        if new_email and new_email != user.email:
+            if User.query.filter_by(email=new_email).first():
+                db.session.rollback()
+                return jsonify({'success': False, 'message': 'Email already in use'}), 409
+            user.email = new_email
+            profile.email = new_email
+        # Allow updating avatar URL (either camelCase or snake_case)
+        if 'avatarUrl' in data or 'avatar_url' in data:
+            new_avatar = data.get('avatar_url') if 'avatar_url' in data else data.get('avatarUrl')
+            if is_data_uri(new_avatar):
+                # inline images go to the blob store; the row keeps a short URL
+                try:
+                    avatar = spool_data_uri(new_avatar)
+                except InvalidAvatar as e:
+                    db.session.rollback()
+                    return jsonify({'success': False, 'message': str(e)}), 400
+                try:
+                    store_data_uri_avatar(profile, *avatar)
+                finally:
+                    avatar[0].close()
+                schedule_variants([profile.avatar_url])
+            else:
+                # stored in the one canonical form, so reads need no path handling
+                new_avatar = canonical_url(new_avatar, current_app.config.get('UPLOAD_FOLDER'))
+                # clients send the current avatar back with every save; only a
+                # change moves the ref, or the live avatar would be collected
+                if new_avatar != profile.avatar_url:
+                    release_refs('avatar', [profile.id])
+                    profile.avatar_url = new_avatar
+                    if is_blob_url(new_avatar):
+                        ref_blob(upload_key(new_avatar), 'avatar', profile.id)
+        profile.updated_at = datetime.utcnow()
+        db.session.commit()
+        return jsonify({'success': True, 'message': 'Profile updated'})
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'message': f'Failed to update profile: {str(e)}'}), 500
 
 @student_bp.route('/uploads/<upload_id>/download', methods=['GET'])
 @jwt_required()
 def download_upload(upload_id):
-    import os
     upload = DailyUpload.query.get(upload_id)
     if not upload:
         return jsonify({'success': False, 'message': 'Upload not found'}), 404
-    # stored file_url is a served URL like /uploads/<rel_path>
-    rel = upload.file_url
-    if rel.startswith('/uploads/'):
-        rel = rel[len('/uploads/'):]
-    # Convert forward slashes to OS-specific path separators
-    rel = rel.replace('/', os.sep)
-    uploads_root = current_app.config.get('UPLOAD_FOLDER')
-    full_path = os.path.join(uploads_root, rel)
-    if not os.path.exists(full_path):
+    # stored file_url is a served URL like /uploads/<key>
+    resp = serve_file(
+        upload_key(upload.file_url),
+        download_name=upload.file_name,
+        as_attachment=True,
+        content_hash=upload.sha256,
+        cache_control='private, no-cache',
+    )
+    if resp is None:
         return jsonify({'success': False, 'message': 'File not found on server'}), 404
-    return send_file(full_path, as_attachment=True, download_name=upload.file_name)
+    return resp
 
 
 @student_bp.route('/feedback', methods=['GET', 'POST'])
@@ -235,8 +465,8 @@ def feedback():
     import json
     try:
         user_id = get_jwt_identity()
-        user = User.query.get(user_id)
-        if not user:
+        # tokens without a version claim, or a stale version cache, can outlive a deleted account
+        if cached_identity(user_id) is None:
             return jsonify({'success': False, 'message': 'User not found'}), 404
 
         # POST -> submit feedback
@@ -262,28 +492,10 @@ def feedback():
             # One active feedback per day per student
             from datetime import datetime, timedelta
             today_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
-            existing = Feedback.query.filter_by(user_id=user_id).filter(Feedback.created_at >= today_start).first()
+            existing = _feedback_since_query(user_id, today_start).first()
             if existing:
                 return jsonify({'success': False, 'message': 'You can only submit one feedback per day'}), 400
 
-            attachment_urls = []
-            uploads_root = current_app.config.get('UPLOAD_FOLDER')
-            # handle files if any
-            for f in files:
-                if f and f.filename:
-                    # reuse allowed_file/save_upload_file logic
-                    if not allowed_file(f.filename, f.mimetype or f.content_type):
-                        # try sniffing first 64 bytes
-                        head = f.read(64)
-                        f.seek(0)
-                        # if sniff looks ok, continue, else reject
-                        import binascii
-                        magic = head[:16]
-                        magic_hex = binascii.hexlify(magic).decode('ascii')
-                        return jsonify({'success': False, 'message': 'Invalid file type', 'filename': f.filename, 'mimetype': f.mimetype or f.content_type, 'magic_hex': magic_hex}), 400
-                    path = save_upload_file(f, user_id)
-                    attachment_urls.append(f"/uploads/{path}")
-
             # Normalize rating to float (accept strings like '4.5' or numbers)
             rating_val = None
             if rating is not None and rating != '':
@@ -300,44 +512,78 @@ def feedback():
             if not float(rating_val * 2).is_integer():
                 return jsonify({'success': False, 'message': 'rating must be in 0.5 increments'}), 400
 
-            fb = Feedback(
-                user_id=user_id,
-                category=category,
-                subject=subject,
-                message=message,
-                rating=rating_val,
-                attachments=json.dumps(attachment_urls) if attachment_urls else None,
-                status='submitted'
-            )
-            db.session.add(fb)
-            db.session.commit()
+            # every attachment is checked before any is stored, so a rejected
+            # file leaves nothing behind
+            files = [f for f in files if f and f.filename]
+            for f in files:
+                # reuse the allowed_file check used by daily uploads
+                if not allowed_file(f.filename, f.mimetype or f.content_type):
+                    head = f.read(64)
+                    f.seek(0)
+                    import binascii
+                    magic = head[:16]
+                    magic_hex = binascii.hexlify(magic).decode('ascii')
+                    return jsonify({'success': False, 'message': 'Invalid file type', 'filename': f.filename, 'mimetype': f.mimetype or f.content_type, 'magic_hex': magic_hex}), 400
+
+            attachments = []
+            attachment_urls = []
+            # remote backends are written by a store_blob job after commit; a local
+            # write is a same-disk copy, done here (see README)
+            deferred = get_storage().remote
+            try:
+                for f in files:
+                    spool = spool_upload(f)
+                    attachments.append((spool, f.filename))
+                    key = blob_key(spool.sha256, f.filename) if deferred else put_blob(spool, f.filename)
+                    attachment_urls.append(f"/uploads/{key}")
+
+                staged = [stage_blob(spool) for spool, _ in attachments] if deferred else []
+
+                def record_feedback():
+                    fb = Feedback(
+                        user_id=user_id,
+                        category=category,
+                        subject=subject,
+                        message=message,
+                        rating=rating_val,
+                        attachments=json.dumps(attachment_urls) if attachment_urls else None,
+                        status='submitted'
+                    )
+                    db.session.add(fb)
+                    db.session.flush()
+                    for i, (spool, filename) in enumerate(attachments):
+                        if deferred:
+                            enqueue_blob(spool, filename, staged[i], 'feedback', fb.id)
+                        else:
+                            attach_blob(spool, filename, 'feedback', fb.id)
+                    return fb
+
+                try:
+                    fb = run_write(record_feedback)
+                except Exception as e:
+                    # the store_blob jobs were rolled back with the feedback
+                    for path in staged:
+                        try:
+                            os.remove(path)
+                        except FileNotFoundError:
+                            pass
+                    if isinstance(e, WriteConflict):
+                        return busy_response()
+                    raise
+            finally:
+                for spool, _ in attachments:
+                    spool.close()
             return jsonify({'success': True, 'message': 'Feedback submitted', 'feedback_id': fb.id})
 
         # GET -> list user's feedback
         else:
-            fbs = Feedback.query.filter_by(user_id=user_id).order_by(Feedback.created_at.desc()).all()
-            result = []
-            for f in fbs:
-                attachments = []
-                try:
-                    attachments = json.loads(f.attachments) if f.attachments else []
-                except Exception:
-                    attachments = []
-                result.append({
-                    'id': f.id,
-                    'user_id': f.user_id,
-                    'category': f.category,
-                    'subject': f.subject,
-                    'message': f.message,
-                    'rating': f.rating,
-                    'attachments': attachments,
-                    'status': f.status,
-                    'admin_response': f.admin_response,
-                    'responded_by': f.responded_by,
-                    'responded_at': f.responded_at.isoformat() if f.responded_at else None,
-                    'created_at': f.created_at.isoformat() if f.created_at else None,
-                })
-            return jsonify(result)
+            q = _own_feedback_query(db.session, user_id)
+            etag = collection_etag(q, Feedback.created_at, Feedback.updated_at)
+            unchanged = not_modified(etag)
+            if unchanged:
+                return unchanged
+            fbs = q.order_by(Feedback.created_at.desc()).all()
+            return with_etag(json_response([serialize_feedback(f) for f in fbs]), etag)
     except Exception as e:
         import traceback
         traceback.print_exc()
@@ -0,0 +1,97 @@
+"""Compare ORM entity loading with column-projected rows for the list endpoints.
+
+Usage:
+  python -m backend.scripts.bench_list_queries [--rows N] [--repeat R]
+
+Seeds a throwaway SQLite database with N uploads and N profiles, then times
+fetching and serializing a full page both ways, reporting CPU time per row
+and peak Python memory (tracemalloc).
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from backend.app import create_app
+from backend.db import db
+from backend.models import User, Profile, DailyUpload
+from backend.serializers import PROFILE_FIELDS, UPLOAD_FIELDS, columns, serialize_profile, serialize_upload
+
+
+def seed(n):
+    now = datetime(2025, 1, 1)
+    db.session.execute(User.__table__.insert(), [
+        {'id': f'user{i}', 'email': f's{i}@example.com', 'password_hash': 'x', 'role': 'student'}
+        for i in range(n)
+    ])
+    db.session.execute(DailyUpload.__table__.insert(), [
+        {
+            'id': f'u{i:07d}', 'user_id': f'user{i % 500}', 'file_name': f'report-{i}.pdf',
+            'file_url': f'/uploads/user{i % 500}/{i}_report.pdf', 'file_type': 'application/pdf',
+            'file_size': i, 'upload_date': now + timedelta(seconds=i), 'description': 'daily report',
+            'status': 'pending', 'created_at': now + timedelta(seconds=i),
+        }
+        for i in range(n)
+    ])
+    db.session.execute(Profile.__table__.insert(), [
+        {
+            'id': f'p{i:07d}', 'user_id': f'user{i}', 'full_name': f'Student {i}', 'email': f's{i}@example.com',
+            'city': 'Pune', 'status': 'active', 'avatar_url': f'/uploads/user{i}/avatar.png',
+            'created_at': now + timedelta(seconds=i),
+        }
+        for i in range(n)
+    ])
+    db.session.commit()
+
+
+def measure(fn, rows, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        db.session.expunge_all()
+        start = time.process_time()
+        fn()
+        best = min(best, time.process_time() - start)
+    db.session.expunge_all()
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best * 1e6 / rows, peak / rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark ORM vs projected list queries')
+    parser.add_argument('--rows', type=int, default=50000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='studenthub_bench_')
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(workdir, 'bench.db')}"})
+    with app.app_context():
+        db.create_all()
+        seed(args.rows)
+        order_u = (DailyUpload.created_at.desc(), DailyUpload.id.desc())
+        order_p = (Profile.created_at.desc(), Profile.id.desc())
+        cases = {
+            'uploads': (
+                lambda: [serialize_upload(u) for u in db.session.query(DailyUpload).order_by(*order_u).all()],
+                lambda: [serialize_upload(r) for r in db.session.query(*columns(DailyUpload, UPLOAD_FIELDS)).order_by(*order_u).all()],
+            ),
+            'students': (
+                lambda: [serialize_profile(p) for p in db.session.query(Profile).order_by(*order_p).all()],
+                lambda: [serialize_profile(r) for r in db.session.query(*columns(Profile, PROFILE_FIELDS)).order_by(*order_p).all()],
+            ),
+        }
+        print(f'rows={args.rows} repeat={args.repeat}')
+        for name, (orm, projected) in cases.items():
+            orm_cpu, orm_mem = measure(orm, args.rows, args.repeat)
+            proj_cpu, proj_mem = measure(projected, args.rows, args.repeat)
+            print(f'{name:9s} ORM {orm_cpu:6.2f} us/row {orm_mem:7.0f} B/row   '
+                  f'projected {proj_cpu:6.2f} us/row {proj_mem:7.0f} B/row   '
+                  f'cpu {orm_cpu / proj_cpu:4.2f}x  mem {orm_mem / proj_mem:4.2f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+"""Benchmark the shared serializers against the old inline dict building.
+
+Usage:
+  python -m backend.scripts.bench_serializers [--rows N] [--repeat R]
+
+Builds N in-memory DailyUpload / Feedback / Profile objects (no database
+access) and times building the JSON response body for each list endpoint
+with the previous per-route code and with backend.serializers.
+"""
+import argparse
+import json
+import os
+import time
+from datetime import datetime, timedelta
+
+from flask import jsonify
+
+from backend.app import create_app
+from backend.models import Profile, DailyUpload, Feedback
+from backend.serializers import serialize_profile, serialize_upload, serialize_feedback, json_response, orjson
+
+
+def legacy_upload(u, uploads_root):
+    file_url = u.file_url
+    if not file_url.startswith('/uploads/'):
+        try:
+            rel = os.path.relpath(file_url, uploads_root)
+            rel = rel.replace('\\', '/')
+            file_url = f"/uploads/{rel}"
+        except Exception:
+            pass
+    else:
+        file_url = file_url.replace('\\', '/')
+    return {
+        'id': u.id,
+        'user_id': u.user_id,
+        'file_name': u.file_name,
+        'file_url': file_url,
+        'file_type': u.file_type,
+        'file_size': u.file_size,
+        'upload_date': u.upload_date.isoformat() if u.upload_date else None,
+        'description': u.description,
+        'status': u.status,
+        'admin_feedback': u.admin_feedback,
+        'reviewed_by': u.reviewed_by,
+        'reviewed_at': u.reviewed_at.isoformat() if u.reviewed_at else None,
+        'created_at': u.created_at.isoformat() if u.created_at else None,
+    }
+
+
+def legacy_feedback(f):
+    attachments = []
+    try:
+        attachments = json.loads(f.attachments) if f.attachments else []
+    except Exception:
+        attachments = []
+    return {
+        'id': f.id,
+        'user_id': f.user_id,
+        'category': f.category,
+        'subject': f.subject,
+        'message': f.message,
+        'rating': f.rating,
+        'attachments': attachments,
+        'status': f.status,
+        'admin_response': f.admin_response,
+        'responded_by': f.responded_by,
+        'responded_at': f.responded_at.isoformat() if f.responded_at else None,
+        'created_at': f.created_at.isoformat() if f.created_at else None,
+    }
+
+
+def legacy_profile(p, uploads_root):
+    avatar_url = p.avatar_url
+    if avatar_url and not (avatar_url.startswith('data:') or avatar_url.startswith('http') or avatar_url.startswith('/uploads/')):
+        rel = os.path.relpath(avatar_url, uploads_root)
+        avatar_url = f"/uploads/{rel.replace(os.sep, '/')}"
+    return {
+        'id': p.id, 'user_id': p.user_id, 'username': p.username, 'email': p.email, 'full_name': p.full_name,
+        'contact_number': p.contact_number, 'college_name': p.college_name, 'college_id': p.college_id,
+        'city': p.city, 'pincode': p.pincode, 'college_email': p.college_email, 'course_name': p.course_name,
+        'course_mode': p.course_mode, 'course_duration': p.course_duration, 'avatar_url': avatar_url,
+        'status': p.status, 'created_at': p.created_at.isoformat() if p.created_at else None,
+    }
+
+
+def make_rows(n):
+    now = datetime(2025, 1, 1)
+    uploads, feedbacks, profiles = [], [], []
+    for i in range(n):
+        ts = now + timedelta(seconds=i)
+        uploads.append(DailyUpload(
+            id=f'u{i}', user_id=f'user{i % 50}', file_name=f'report-{i}.pdf', file_url=f'/uploads/user{i % 50}/{i}_report.pdf',
+            file_type='application/pdf', file_size=1024 * i, upload_date=ts, description='daily report', status='pending',
+            reviewed_at=ts if i % 3 else None, created_at=ts,
+        ))
+        feedbacks.append(Feedback(
+            id=f'f{i}', user_id=f'user{i % 50}', category='Mentor', subject='Weekly', message='All good', rating=4.5,
+            attachments=json.dumps([f'/uploads/user{i % 50}/{i}.png']) if i % 4 == 0 else None, status='submitted', created_at=ts,
+        ))
+        profiles.append(Profile(
+            id=f'p{i}', user_id=f'user{i}', full_name=f'Student {i}', email=f's{i}@example.com', city='Pune',
+            avatar_url=f'/uploads/user{i}/avatar.png', status='active', created_at=ts,
+        ))
+    return uploads, feedbacks, profiles
+
+
+def timed(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark list payload serialization')
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    app = create_app()
+    uploads, feedbacks, profiles = make_rows(args.rows)
+    root = app.config['UPLOAD_FOLDER']
+    cases = {
+        'uploads': (
+            lambda: jsonify([legacy_upload(u, root) for u in uploads]),
+            lambda: json_response([serialize_upload(u) for u in uploads]),
+        ),
+        'feedback': (
+            lambda: jsonify([legacy_feedback(f) for f in feedbacks]),
+            lambda: json_response([serialize_feedback(f) for f in feedbacks]),
+        ),
+        'students': (
+            lambda: jsonify([legacy_profile(p, root) for p in profiles]),
+            lambda: json_response([serialize_profile(p) for p in profiles]),
+        ),
+    }
+    print(f"rows={args.rows} repeat={args.repeat} json={'orjson' if orjson else 'stdlib'}")
+    with app.test_request_context():
+        for name, (legacy, shared) in cases.items():
+            old = timed(legacy, args.repeat)
+            new = timed(shared, args.repeat)
+            print(f'{name:9s} legacy {old * 1e6 / args.rows:7.2f} us/row   shared {new * 1e6 / args.rows:7.2f} us/row   speedup {old / new:4.2f}x')
+
+
+if __name__ == '__main__':
+    main()
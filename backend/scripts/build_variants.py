@@ -0,0 +1,40 @@
+"""Generate missing image variants (thumbnails) for stored image blobs.
+
+Usage:
+  python -m backend.scripts.build_variants [--limit N] [--dry-run]
+
+Uploads normally get their variants in the background right after they are
+stored. This backfills images stored before variants existed, while Pillow
+was not installed, or after IMAGE_VARIANTS gained a new size.
+"""
+import argparse
+import sys
+
+from backend.app import create_app
+from backend.db import db
+from backend.variants import available, build_variants, missing_variant_sources
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate missing image variants')
+    parser.add_argument('--limit', type=int, default=None, help='Process at most this many images')
+    parser.add_argument('--dry-run', action='store_true', help='List images that lack variants')
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        if not available() and not args.dry_run:
+            sys.exit('Pillow is not installed (pip install Pillow)')
+        keys = missing_variant_sources(db.session, args.limit)
+        written = 0
+        for key in keys:
+            if args.dry_run:
+                print(f'would build variants for {key}')
+                continue
+            written += build_variants(key, log=print)
+    verb = 'Would process' if args.dry_run else f'Wrote {written} variant(s) for'
+    print(f'{verb} {len(keys)} image(s)')
+
+
+if __name__ == '__main__':
+    main()
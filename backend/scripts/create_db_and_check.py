@@ -2,6 +2,7 @@
 from backend.app import create_app
 import os
 from backend.db import db
+from backend.migrations import upgrade
 
 app = create_app()
 print('APP DB URI', app.config.get('SQLALCHEMY_DATABASE_URI'))
@@ -9,17 +10,8 @@ print('Backend cwd:', os.getcwd())
 pre = os.path.exists(os.path.join('backend', 'studenthub.db'))
 print('Pre exists backend/studenthub.db:', pre)
 with app.app_context():
-    db.create_all()
-
-# Run migration helper scripts to ensure local SQLite has expected columns
-# (this is safe to run repeatedly; scripts check if columns exist first)
-print('\nRunning DB helper scripts...')
-import subprocess
-import sys
-try:
-    subprocess.check_call([sys.executable, os.path.join('backend', 'scripts', 'add_course_fields.py')])
-except subprocess.CalledProcessError:
-    print('Warning: add_course_fields script failed. You may need to run it manually.')
+    # creates missing tables/columns/indexes; safe to run repeatedly
+    upgrade()
 
 post = os.path.exists(os.path.join('backend', 'studenthub.db'))
 print('Post exists backend/studenthub.db:', post)
@@ -0,0 +1,20 @@
+"""Delete resumable upload sessions that have expired, with their partial files.
+
+Usage:
+  python -m backend.scripts.expire_upload_sessions
+
+Safe to run from cron at any interval; active sessions are left alone.
+"""
+from backend.app import create_app
+from backend.resumable import expire_sessions
+
+
+def main():
+    app = create_app()
+    with app.app_context():
+        count = expire_sessions()
+    print(f'Expired {count} upload session(s)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,40 @@
+"""Move data: URI avatars out of the profiles table into stored files.
+
+Usage:
+  python -m backend.scripts.extract_avatars [--batch-size 100] [--dry-run] [--vacuum]
+
+Each avatar is decoded, stored as a blob and the row rewritten to its short
+/uploads/ URL, a batch per write transaction, so the app keeps running.
+Rows whose URI is not a valid image are reported and left alone. SQLite only
+returns the freed pages to the filesystem after VACUUM (--vacuum), which locks
+the database while it runs.
+"""
+import argparse
+
+from sqlalchemy import text
+
+from backend.app import create_app
+from backend.avatars import extract_data_uri_avatars
+from backend.db import db
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Store data: URI avatars as files')
+    parser.add_argument('--batch-size', type=int, default=100, help='Profiles rewritten per transaction')
+    parser.add_argument('--dry-run', action='store_true', help='List the avatars that would be moved')
+    parser.add_argument('--vacuum', action='store_true', help='VACUUM the database afterwards')
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        stats = extract_data_uri_avatars(batch_size=args.batch_size, dry_run=args.dry_run)
+        if args.vacuum and not args.dry_run:
+            with db.engine.connect() as conn:
+                conn.execution_options(isolation_level='AUTOCOMMIT').execute(text('VACUUM'))
+    verb = 'Would extract' if args.dry_run else 'Extracted'
+    print(f"{verb} {stats['profiles']} avatar(s), {stats['bytes_before']} bytes of row data "
+          f"(now {stats['bytes_after']}); {stats['invalid']} invalid")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,30 @@
+"""Delete stored blobs that no upload or feedback attachment references any more.
+
+Usage:
+  python -m backend.scripts.gc_blobs [--grace-hours 24] [--dry-run]
+
+Blobs referenced within the grace period are kept, as are files under
+blobs/ younger than it, so uploads in flight are never collected.
+"""
+import argparse
+
+from backend.app import create_app
+from backend.blobstore import DEFAULT_GRACE_SECONDS, collect_garbage
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Garbage-collect unreferenced upload blobs')
+    parser.add_argument('--grace-hours', type=float, default=DEFAULT_GRACE_SECONDS / 3600,
+                        help='Keep blobs referenced or written within this many hours')
+    parser.add_argument('--dry-run', action='store_true', help='List what would be deleted')
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        stats = collect_garbage(grace_seconds=args.grace_hours * 3600, dry_run=args.dry_run)
+    verb = 'Would delete' if args.dry_run else 'Deleted'
+    print(f"{verb} {stats['blobs']} blob(s), {stats['bytes']} bytes, and {stats['stray_files']} stray file(s)")
+
+
+if __name__ == '__main__':
+    main()
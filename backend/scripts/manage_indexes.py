@@ -0,0 +1,43 @@
+"""Create missing indexes on an existing database and show which index each route query uses.
+
+Usage:
+  python backend/scripts/manage_indexes.py [--create] [--dry-run] [--explain]
+
+With no flags both steps run: missing indexes are created, then the query
+plans of the hot route queries are printed.
+"""
+import argparse
+
+from backend.app import create_app
+from backend.indexes import ensure_indexes, explain_route_queries
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Create declared indexes and report route query plans')
+    parser.add_argument('--create', action='store_true', help='Create indexes declared on the models but missing in the database')
+    parser.add_argument('--dry-run', action='store_true', help='With --create, only list the indexes that would be created')
+    parser.add_argument('--explain', action='store_true', help='Print EXPLAIN QUERY PLAN for the route queries')
+    args = parser.parse_args()
+    run_all = not (args.create or args.explain)
+
+    app = create_app()
+    with app.app_context():
+        if args.create or run_all:
+            names = ensure_indexes(dry_run=args.dry_run)
+            verb = 'Would create' if args.dry_run else 'Created'
+            if names:
+                for name in names:
+                    print(f'{verb} index {name}')
+            else:
+                print('All declared indexes already exist')
+
+        if args.explain or run_all:
+            for route, plan in explain_route_queries().items():
+                print(f'\n{route}')
+                for detail in plan:
+                    marker = '  !! ' if detail.startswith('SCAN') and 'USING' not in detail else '     '
+                    print(f'{marker}{detail}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""Apply pending schema migrations.
+
+Usage:
+  python -m backend.scripts.migrate [--dry-run] [--status] [--batch-size N] [--batch-pause SECONDS]
+  python -m backend.scripts.migrate --check-foreign-keys
+
+Run once per deploy, before starting the workers. Safe to re-run: applied
+versions are recorded in the schema_migrations table and every step is
+idempotent.
+
+--check-foreign-keys lists rows whose parent row is missing. Clean those up
+before turning on SQLITE_FOREIGN_KEYS=ON, or writes touching them will fail.
+"""
+import argparse
+import sys
+
+from backend.app import create_app
+from backend.db import db
+from backend.migrations import (
+    MIGRATIONS, DEFAULT_BATCH_SIZE, DEFAULT_BATCH_PAUSE, applied_versions, foreign_key_violations, upgrade,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Apply pending schema migrations')
+    parser.add_argument('--dry-run', action='store_true', help='Print the statements and row counts without changing anything')
+    parser.add_argument('--status', action='store_true', help='List migrations and whether they have been applied')
+    parser.add_argument('--check-foreign-keys', action='store_true',
+                        help='Report orphaned rows (exit status 1 if there are any)')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='Rows per committed backfill chunk')
+    parser.add_argument('--batch-pause', type=float, default=DEFAULT_BATCH_PAUSE, help='Seconds to sleep between backfill chunks')
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        if args.status:
+            with db.engine.connect() as conn:
+                done = applied_versions(conn)
+            for version, name, _ in MIGRATIONS:
+                print(f"[{'x' if version in done else ' '}] {version:04d}_{name}")
+            return
+        if args.check_foreign_keys:
+            with db.engine.connect() as conn:
+                violations = foreign_key_violations(conn)
+            for table, parent, count in violations:
+                print(f'{table}: {count} row(s) reference missing {parent} rows')
+            if violations:
+                sys.exit(1)
+            print('No foreign key violations')
+            return
+
+        applied = upgrade(dry_run=args.dry_run, batch_size=args.batch_size, batch_pause=args.batch_pause)
+        if not applied:
+            print('Database is up to date')
+        elif args.dry_run:
+            print(f'{len(applied)} migration(s) pending')
+        else:
+            print(f'Applied {len(applied)} migration(s)')
+
+
+if __name__ == '__main__':
+    main()
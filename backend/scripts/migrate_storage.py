@@ -0,0 +1,49 @@
+"""Move stored files into the configured storage backend.
+
+Usage:
+  python -m backend.scripts.migrate_storage [--batch-size 100] [--dry-run] [--delete-source] [--skip-copy]
+
+Two idempotent passes, both safe to run while the app is serving:
+
+1. Files from before the blob store (``UPLOAD_FOLDER/<user_id>/...``) are
+   hashed, written as blobs and the upload, feedback and avatar URLs that
+   point at them are rewritten, a batch per short write transaction.
+2. Blobs still only on local disk are copied to the configured backend
+   (nothing to do when STORAGE_BACKEND=local).
+
+Run with STORAGE_FALLBACK_LOCAL=true set on the app while switching to S3, so
+files not copied yet keep being served from disk.
+"""
+import argparse
+
+from backend.app import create_app
+from backend.blobstore import copy_blobs, migrate_legacy_files
+from backend.storage import LocalStorage, get_storage
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Move stored files into the configured storage backend')
+    parser.add_argument('--batch-size', type=int, default=100, help='Rows rewritten per transaction')
+    parser.add_argument('--dry-run', action='store_true', help='List what would be moved')
+    parser.add_argument('--delete-source', action='store_true',
+                        help='Delete legacy files once their rows point at the new blob')
+    parser.add_argument('--skip-copy', action='store_true', help='Do not copy local blobs to the backend')
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        local = LocalStorage(app.config['UPLOAD_FOLDER'])
+        stats = migrate_legacy_files(local, batch_size=args.batch_size, dry_run=args.dry_run,
+                                     delete_source=args.delete_source)
+        verb = 'Would migrate' if args.dry_run else 'Migrated'
+        print(f"{verb} {stats['uploads']} upload(s) and {stats['attachments']} attachment(s), "
+              f"{stats['bytes']} bytes; {stats['avatars']} avatar(s) updated, {stats['missing']} file(s) missing")
+        target = get_storage()
+        if not args.skip_copy and not isinstance(target, LocalStorage):
+            copied = copy_blobs(local, target, dry_run=args.dry_run)
+            verb = 'Would copy' if args.dry_run else 'Copied'
+            print(f"{verb} {copied['copied']} blob(s), {copied['bytes']} bytes")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+"""Run queued background jobs (file deletion, mail, remote blob uploads).
+
+Usage:
+  python -m backend.scripts.run_jobs [--threads N] [--type TYPE ...]
+  python -m backend.scripts.run_jobs --once
+
+Without --once the worker keeps polling until interrupted (Ctrl-C or
+SIGTERM), letting running jobs finish. Several workers may run at once,
+including on other hosts sharing the database; per-type concurrency limits
+hold across all of them. --once runs every due job in this thread and exits,
+which suits cron.
+"""
+import argparse
+import signal
+
+from backend.app import create_app
+from backend.jobs import Worker, handlers, run_pending
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run queued background jobs')
+    parser.add_argument('--threads', type=int, default=None, help='Jobs run at once (default JOB_WORKER_THREADS)')
+    parser.add_argument('--type', dest='types', action='append', default=None,
+                        help='Only run jobs of this type (repeatable)')
+    parser.add_argument('--once', action='store_true', help='Run the jobs that are due now, then exit')
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        known = handlers()
+    unknown = [t for t in args.types or [] if t not in known]
+    if unknown:
+        parser.error(f"unknown job type(s): {', '.join(unknown)}; known: {', '.join(sorted(known))}")
+
+    if args.once:
+        with app.app_context():
+            count = run_pending(types=args.types)
+        print(f'Ran {count} job(s)')
+        return
+
+    worker = Worker(app, threads=args.threads, types=args.types)
+    signal.signal(signal.SIGTERM, lambda *_: worker.stop())
+    print(f'Worker {worker.id} running {worker.threads} thread(s); Ctrl-C to stop')
+    try:
+        worker.run()
+    except KeyboardInterrupt:
+        worker.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,26 @@
+"""Refresh the read replica with a consistent copy of the primary SQLite database.
+
+Usage:
+  READ_REPLICA_URL=sqlite:////path/to/replica.db python -m backend.scripts.sync_replica
+
+Uses SQLite's online backup API, so it is safe to run (e.g. from cron) while
+the app is serving traffic.
+"""
+import sys
+
+from backend.app import create_app
+from backend.db import db, sync_replica, REPLICA_BIND
+
+
+def main():
+    app = create_app()
+    with app.app_context():
+        if REPLICA_BIND not in db.engines:
+            print('READ_REPLICA_URL is not configured')
+            sys.exit(1)
+        sync_replica()
+        print(f'Replica {db.engines[REPLICA_BIND].url.database} synced from {db.engine.url.database}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+"""Shared JSON payload builders for Profile, DailyUpload and Feedback.
+
+Each model has one precompiled encoder: a single ``attrgetter`` call pulls
+every field into a tuple, and only the datetime positions are post-processed.
+Encoders work on ORM instances and on result rows alike, since both expose
+columns as attributes, so list routes select just these columns (``columns``)
+instead of loading full entities. ``json_response`` uses orjson when it is installed and
+falls back to Flask's encoder otherwise.
+"""
+import json
+from operator import attrgetter
+from flask import current_app, jsonify
+from .storage import upload_key
+
+try:
+    import orjson
+except ImportError:  # optional speed-up
+    orjson = None
+
+
+class Encoder:
+    def __init__(self, fields, datetime_fields=()):
+        self.fields = tuple(fields)
+        self._get = attrgetter(*self.fields)
+        self._datetime_positions = tuple(i for i, name in enumerate(self.fields) if name in datetime_fields)
+
+    def __call__(self, obj) -> dict:
+        values = list(self._get(obj))
+        for i in self._datetime_positions:
+            value = values[i]
+            if value is not None:
+                values[i] = value.isoformat()
+        return dict(zip(self.fields, values))
+
+
+PROFILE_FIELDS = (
+    'id', 'user_id', 'username', 'email', 'full_name', 'contact_number', 'college_name', 'college_id',
+    'city', 'pincode', 'college_email', 'course_name', 'course_mode', 'course_duration', 'avatar_url',
+    'status', 'created_at',
+)
+UPLOAD_FIELDS = (
+    'id', 'user_id', 'file_name', 'file_url', 'file_type', 'file_size', 'upload_date', 'description',
+    'status', 'admin_feedback', 'reviewed_by', 'reviewed_at', 'created_at',
+)
+FEEDBACK_FIELDS = (
+    'id', 'user_id', 'category', 'subject', 'message', 'rating', 'attachments', 'status',
+    'admin_response', 'responded_by', 'responded_at', 'created_at',
+)
+
+def columns(model, fields):
+    """Column expressions for a projected query: rows come back as plain tuples
+    with attribute access, skipping ORM instance hydration and the identity map."""
+    return [getattr(model, name) for name in fields]
+
+
+encode_profile = Encoder(PROFILE_FIELDS, datetime_fields=('created_at',))
+encode_upload = Encoder(UPLOAD_FIELDS, datetime_fields=('upload_date', 'reviewed_at', 'created_at'))
+encode_feedback = Encoder(FEEDBACK_FIELDS, datetime_fields=('responded_at', 'created_at'))
+
+
+def decode_attachments(raw):
+    if not raw:
+        return []
+    try:
+        return json.loads(raw)
+    except ValueError:
+        return []
+
+
+def serialize_profile(p, variants=None) -> dict:
+    """``variants`` is a ``variants.variant_urls`` map; when given, the payload
+    gains ``avatar_variants`` (name -> URL)."""
+    data = encode_profile(p)
+    if variants is not None:
+        data['avatar_variants'] = variants.get(upload_key(data['avatar_url']), {})
+    return data
+
+
+def serialize_upload(u, student_name=None, with_student=False, variants=None) -> dict:
+    # file_url is stored canonical (/uploads/<key>, see storage.canonical_url)
+    data = encode_upload(u)
+    if variants is not None:
+        data['variants'] = variants.get(upload_key(data['file_url']), {})
+    if with_student:
+        data['student_name'] = student_name if student_name is not None else 'Unknown'
+    return data
+
+
+def serialize_feedback(f, student_name=None, student_email=None, with_student=False) -> dict:
+    data = encode_feedback(f)
+    data['attachments'] = decode_attachments(data['attachments'])
+    if with_student:
+        data['student_name'] = student_name
+        data['student_email'] = student_email
+    return data
+
+
+def dumps(payload) -> str:
+    if orjson is not None:
+        return orjson.dumps(payload).decode('utf-8')
+    return json.dumps(payload, separators=(',', ':'))
+
+
+def json_response(payload, status: int = 200):
+    """Like jsonify, but encoded with orjson when available."""
+    if orjson is None:
+        resp = jsonify(payload)
+        resp.status_code = status
+        return resp
+    return current_app.response_class(orjson.dumps(payload), status=status, mimetype='application/json')
@@ -0,0 +1,368 @@
+"""Where uploaded file bytes live.
+
+Routes and the blob store address files by key, the POSIX path after
+``/uploads/`` (e.g. ``blobs/ab/cd/<sha256>.pdf``), and go through the backend
+returned by ``get_storage()`` instead of joining paths under UPLOAD_FOLDER:
+
+* ``LocalStorage``: files under a root directory. Blob keys are already
+  sharded by hash (``blobs/ab/cd/``), so no directory grows unboundedly.
+* ``S3Storage``: any S3-compatible service (AWS, MinIO, Ceph, R2) through
+  boto3, which is imported only when this backend is selected. Downloads can
+  be redirected to presigned URLs so workers do not proxy the bytes.
+* ``FallbackStorage``: writes to a new backend and reads from it, falling back to
+  the old one for keys not copied yet. This allows switching backends
+  before ``python -m backend.scripts.migrate_storage`` has finished.
+
+Configured with STORAGE_BACKEND (``local`` or ``s3``), the S3_* settings and
+STORAGE_FALLBACK_LOCAL.
+"""
+import os
+import re
+from abc import ABC, abstractmethod
+import shutil
+import uuid
+from collections import namedtuple
+from flask import current_app
+
+CHUNK_SIZE = 64 * 1024
+EXTERNAL_URL = re.compile(r'^(https?://|data:)', re.I)
+WINDOWS_DRIVE = re.compile(r'^[A-Za-z]:/')
+
+StoredObject = namedtuple('StoredObject', ('key', 'size', 'mtime', 'etag'))
+
+
+def normalize_key(key: str):
+    """Clean POSIX key, or None for keys that must never be served or written
+    (empty, or with hidden parts such as the .incoming spool directory)."""
+    parts = [p for p in (key or '').replace('\\', '/').split('/') if p and p != '.']
+    if not parts or any(p.startswith('.') for p in parts):
+        return None
+    return '/'.join(parts)
+
+
+def canonical_url(value, uploads_root=None):
+    """The one stored form of a file reference: ``/uploads/<key>``.
+
+    Accepts what older rows and clients hold: ``/uploads/`` URLs, bare keys,
+    Windows separators, and absolute paths under ``uploads_root``. External
+    (``http(s)://``) and ``data:`` URLs, and paths that cannot be served
+    (outside the root, hidden parts), are returned unchanged.
+    """
+    if not value or EXTERNAL_URL.match(value):
+        return value
+    path = value.replace('\\', '/')
+    if path.startswith('/uploads/'):
+        key = path[len('/uploads/'):]
+    elif path.startswith('/') or WINDOWS_DRIVE.match(path):
+        root = (uploads_root or '').replace('\\', '/').rstrip('/') + '/'
+        if not uploads_root or not path.startswith(root):
+            return value
+        key = path[len(root):]
+    else:
+        key = path
+    key = normalize_key(key)
+    return f'/uploads/{key}' if key else value
+
+
+def upload_key(file_url: str, uploads_root=None) -> str:
+    """Storage key of a stored file URL (the part after ``/uploads/``), or ''."""
+    url = canonical_url(file_url, uploads_root) or ''
+    return url[len('/uploads/'):] if url.startswith('/uploads/') else ''
+
+
+class Storage(ABC):
+    """Interface implemented by the storage backends. A backend missing any
+    abstract method fails when it is constructed, not on first use."""
+
+    # writes leave the host (slow enough to queue rather than do in a request)
+    remote = False
+
+    @abstractmethod
+    def put_file(self, key: str, src_path: str):
+        raise NotImplementedError
+
+    @abstractmethod
+    def put_bytes(self, key: str, data: bytes):
+        raise NotImplementedError
+
+    @abstractmethod
+    def stat(self, key: str):
+        """StoredObject for ``key``, or None if it does not exist."""
+        raise NotImplementedError
+
+    def exists(self, key: str) -> bool:
+        return self.stat(key) is not None
+
+    @abstractmethod
+    def open(self, key: str):
+        """Readable binary file object for the whole object."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def stream(self, key: str, start: int = 0, stop=None, chunk_size: int = CHUNK_SIZE):
+        """Iterate over the bytes in [start, stop)."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def delete(self, key: str):
+        raise NotImplementedError
+
+    @abstractmethod
+    def iter_objects(self, prefix: str = ''):
+        raise NotImplementedError
+
+    def presign(self, key: str, expires: int = 3600, download_name=None):
+        """Time-limited URL clients can fetch directly, or None if unsupported."""
+        return None
+
+    def local_path(self, key: str):
+        """Filesystem path of the object, when it has one (sendfile, offload)."""
+        return None
+
+    def resolve(self, key: str):
+        """(backend, StoredObject) holding ``key``, or (None, None)."""
+        obj = self.stat(key)
+        return (self, obj) if obj is not None else (None, None)
+
+
+class LocalStorage(Storage):
+    def __init__(self, root: str):
+        self.root = root
+
+    def _path(self, key: str):
+        key = normalize_key(key)
+        if key is None:
+            raise KeyError('invalid storage key')
+        return os.path.join(self.root, *key.split('/'))
+
+    def local_path(self, key: str):
+        try:
+            return self._path(key)
+        except KeyError:
+            return None
+
+    def put_file(self, key: str, src_path: str):
+        dest = self._path(key)
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        tmp = f'{dest}.{uuid.uuid4().hex}.tmp'
+        try:
+            # a hard link publishes the spooled file without copying its bytes
+            os.link(src_path, tmp)
+        except OSError:
+            # different filesystem, or links unsupported
+            shutil.copyfile(src_path, tmp)
+        os.replace(tmp, dest)
+
+    def put_bytes(self, key: str, data: bytes):
+        dest = self._path(key)
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        tmp = f'{dest}.{uuid.uuid4().hex}.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, dest)
+
+    def stat(self, key: str):
+        try:
+            path = self._path(key)
+            st = os.stat(path)
+        except (KeyError, OSError):
+            return None
+        if not os.path.isfile(path):
+            return None
+        return StoredObject(normalize_key(key), st.st_size, st.st_mtime, f'{st.st_size:x}-{st.st_mtime_ns:x}')
+
+    def open(self, key: str):
+        return open(self._path(key), 'rb')
+
+    def stream(self, key: str, start: int = 0, stop=None, chunk_size: int = CHUNK_SIZE):
+        with open(self._path(key), 'rb') as f:
+            f.seek(start)
+            remaining = None if stop is None else stop - start
+            while remaining is None or remaining > 0:
+                chunk = f.read(chunk_size if remaining is None else min(chunk_size, remaining))
+                if not chunk:
+                    break
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+
+    def delete(self, key: str):
+        try:
+            os.remove(self._path(key))
+        except (KeyError, FileNotFoundError):
+            pass
+
+    def iter_objects(self, prefix: str = ''):
+        base = os.path.join(self.root, *prefix.strip('/').split('/')) if prefix.strip('/') else self.root
+        for dirpath, dirnames, filenames in os.walk(base):
+            dirnames[:] = [d for d in dirnames if not d.startswith('.')]
+            for name in filenames:
+                key = os.path.relpath(os.path.join(dirpath, name), self.root).replace(os.sep, '/')
+                obj = self.stat(key)
+                if obj is not None:
+                    yield obj
+
+
+class S3Storage(Storage):
+    remote = True
+
+    def __init__(self, bucket: str, prefix: str = '', client=None, endpoint_url=None, region=None):
+        self.bucket = bucket
+        self.prefix = prefix.strip('/') + '/' if prefix.strip('/') else ''
+        if client is None:
+            try:
+                import boto3
+            except ImportError as e:
+                raise RuntimeError('STORAGE_BACKEND=s3 requires boto3 (pip install boto3)') from e
+            client = boto3.client('s3', endpoint_url=endpoint_url or None, region_name=region or None)
+        self.client = client
+
+    def _k(self, key: str) -> str:
+        key = normalize_key(key)
+        if key is None:
+            raise KeyError('invalid storage key')
+        return self.prefix + key
+
+    @staticmethod
+    def _missing(exc) -> bool:
+        code = str(getattr(exc, 'response', {}).get('Error', {}).get('Code', ''))
+        return code in ('404', 'NoSuchKey', 'NotFound')
+
+    def put_file(self, key: str, src_path: str):
+        # upload_file switches to multipart for large files
+        self.client.upload_file(src_path, self.bucket, self._k(key))
+
+    def put_bytes(self, key: str, data: bytes):
+        self.client.put_object(Bucket=self.bucket, Key=self._k(key), Body=data)
+
+    def stat(self, key: str):
+        try:
+            head = self.client.head_object(Bucket=self.bucket, Key=self._k(key))
+        except KeyError:
+            return None
+        except Exception as e:
+            if self._missing(e):
+                return None
+            raise
+        return StoredObject(
+            normalize_key(key), head['ContentLength'], head['LastModified'].timestamp(), head['ETag'].strip('"')
+        )
+
+    def open(self, key: str):
+        return self.client.get_object(Bucket=self.bucket, Key=self._k(key))['Body']
+
+    def stream(self, key: str, start: int = 0, stop=None, chunk_size: int = CHUNK_SIZE):
+        params = {'Bucket': self.bucket, 'Key': self._k(key)}
+        if start or stop is not None:
+            params['Range'] = f"bytes={start}-{'' if stop is None else stop - 1}"
+        body = self.client.get_object(**params)['Body']
+        try:
+            while True:
+                chunk = body.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+        finally:
+            body.close()
+
+    def delete(self, key: str):
+        self.client.delete_object(Bucket=self.bucket, Key=self._k(key))
+
+    def iter_objects(self, prefix: str = ''):
+        params = {'Bucket': self.bucket, 'Prefix': self.prefix + prefix.lstrip('/')}
+        while True:
+            page = self.client.list_objects_v2(**params)
+            for item in page.get('Contents', []):
+                key = item['Key'][len(self.prefix):]
+                yield StoredObject(key, item['Size'], item['LastModified'].timestamp(), item['ETag'].strip('"'))
+            if not page.get('IsTruncated'):
+                break
+            params['ContinuationToken'] = page['NextContinuationToken']
+
+    def presign(self, key: str, expires: int = 3600, download_name=None):
+        params = {'Bucket': self.bucket, 'Key': self._k(key)}
+        if download_name:
+            from urllib.parse import quote
+            params['ResponseContentDisposition'] = f"attachment; filename*=UTF-8''{quote(download_name)}"
+        return self.client.generate_presigned_url('get_object', Params=params, ExpiresIn=expires)
+
+
+class FallbackStorage(Storage):
+    """Writes go to ``primary``; reads fall back to ``fallback`` for keys not migrated yet."""
+
+    def __init__(self, primary: Storage, fallback: Storage):
+        self.primary = primary
+        self.fallback = fallback
+        self.remote = primary.remote
+
+    def put_file(self, key, src_path):
+        self.primary.put_file(key, src_path)
+
+    def put_bytes(self, key, data):
+        self.primary.put_bytes(key, data)
+
+    def resolve(self, key):
+        backend, obj = self.primary.resolve(key)
+        if obj is None:
+            backend, obj = self.fallback.resolve(key)
+        return backend, obj
+
+    def stat(self, key):
+        return self.resolve(key)[1]
+
+    def _reader(self, key):
+        backend, _ = self.resolve(key)
+        if backend is None:
+            raise FileNotFoundError(key)
+        return backend
+
+    def open(self, key):
+        return self._reader(key).open(key)
+
+    def stream(self, key, start=0, stop=None, chunk_size=CHUNK_SIZE):
+        return self._reader(key).stream(key, start, stop, chunk_size)
+
+    def delete(self, key):
+        self.primary.delete(key)
+        self.fallback.delete(key)
+
+    def iter_objects(self, prefix=''):
+        return self.primary.iter_objects(prefix)
+
+    def presign(self, key, expires=3600, download_name=None):
+        backend, _ = self.resolve(key)
+        return backend.presign(key, expires, download_name) if backend else None
+
+    def local_path(self, key):
+        backend, _ = self.resolve(key)
+        return backend.local_path(key) if backend else None
+
+
+def build_storage(config) -> Storage:
+    backend = (config.get('STORAGE_BACKEND') or 'local').lower()
+    local = LocalStorage(config.get('UPLOAD_FOLDER'))
+    if backend == 'local':
+        return local
+    if backend == 's3':
+        storage = S3Storage(
+            config.get('S3_BUCKET'),
+            prefix=config.get('S3_PREFIX', ''),
+            endpoint_url=config.get('S3_ENDPOINT_URL'),
+            region=config.get('S3_REGION'),
+        )
+        if config.get('STORAGE_FALLBACK_LOCAL'):
+            return FallbackStorage(storage, local)
+        return storage
+    raise ValueError(f'Unknown STORAGE_BACKEND: {backend}')
+
+
+def init_storage(app, storage: Storage = None):
+    app.extensions['storage'] = storage or build_storage(app.config)
+
+
+def get_storage() -> Storage:
+    storage = current_app.extensions.get('storage')
+    if storage is None:
+        # UPLOAD_FOLDER may be changed after create_app (tests do), so build lazily
+        storage = current_app.extensions['storage'] = build_storage(current_app.config)
+    return storage
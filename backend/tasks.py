@@ -0,0 +1,45 @@
+"""Handlers of the background job types (see backend/jobs.py)."""
+import os
+from . import resumable, variants
+from .jobs import job_handler
+from .mail import send_mail
+from .storage import get_storage
+
+
+@job_handler('delete_objects', concurrency=2)
+def delete_objects(keys):
+    """Remove storage objects nothing references any more."""
+    storage = get_storage()
+    for key in keys:
+        storage.delete(key)
+
+
+@job_handler('discard_upload_parts', concurrency=2)
+def discard_upload_parts(session_ids):
+    resumable.discard(session_ids)
+
+
+@job_handler('store_blob', concurrency=4, max_attempts=8)
+def store_blob(key, path):
+    """Upload a staged file (``blobstore.stage_blob``) under its blob key, then
+    remove the staging copy."""
+    storage = get_storage()
+    if not os.path.exists(path):
+        if storage.exists(key):
+            return  # an earlier run stored it and removed the copy
+        raise FileNotFoundError(f'staged file {path} for {key} is missing')
+    if not storage.exists(key):
+        storage.put_file(key, path)
+    os.remove(path)
+
+
+@job_handler('build_variants', concurrency=2)
+def build_variants(keys):
+    """Write the missing size-bounded copies of image blobs (backend/variants.py)."""
+    for key in keys:
+        variants.build_variants(key)
+
+
+@job_handler('send_email', concurrency=2, max_attempts=8)
+def send_email(to, subject, body):
+    send_mail(to, subject, body)
@@ -3,6 +3,8 @@ import tempfile
 import os
 from backend.app import create_app
 from backend.db import db as _db
+from backend.models import User, Profile
+from backend.utils import hash_password
 
 @pytest.fixture(scope='session')
 def app():
@@ -37,3 +39,30 @@ def db(app):
     # Provide a clean db session for tests
     with app.app_context():
         yield _db
+
+
+# Helpers shared by the test modules (import them from backend.tests.conftest)
+
+def create_user(db, email, role='student', status='active', password='pw', **profile_fields):
+    """Add a user with a profile; returns (user_id, profile_id)."""
+    user = User(email=email, password_hash=hash_password(password), role=role)
+    db.session.add(user)
+    db.session.flush()
+    profile_fields.setdefault('full_name', email.split('@')[0])
+    profile = Profile(user_id=user.id, email=email, status=status, **profile_fields)
+    db.session.add(profile)
+    db.session.commit()
+    return user.id, profile.id
+
+
+def auth_headers(client, email, password='pw'):
+    resp = client.post('/auth/login', json={'email': email, 'password': password})
+    assert resp.status_code == 200
+    return {'Authorization': f"Bearer {resp.get_json()['access_token']}"}
+
+
+def student_headers(client, db, email, **profile_fields):
+    """Create an active student and log them in."""
+    with client.application.app_context():
+        create_user(db, email, **profile_fields)
+    return auth_headers(client, email)
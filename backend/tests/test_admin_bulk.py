@@ -0,0 +1,91 @@
+from backend.models import Profile, DailyUpload
+from backend.tests.conftest import auth_headers, create_user
+
+
+def test_bulk_student_actions(client, db):
+    create_user(db, 'bulk-admin@example.com', role='admin')
+    _, taken = create_user(db, 'bulk-taken@example.com', username='bulk-taken')
+    profiles = [create_user(db, f'bulk{i}@example.com', status='pending')[1] for i in range(4)]
+    admin = auth_headers(client, 'bulk-admin@example.com')
+
+    resp = client.post('/admin/students/bulk', headers=admin, json={'action': 'approve', 'items': [
+        {'id': profiles[0], 'username': 'bulk-zero'},
+        {'id': profiles[1], 'username': 'bulk-one'},
+        {'id': profiles[2], 'username': 'bulk-taken'},
+        {'id': profiles[3]},
+        {'id': 'missing', 'username': 'bulk-missing'},
+        {'id': profiles[0], 'username': 'bulk-again'},
+    ]})
+    assert resp.status_code == 200
+    body = resp.get_json()
+    assert (body['updated'], body['failed']) == (2, 4)
+    assert [r['success'] for r in body['results']] == [True, True, False, False, False, False]
+    assert body['results'][0]['username'] == 'bulk-zero'
+    assert [r.get('message') for r in body['results'][2:]] == [
+        'Username "bulk-taken" is already taken', 'username is required', 'Profile not found', 'Duplicate id',
+    ]
+    db.session.expire_all()
+    approved = db.session.get(Profile, profiles[1])
+    assert (approved.status, approved.username) == ('active', 'bulk-one')
+    assert db.session.get(Profile, profiles[2]).status == 'pending'
+
+    # status changes revoke the students' tokens, as the single-student routes do
+    student = auth_headers(client, 'bulk0@example.com')
+    assert client.get('/student/profile', headers=student).status_code == 200
+    resp = client.post('/admin/students/bulk', headers=admin,
+                       json={'action': 'suspend', 'ids': [profiles[0], profiles[1], taken]})
+    assert resp.get_json()['updated'] == 3
+    assert client.get('/student/profile', headers=student).status_code == 401
+    db.session.expire_all()
+    assert {db.session.get(Profile, pid).status for pid in (profiles[0], profiles[1], taken)} == {'suspended'}
+
+    assert client.post('/admin/students/bulk', headers=admin,
+                       json={'action': 'delete', 'ids': [profiles[0]]}).status_code == 400
+    assert client.post('/admin/students/bulk', headers=admin, json={'action': 'activate', 'ids': []}).status_code == 400
+    assert client.post('/admin/students/bulk', headers=student, json={'action': 'activate', 'ids': [taken]}).status_code in (401, 403)
+
+
+def test_bulk_upload_review(client, db):
+    reviewer_id, _ = create_user(db, 'bulk-reviewer@example.com', role='admin')
+    student_id, _ = create_user(db, 'bulk-uploader@example.com')
+    uploads = []
+    for i in range(5):
+        upload = DailyUpload(user_id=student_id, file_name=f'b{i}.pdf', file_url=f'/uploads/{student_id}/b{i}.pdf')
+        db.session.add(upload)
+        db.session.flush()
+        uploads.append(upload.id)
+    db.session.commit()
+    admin = auth_headers(client, 'bulk-reviewer@example.com')
+
+    resp = client.post('/admin/uploads/bulk-status', headers=admin, json={
+        'status': 'approved', 'feedback': 'Looks good',
+        'items': [
+            {'id': uploads[0]},
+            {'id': uploads[1]},
+            {'id': uploads[2], 'status': 'rejected', 'feedback': 'Wrong file'},
+            {'id': uploads[3], 'status': 'bogus'},
+            {'id': 'missing'},
+        ],
+    })
+    assert resp.status_code == 200
+    body = resp.get_json()
+    assert (body['updated'], body['failed']) == (3, 2)
+    assert [r.get('status') or r['message'] for r in body['results']] == [
+        'approved', 'approved', 'rejected', 'Invalid status', 'Upload not found',
+    ]
+    db.session.expire_all()
+    rows = {u: db.session.get(DailyUpload, u) for u in uploads}
+    assert (rows[uploads[0]].status, rows[uploads[0]].admin_feedback) == ('approved', 'Looks good')
+    assert (rows[uploads[2]].status, rows[uploads[2]].admin_feedback) == ('rejected', 'Wrong file')
+    assert rows[uploads[2]].reviewed_by == reviewer_id and rows[uploads[2]].reviewed_at is not None
+    assert rows[uploads[3]].status == 'pending' and rows[uploads[4]].reviewed_at is None
+
+    resp = client.post('/admin/uploads/bulk-status', headers=admin, json={'status': 'reviewed', 'ids': uploads[3:]})
+    assert resp.get_json()['updated'] == 2
+
+    client.application.config['ADMIN_BULK_MAX_ITEMS'] = 2
+    try:
+        resp = client.post('/admin/uploads/bulk-status', headers=admin, json={'status': 'reviewed', 'ids': uploads})
+    finally:
+        client.application.config['ADMIN_BULK_MAX_ITEMS'] = 1000
+    assert resp.status_code == 400
@@ -0,0 +1,63 @@
+import csv
+import io
+import json
+from backend.models import User, DailyUpload, Feedback
+from backend.tests.conftest import auth_headers, create_user
+
+
+def setup_data(db):
+    if User.query.filter_by(email='export-admin@example.com').first():
+        return
+    create_user(db, 'export-admin@example.com', role='admin')
+    student_id, _ = create_user(db, 'export-student@example.com', full_name='Export Student', city='Export City')
+    for i in range(3):
+        db.session.add(DailyUpload(user_id=student_id, file_name=f'e{i}.pdf', file_url=f'/uploads/{student_id}/e{i}.pdf', status='pending'))
+    db.session.add(Feedback(user_id=student_id, category='Export', subject='exp', message='m', rating=5,
+                            attachments=json.dumps(['/uploads/a.png'])))
+    db.session.commit()
+
+
+def headers(client):
+    return auth_headers(client, 'export-admin@example.com')
+
+
+def test_export_students_csv(client, db):
+    with client.application.app_context():
+        setup_data(db)
+    resp = client.get('/admin/export/students?city=Export%20City', headers=headers(client))
+    assert resp.status_code == 200
+    assert resp.mimetype == 'text/csv'
+    assert resp.is_streamed
+    assert 'attachment' in resp.headers['Content-Disposition']
+    rows = list(csv.DictReader(io.StringIO(resp.get_data(as_text=True))))
+    assert [r['full_name'] for r in rows] == ['Export Student']
+
+
+def test_export_csv_without_rows_has_header(client, db):
+    with client.application.app_context():
+        setup_data(db)
+    resp = client.get('/admin/export/uploads?status=no-such-status', headers=headers(client))
+    assert resp.status_code == 200
+    lines = resp.get_data(as_text=True).splitlines()
+    assert len(lines) == 1
+    assert lines[0].startswith('id,user_id,file_name') and lines[0].endswith(',student_name')
+
+
+def test_export_uploads_and_feedback_ndjson(client, db):
+    with client.application.app_context():
+        setup_data(db)
+        student_id = User.query.filter_by(email='export-student@example.com').first().id
+    h = headers(client)
+    resp = client.get(f'/admin/export/uploads?format=ndjson&user_id={student_id}', headers=h)
+    assert resp.status_code == 200
+    lines = [json.loads(line) for line in resp.get_data(as_text=True).splitlines()]
+    assert sorted(l['file_name'] for l in lines) == ['e0.pdf', 'e1.pdf', 'e2.pdf']
+    assert all(l['student_name'] == 'Export Student' for l in lines)
+
+    resp = client.get('/admin/export/feedback?format=csv&category=Export', headers=h)
+    rows = list(csv.DictReader(io.StringIO(resp.get_data(as_text=True))))
+    assert len(rows) == 1
+    assert json.loads(rows[0]['attachments']) == ['/uploads/a.png']
+
+    assert client.get('/admin/export/users', headers=h).status_code == 404
+    assert client.get('/admin/export/uploads?format=xml', headers=h).status_code == 400
@@ -0,0 +1,120 @@
+from backend.models import User, Profile
+from backend.tests.conftest import auth_headers, create_user
+from backend.utils import hash_password
+
+
+ADMIN_EMAIL = 'students-admin@example.com'
+
+
+def create_admin(db):
+    # shared by every test in this module, so created once
+    if not User.query.filter_by(email=ADMIN_EMAIL).first():
+        create_user(db, ADMIN_EMAIL, role='admin', full_name='Students Admin')
+
+
+def admin_headers(client):
+    return auth_headers(client, ADMIN_EMAIL)
+
+
+def test_admin_students_filters_sort_and_cursor(client, db):
+    app = client.application
+    with app.app_context():
+        create_admin(db)
+        for i, name in enumerate(['Carol', 'alice', 'Bob', 'Dave']):
+            user = User(email=f'dir{i}@example.com', password_hash=hash_password('pw'))
+            db.session.add(user)
+            db.session.flush()
+            db.session.add(Profile(
+                user_id=user.id,
+                full_name=name,
+                email=user.email,
+                city='Pune',
+                pincode='411001',
+                course_mode='online' if i < 3 else 'offline',
+                status='pending',
+            ))
+        db.session.commit()
+
+    headers = admin_headers(client)
+    names = []
+    after = None
+    while True:
+        url = '/admin/students?city=Pune&course_mode=online&sort=full_name&limit=2'
+        if after:
+            url += f'&after={after}'
+        resp = client.get(url, headers=headers)
+        assert resp.status_code == 200
+        assert resp.headers['X-Total-Count'] == '3'
+        names.extend(s['full_name'] for s in resp.get_json())
+        after = resp.headers.get('X-Next-Cursor')
+        if not after:
+            break
+    assert names == ['Bob', 'Carol', 'alice']
+
+    resp = client.get('/admin/students?pincode=411001&sort=-full_name', headers=headers)
+    assert [s['full_name'] for s in resp.get_json()] == ['alice', 'Dave', 'Carol', 'Bob']
+
+    resp = client.get('/admin/students?sort=password_hash', headers=headers)
+    assert resp.status_code == 400
+
+
+def test_admin_students_without_limit_are_capped(client, db, monkeypatch):
+    from backend import pagination
+    app = client.application
+    with app.app_context():
+        create_admin(db)
+        password_hash = hash_password('pw')
+        for i in range(pagination.DEFAULT_LIMIT + 1):
+            user = User(email=f'all{i}@example.com', password_hash=password_hash)
+            db.session.add(user)
+            db.session.flush()
+            db.session.add(Profile(user_id=user.id, full_name=f'All {i}', email=user.email, city='Unpaged'))
+        db.session.commit()
+
+    headers = admin_headers(client)
+    resp = client.get('/admin/students?city=Unpaged', headers=headers)
+    assert len(resp.get_json()) == pagination.DEFAULT_LIMIT + 1
+    assert resp.headers['X-Total-Count'] == str(pagination.DEFAULT_LIMIT + 1)
+    assert 'X-Next-Cursor' not in resp.headers
+
+    monkeypatch.setattr(pagination, 'UNPAGED_LIMIT', 40)
+    resp = client.get('/admin/students?city=Unpaged', headers=headers)
+    assert len(resp.get_json()) == 40 and resp.headers['X-Next-Cursor']
+    # the total still counts every match
+    assert resp.headers['X-Total-Count'] == str(pagination.DEFAULT_LIMIT + 1)
+
+
+def test_debug_db_reports_sqlite_pragmas(client, db):
+    assert client.get('/debug/db').status_code == 401
+    create_admin(db)
+    resp = client.get('/debug/db', headers=admin_headers(client))
+    assert resp.status_code == 200
+    info = resp.get_json()
+    assert info['sqlite_profile'] == client.application.config['SQLITE_PROFILE']
+    pragmas = info['pragmas']
+    assert pragmas['busy_timeout'] == 5000
+    # opt-in, see backend/db.py
+    assert 'foreign_keys' not in pragmas
+    assert pragmas['journal_mode'] in ('wal', 'memory')
+    assert info['tables']
+
+
+def test_delete_student_with_feedback(client, db):
+    from backend.models import Feedback
+    app = client.application
+    with app.app_context():
+        create_admin(db)
+        user = User(email='leaving@example.com', password_hash=hash_password('pw'))
+        db.session.add(user)
+        db.session.flush()
+        profile = Profile(user_id=user.id, full_name='Leaving', email=user.email, status='active')
+        db.session.add(profile)
+        db.session.add(Feedback(user_id=user.id, category='Other', subject='bye', message='bye', rating=3))
+        db.session.commit()
+        profile_id, user_id = profile.id, user.id
+
+    resp = client.delete(f'/admin/students/{profile_id}', headers=admin_headers(client))
+    assert resp.status_code == 200, resp.get_json()
+    with app.app_context():
+        assert db.session.get(User, user_id) is None
+        assert Feedback.query.filter_by(user_id=user_id).count() == 0
@@ -0,0 +1,101 @@
+import base64
+import json
+from datetime import datetime, timedelta
+from backend.models import User, Profile, DailyUpload
+from backend.tests.conftest import auth_headers, create_user
+from backend.utils import hash_password
+
+
+ADMIN_EMAIL = 'uploads-admin@example.com'
+
+
+def create_admin(db):
+    # shared by every test in this module, so created once
+    if not User.query.filter_by(email=ADMIN_EMAIL).first():
+        create_user(db, ADMIN_EMAIL, role='admin', full_name='Uploads Admin')
+
+
+def admin_headers(client):
+    return auth_headers(client, ADMIN_EMAIL)
+
+
+def test_admin_uploads_keyset_pagination(client, db):
+    app = client.application
+    with app.app_context():
+        create_admin(db)
+        student = User(email='paged@example.com', password_hash=hash_password('pw'))
+        db.session.add(student)
+        db.session.flush()
+        db.session.add(Profile(user_id=student.id, full_name='Paged Student', email=student.email, status='active'))
+        base = datetime(2030, 1, 1)
+        for i in range(5):
+            db.session.add(DailyUpload(
+                user_id=student.id,
+                file_name=f'f{i}.pdf',
+                file_url=f'/uploads/{student.id}/f{i}.pdf',
+                status='approved' if i % 2 else 'pending',
+                created_at=base + timedelta(minutes=i),
+            ))
+        db.session.commit()
+        student_id = student.id
+
+    headers = admin_headers(client)
+    seen = []
+    after = None
+    while True:
+        url = f'/admin/uploads?user_id={student_id}&limit=2'
+        if after:
+            url += f'&after={after}'
+        resp = client.get(url, headers=headers)
+        assert resp.status_code == 200
+        page = resp.get_json()
+        assert len(page) <= 2
+        seen.extend(page)
+        after = resp.headers.get('X-Next-Cursor')
+        if not after:
+            break
+
+    assert [u['file_name'] for u in seen] == ['f4.pdf', 'f3.pdf', 'f2.pdf', 'f1.pdf', 'f0.pdf']
+    assert all(u['student_name'] == 'Paged Student' for u in seen)
+
+    resp = client.get(f'/admin/uploads?user_id={student_id}&status=approved', headers=headers)
+    assert [u['file_name'] for u in resp.get_json()] == ['f3.pdf', 'f1.pdf']
+
+    resp = client.get(f'/admin/uploads?user_id={student_id}&start=2030-01-01T00:02:00&end=2030-01-01T00:03:00', headers=headers)
+    assert [u['file_name'] for u in resp.get_json()] == ['f3.pdf', 'f2.pdf']
+
+    resp = client.get('/admin/uploads?after=not-a-cursor', headers=headers)
+    assert resp.status_code == 400
+    # well-formed base64 whose JSON has the wrong shape or types
+    for payload in ([1, 'x'], {'a': 1}, 5):
+        cursor = base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip('=')
+        resp = client.get(f'/admin/uploads?after={cursor}', headers=headers)
+        assert resp.status_code == 400 and resp.get_json()['message'] == 'Invalid cursor'
+
+
+def test_admin_uploads_without_limit_are_capped(client, db, monkeypatch):
+    from backend import pagination
+    app = client.application
+    with app.app_context():
+        create_admin(db)
+        student = User(email='unpaged@example.com', password_hash=hash_password('pw'))
+        db.session.add(student)
+        db.session.flush()
+        db.session.add_all([
+            DailyUpload(user_id=student.id, file_name=f'u{i}.pdf', file_url=f'/uploads/{student.id}/u{i}.pdf')
+            for i in range(pagination.DEFAULT_LIMIT + 1)
+        ])
+        db.session.commit()
+        student_id = student.id
+
+    headers = admin_headers(client)
+    # under the cap an unpaged client still sees every row
+    resp = client.get(f'/admin/uploads?user_id={student_id}', headers=headers)
+    assert len(resp.get_json()) == pagination.DEFAULT_LIMIT + 1
+    assert 'X-Next-Cursor' not in resp.headers
+
+    monkeypatch.setattr(pagination, 'UNPAGED_LIMIT', 40)
+    resp = client.get(f'/admin/uploads?user_id={student_id}', headers=headers)
+    assert len(resp.get_json()) == 40 and resp.headers['X-Next-Cursor']
+    resp = client.get(f'/admin/uploads?user_id={student_id}&limit=10', headers=headers)
+    assert len(resp.get_json()) == 10 and resp.headers['X-Next-Cursor']
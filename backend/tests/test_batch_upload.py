@@ -0,0 +1,49 @@
+import io
+from sqlalchemy import event
+from backend.db import db as _db
+from backend.models import DailyUpload
+from backend.tests.conftest import student_headers
+
+PNG = b'\x89PNG\r\n\x1a\n' + b'\x00' * 64
+
+
+def test_batch_upload_reports_per_file_results_in_one_commit(client, db):
+    headers = student_headers(client, db, 'batch@example.com')
+    with client.application.app_context():
+        engine = _db.engine
+    commits = []
+    listener = lambda conn: commits.append(1)  # noqa: E731
+    event.listen(engine, 'commit', listener)
+    try:
+        resp = client.post('/student/uploads/batch', headers=headers, content_type='multipart/form-data', data={
+            'files[]': [
+                (io.BytesIO(b'%PDF-1.4 one'), 'one.pdf'),
+                (io.BytesIO(b'MZ not allowed'), 'tool.exe'),
+                (io.BytesIO(PNG), 'screenshot', 'application/octet-stream'),
+            ],
+            'descriptions[]': ['first', 'second', ''],
+            'description': 'shared',
+        })
+    finally:
+        event.remove(engine, 'commit', listener)
+    assert resp.status_code == 200, resp.get_json()
+    results = resp.get_json()['results']
+    assert [r['success'] for r in results] == [True, False, True]
+    assert results[1]['filename'] == 'tool.exe'
+    assert 'magic_hex' in results[1]
+    assert len(commits) == 1
+
+    with client.application.app_context():
+        descriptions = {
+            u.file_name: u.description
+            for u in DailyUpload.query.filter(DailyUpload.id.in_([results[0]['upload']['id'], results[2]['upload']['id']]))
+        }
+    assert descriptions == {'one.pdf': 'first', 'screenshot': 'shared'}
+
+
+def test_batch_upload_all_rejected(client, db):
+    headers = student_headers(client, db, 'batch-rejected@example.com')
+    resp = client.post('/student/uploads/batch', headers=headers, content_type='multipart/form-data',
+                       data={'files': [(io.BytesIO(b'nope'), 'a.exe')]})
+    assert resp.status_code == 400
+    assert resp.get_json()['results'][0]['success'] is False
@@ -0,0 +1,82 @@
+import io
+import os
+from backend.blobstore import collect_garbage
+from backend.models import Blob, BlobRef
+from backend.storage import get_storage
+from backend.tests.conftest import auth_headers, create_user
+
+PDF = b'%PDF-1.4 shared content ' * 100
+
+
+def upload(client, headers, name):
+    resp = client.post('/student/uploads', headers=headers, data={'file': (io.BytesIO(PDF), name)},
+                       content_type='multipart/form-data')
+    assert resp.status_code == 200, resp.get_json()
+    return resp.get_json()['upload']['file_url']
+
+
+def test_identical_files_share_one_blob_until_collected(client, db):
+    app = client.application
+    with app.app_context():
+        _, profile_id = create_user(db, 'blobs@example.com')
+        create_user(db, 'blobs-admin@example.com', role='admin')
+    headers = auth_headers(client, 'blobs@example.com')
+
+    first = upload(client, headers, 'notes.pdf')
+    second = upload(client, headers, 'notes-again.pdf')
+    assert first == second
+    assert first.startswith('/uploads/blobs/')
+    resp = client.post('/student/feedback', headers=headers, content_type='multipart/form-data', data={
+        'category': 'Other', 'subject': 'same file', 'message': 'attached', 'rating': '4',
+        'files': (io.BytesIO(PDF), 'attachment.pdf'),
+    })
+    assert resp.status_code == 200, resp.get_json()
+
+    key = first[len('/uploads/'):]
+    with app.app_context():
+        assert Blob.query.filter_by(key=key).count() == 1
+        assert BlobRef.query.filter_by(blob_key=key).count() == 3
+        path = get_storage().local_path(key)
+    assert os.path.exists(path)
+    assert client.get(first).data == PDF
+
+    admin = auth_headers(client, 'blobs-admin@example.com')
+    assert client.delete(f'/admin/students/{profile_id}', headers=admin).status_code == 200
+    with app.app_context():
+        assert BlobRef.query.filter_by(blob_key=key).count() == 0
+        assert collect_garbage(grace_seconds=3600, log=lambda msg: None)['blobs'] == 0
+        assert os.path.exists(path)
+        stats = collect_garbage(grace_seconds=0, log=lambda msg: None)
+        assert stats['blobs'] >= 1
+        assert db.session.get(Blob, key) is None
+    assert not os.path.exists(path)
+
+
+def test_stray_blob_files_are_swept(client, db):
+    app = client.application
+    stray = os.path.join(app.config['UPLOAD_FOLDER'], 'blobs', 'ff', 'ff', 'f' * 64 + '.pdf')
+    os.makedirs(os.path.dirname(stray), exist_ok=True)
+    with open(stray, 'wb') as f:
+        f.write(b'orphan')
+    with app.app_context():
+        assert collect_garbage(grace_seconds=3600, log=lambda msg: None)['stray_files'] == 0
+        assert collect_garbage(grace_seconds=0, dry_run=True, log=lambda msg: None)['stray_files'] == 1
+        assert os.path.exists(stray)
+        assert collect_garbage(grace_seconds=0, log=lambda msg: None)['stray_files'] == 1
+    assert not os.path.exists(stray)
+
+
+def test_rejected_feedback_attachment_stores_nothing(client, db):
+    import hashlib
+    from backend.blobstore import blob_key
+    content = b'%PDF-1.4 accepted before a rejected file ' * 50
+    with client.application.app_context():
+        create_user(db, 'blobs-reject@example.com')
+    headers = auth_headers(client, 'blobs-reject@example.com')
+    resp = client.post('/student/feedback', headers=headers, content_type='multipart/form-data', data={
+        'category': 'Other', 'subject': 'mixed', 'message': 'attached', 'rating': '4',
+        'files': [(io.BytesIO(content), 'good.pdf'), (io.BytesIO(b'MZ\x90\x00'), 'tool.exe')],
+    })
+    assert resp.status_code == 400
+    key = blob_key(hashlib.sha256(content).hexdigest(), 'good.pdf')
+    assert not get_storage().exists(key)
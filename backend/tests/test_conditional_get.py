@@ -0,0 +1,62 @@
+from backend.models import DailyUpload
+from backend.tests.conftest import auth_headers, create_user
+
+
+def revalidate(client, url, headers):
+    first = client.get(url, headers=headers)
+    assert first.status_code == 200
+    etag = first.headers['ETag']
+    assert first.headers['Cache-Control'] == 'private, no-cache'
+    again = client.get(url, headers={**headers, 'If-None-Match': etag})
+    return etag, again
+
+
+def test_student_lists_and_profile_return_304_until_changed(client, db):
+    with client.application.app_context():
+        user_id, _ = create_user(db, 'etag-student@example.com')
+        db.session.add(DailyUpload(user_id=user_id, file_name='a.pdf', file_url='/uploads/a.pdf'))
+        db.session.commit()
+    headers = auth_headers(client, 'etag-student@example.com')
+
+    for url in ('/student/uploads', '/student/feedback', '/student/profile'):
+        etag, again = revalidate(client, url, headers)
+        assert again.status_code == 304, url
+        assert again.data == b''
+        assert again.headers['ETag'] == etag
+
+    etag, _ = revalidate(client, '/student/uploads', headers)
+    with client.application.app_context():
+        db.session.add(DailyUpload(user_id=user_id, file_name='b.pdf', file_url='/uploads/b.pdf'))
+        db.session.commit()
+    resp = client.get('/student/uploads', headers={**headers, 'If-None-Match': etag})
+    assert resp.status_code == 200
+    assert len(resp.get_json()) == 2
+
+    etag, _ = revalidate(client, '/student/profile', headers)
+    client.put('/student/profile', headers=headers, json={'fullName': 'Changed'})
+    resp = client.get('/student/profile', headers={**headers, 'If-None-Match': etag})
+    assert resp.status_code == 200
+    assert resp.get_json()['full_name'] == 'Changed'
+
+
+def test_admin_lists_tag_each_page_and_track_reviews(client, db):
+    with client.application.app_context():
+        create_user(db, 'etag-admin@example.com', role='admin')
+        user_id, _ = create_user(db, 'etag-reviewed@example.com')
+        upload = DailyUpload(user_id=user_id, file_name='r.pdf', file_url='/uploads/r.pdf')
+        db.session.add(upload)
+        db.session.commit()
+        upload_id = upload.id
+    headers = auth_headers(client, 'etag-admin@example.com')
+
+    for url in ('/admin/students', '/admin/uploads', '/admin/feedback'):
+        _, again = revalidate(client, url, headers)
+        assert again.status_code == 304, url
+
+    etag, _ = revalidate(client, '/admin/uploads', headers)
+    other_page = client.get('/admin/uploads?limit=1', headers={**headers, 'If-None-Match': etag})
+    assert other_page.status_code == 200
+
+    client.post(f'/admin/uploads/{upload_id}/status', headers=headers, json={'status': 'approved'})
+    resp = client.get('/admin/uploads', headers={**headers, 'If-None-Match': etag})
+    assert resp.status_code == 200
@@ -0,0 +1,114 @@
+import base64
+import hashlib
+import io
+from urllib.parse import quote
+from backend.avatars import extract_data_uri_avatars
+from backend.blobstore import blob_key, collect_garbage
+from backend.models import Profile, BlobRef
+from backend.storage import get_storage
+from backend.tests.conftest import auth_headers, create_user
+
+PNG = b'\x89PNG\r\n\x1a\n' + b'1' * 2048
+DATA_URI = 'data:image/png;base64,' + base64.b64encode(PNG).decode('ascii')
+
+
+def test_profile_put_stores_data_uri_avatar_as_file(client, db):
+    app = client.application
+    with app.app_context():
+        _, profile_id = create_user(db, 'datauri@example.com')
+    headers = auth_headers(client, 'datauri@example.com')
+
+    resp = client.put('/student/profile', json={'avatarUrl': DATA_URI}, headers=headers)
+    assert resp.status_code == 200, resp.get_json()
+    avatar_url = client.get('/student/profile', headers=headers).get_json()['avatar_url']
+    assert avatar_url.startswith('/uploads/blobs/') and avatar_url.endswith('.png')
+    assert client.get(avatar_url).data == PNG
+    with app.app_context():
+        assert BlobRef.query.filter_by(owner_type='avatar', owner_id=profile_id).count() == 1
+
+    bad = client.put('/student/profile', json={'avatarUrl': 'data:image/png;base64,bm90IGFuIGltYWdl'},
+                     headers=headers)
+    assert bad.status_code == 400
+    svg = 'data:image/svg+xml,' + quote('<svg xmlns="http://www.w3.org/2000/svg"><script>alert(1)</script></svg>')
+    assert client.put('/student/profile', json={'avatarUrl': svg}, headers=headers).status_code == 400
+    assert client.get('/student/profile', headers=headers).get_json()['avatar_url'] == avatar_url
+
+    # switching to a plain URL releases the stored avatar
+    assert client.put('/student/profile', json={'avatarUrl': 'https://example.com/a.png'},
+                      headers=headers).status_code == 200
+    with app.app_context():
+        assert BlobRef.query.filter_by(owner_type='avatar', owner_id=profile_id).count() == 0
+
+
+def test_resaving_the_same_avatar_keeps_it(client, db):
+    app = client.application
+    with app.app_context():
+        _, profile_id = create_user(db, 'datauri-resave@example.com')
+    headers = auth_headers(client, 'datauri-resave@example.com')
+    png = b'\x89PNG\r\n\x1a\n' + b'resaved' * 300
+    data_uri = 'data:image/png;base64,' + base64.b64encode(png).decode('ascii')
+    assert client.put('/student/profile', json={'avatarUrl': data_uri}, headers=headers).status_code == 200
+    avatar_url = client.get('/student/profile', headers=headers).get_json()['avatar_url']
+
+    # the frontend sends the current avatar back with every profile save
+    resp = client.put('/student/profile', json={'avatarUrl': avatar_url, 'fullName': 'Resaved'}, headers=headers)
+    assert resp.status_code == 200
+    with app.app_context():
+        assert BlobRef.query.filter_by(owner_type='avatar', owner_id=profile_id).count() == 1
+        collect_garbage(grace_seconds=0, log=lambda msg: None)
+    assert client.get(avatar_url).data == png
+
+
+def test_avatar_pointing_at_an_upload_holds_its_own_ref(client, db):
+    app = client.application
+    with app.app_context():
+        _, profile_id = create_user(db, 'datauri-upload@example.com')
+    headers = auth_headers(client, 'datauri-upload@example.com')
+    png = b'\x89PNG\r\n\x1a\n' + b'uploaded' * 300
+    resp = client.post('/student/uploads', headers=headers, data={'file': (io.BytesIO(png), 'me.png')},
+                       content_type='multipart/form-data')
+    url = resp.get_json()['upload']['file_url']
+    assert client.put('/student/profile', json={'avatarUrl': url}, headers=headers).status_code == 200
+    with app.app_context():
+        refs = BlobRef.query.filter_by(owner_type='avatar', owner_id=profile_id).all()
+        assert [ref.blob_key for ref in refs] == [url[len('/uploads/'):]]
+
+
+def test_taken_email_rejects_the_whole_update(client, db):
+    app = client.application
+    with app.app_context():
+        create_user(db, 'datauri-taken@example.com')
+        _, profile_id = create_user(db, 'datauri-mover@example.com')
+    headers = auth_headers(client, 'datauri-mover@example.com')
+    png = b'\x89PNG\r\n\x1a\n' + b'never stored' * 200
+    data_uri = 'data:image/png;base64,' + base64.b64encode(png).decode('ascii')
+    resp = client.put('/student/profile', json={'avatarUrl': data_uri, 'email': 'datauri-taken@example.com'},
+                      headers=headers)
+    assert resp.status_code == 409
+    with app.app_context():
+        assert BlobRef.query.filter_by(owner_type='avatar', owner_id=profile_id).count() == 0
+        assert not get_storage().exists(blob_key(hashlib.sha256(png).hexdigest(), 'avatar.png'))
+        assert db.session.get(Profile, profile_id).avatar_url is None
+
+
+def test_extract_existing_data_uri_avatars(client, db):
+    app = client.application
+    with app.app_context():
+        _, first = create_user(db, 'datauri-old1@example.com', avatar_url=DATA_URI)
+        _, second = create_user(db, 'datauri-old2@example.com', avatar_url=DATA_URI)
+        _, broken = create_user(db, 'datauri-old3@example.com', avatar_url='data:text/plain,hello')
+
+        preview = extract_data_uri_avatars(dry_run=True, log=lambda msg: None)
+        assert preview['profiles'] >= 2
+        assert db.session.get(Profile, first).avatar_url == DATA_URI
+
+        stats = extract_data_uri_avatars(batch_size=1, log=lambda msg: None)
+        assert stats['profiles'] >= 2 and stats['invalid'] >= 1
+        assert stats['bytes_after'] < stats['bytes_before']
+        url = db.session.get(Profile, first).avatar_url
+        assert url.startswith('/uploads/blobs/')
+        # identical images share one blob
+        assert db.session.get(Profile, second).avatar_url == url
+        assert db.session.get(Profile, broken).avatar_url == 'data:text/plain,hello'
+        assert extract_data_uri_avatars(log=lambda msg: None)['profiles'] == 0
+    assert client.get(url).data == PNG
@@ -73,24 +73,19 @@ def test_feedback_success_and_get(client, db):
     assert any(e.get('rating') == 4.5 for e in entries)
 
 
-def test_admin_students_avatar_normalization(client, db, tmp_path):
-    # Create an admin user directly in DB with an avatar that is an absolute path inside UPLOAD_FOLDER
+def test_admin_students_avatar_normalization(client, db):
+    # A legacy avatar stored as an absolute path inside UPLOAD_FOLDER is rewritten by migration 11
+    from backend.migrations import MigrationContext, _canonical_file_urls
     app = client.application
     with app.app_context():
         uploads_root = app.config['UPLOAD_FOLDER']
-        # create a dummy file
-        p = tmp_path / 'avatar.png'
-        p.write_bytes(b'PNGDATA')
-        abs_path = str(p)
-
-        # Copy file into uploads_root and set avatar_url to the absolute path
-        import shutil
         dest = os.path.join(uploads_root, 'avatars')
         os.makedirs(dest, exist_ok=True)
         dest_path = os.path.join(dest, 'avatar.png')
-        shutil.copy(p, dest_path)
+        with open(dest_path, 'wb') as fh:
+            fh.write(b'PNGDATA')
 
-        # Create admin user
+        # Create admin user with the pre-migration absolute path
         admin_user = User(email='admin@example.com', password_hash=hash_password('adminpw'), role='admin')
         db.session.add(admin_user)
         db.session.flush()
@@ -98,6 +93,10 @@ def test_admin_students_avatar_normalization(client, db, tmp_path):
         db.session.add(profile)
         db.session.commit()
 
+        with db.engine.connect() as conn:
+            _canonical_file_urls(MigrationContext(conn, batch_pause=0, log=lambda msg: None))
+            conn.commit()
+
     # Login as admin
     resp = client.post('/auth/login', json={'email': 'admin@example.com', 'password': 'adminpw'})
     assert resp.status_code == 200
@@ -111,7 +110,73 @@ def test_admin_students_avatar_normalization(client, db, tmp_path):
     # find our admin profile
     found = [s for s in students if s.get('email') == 'admin@example.com']
     assert len(found) == 1
-    avatar_url = found[0].get('avatar_url')
-    assert avatar_url is not None
     # Should be a /uploads/ relative URL (not absolute path)
-    assert avatar_url.startswith('/uploads/')
+    assert found[0].get('avatar_url') == '/uploads/avatars/avatar.png'
+
+
+def test_profile_put_canonicalizes_legacy_avatar_paths(client, db):
+    register_and_activate(client, db, email='avput@example.com')
+    token = login(client, email='avput@example.com')
+    headers = {'Authorization': f'Bearer {token}'}
+    root = client.application.config['UPLOAD_FOLDER']
+    for given in (os.path.join(root, 'avatars', 'put.png'), 'avatars\\put.png'):
+        resp = client.put('/student/profile', json={'avatarUrl': given}, headers=headers)
+        assert resp.status_code == 200
+        with client.application.app_context():
+            user = User.query.filter_by(email='avput@example.com').first()
+            assert Profile.query.filter_by(user_id=user.id).first().avatar_url == '/uploads/avatars/put.png'
+
+
+def test_admin_feedback_list_filters_and_cursor(client, db, monkeypatch):
+    from datetime import datetime, timedelta
+    app = client.application
+    with app.app_context():
+        admin = User(email='fb-admin@example.com', password_hash=hash_password('adminpw'), role='admin')
+        student = User(email='fb-student@example.com', password_hash=hash_password('pw'))
+        db.session.add_all([admin, student])
+        db.session.flush()
+        db.session.add(Profile(user_id=student.id, full_name='Feedback Student', email=student.email, status='active'))
+        base = datetime(2031, 3, 1)
+        for i in range(4):
+            db.session.add(Feedback(
+                user_id=student.id,
+                category='Mentor' if i % 2 else 'Support',
+                subject=f's{i}',
+                message='m',
+                rating=4.5,
+                attachments=json.dumps([f'/uploads/x/{i}.png']) if i == 3 else None,
+                created_at=base + timedelta(days=i),
+            ))
+        db.session.commit()
+
+    resp = client.post('/auth/login', json={'email': 'fb-admin@example.com', 'password': 'adminpw'})
+    headers = {'Authorization': f"Bearer {resp.get_json()['access_token']}"}
+
+    subjects = []
+    after = None
+    while True:
+        url = '/admin/feedback?start=2031-03-01&end=2031-03-31&limit=3'
+        if after:
+            url += f'&after={after}'
+        resp = client.get(url, headers=headers)
+        assert resp.status_code == 200
+        page = resp.get_json()
+        subjects.extend(f['subject'] for f in page)
+        after = resp.headers.get('X-Next-Cursor')
+        if not after:
+            break
+    assert subjects == ['s3', 's2', 's1', 's0']
+
+    resp = client.get('/admin/feedback?start=2031-03-01&category=Mentor&rating=4.5', headers=headers)
+    entries = resp.get_json()
+    assert [f['subject'] for f in entries] == ['s3', 's1']
+    assert entries[0]['student_name'] == 'Feedback Student'
+    assert entries[0]['student_email'] == 'fb-student@example.com'
+    assert entries[0]['attachments'] == ['/uploads/x/3.png']
+
+    # clients that do not page are capped, with the rest behind the cursor
+    from backend import pagination
+    monkeypatch.setattr(pagination, 'UNPAGED_LIMIT', 2)
+    resp = client.get('/admin/feedback?start=2031-03-01&end=2031-03-31', headers=headers)
+    assert [f['subject'] for f in resp.get_json()] == ['s3', 's2']
+    assert resp.headers['X-Next-Cursor']
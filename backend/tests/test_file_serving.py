@@ -0,0 +1,91 @@
+import os
+from backend.models import DailyUpload
+from backend.tests.conftest import auth_headers, create_user
+
+CONTENT = bytes(range(256)) * 40  # 10240 bytes
+
+
+def write_upload(app, rel_path, data=CONTENT):
+    full = os.path.join(app.config['UPLOAD_FOLDER'], *rel_path.split('/'))
+    os.makedirs(os.path.dirname(full), exist_ok=True)
+    with open(full, 'wb') as f:
+        f.write(data)
+    return full
+
+
+def test_serve_upload_validators_and_ranges(client):
+    write_upload(client.application, 'serve/report.pdf')
+    resp = client.get('/uploads/serve/report.pdf')
+    assert resp.status_code == 200
+    assert resp.data == CONTENT
+    assert resp.headers['Accept-Ranges'] == 'bytes'
+    assert resp.headers['Cache-Control'] == 'public, no-cache'
+    etag = resp.headers['ETag']
+    assert not etag.startswith('W/')
+
+    assert client.get('/uploads/serve/report.pdf', headers={'If-None-Match': etag}).status_code == 304
+
+    resp = client.get('/uploads/serve/report.pdf', headers={'Range': 'bytes=100-199'})
+    assert resp.status_code == 206
+    assert resp.headers['Content-Range'] == 'bytes 100-199/10240'
+    assert resp.data == CONTENT[100:200]
+
+    resp = client.get('/uploads/serve/report.pdf', headers={'Range': 'bytes=-10'})
+    assert resp.data == CONTENT[-10:]
+
+    resp = client.get('/uploads/serve/report.pdf', headers={'Range': 'bytes=0-9,20-29'})
+    assert resp.status_code == 206
+    assert resp.mimetype == 'multipart/byteranges'
+    assert int(resp.headers['Content-Length']) == len(resp.data)
+    assert b'Content-Range: bytes 0-9/10240' in resp.data
+    assert b'Content-Range: bytes 20-29/10240' in resp.data
+    assert CONTENT[20:30] in resp.data
+
+    resp = client.get('/uploads/serve/report.pdf', headers={'Range': 'bytes=20000-'})
+    assert resp.status_code == 416
+    assert resp.headers['Content-Range'] == 'bytes */10240'
+
+    # a stale If-Range falls back to the full body
+    resp = client.get('/uploads/serve/report.pdf', headers={'Range': 'bytes=0-9', 'If-Range': '"stale"'})
+    assert resp.status_code == 200
+    assert len(resp.data) == len(CONTENT)
+
+
+def test_content_addressed_paths_are_immutable(client):
+    name = 'ab' * 32 + '.png'
+    write_upload(client.application, f'blobs/{name}')
+    resp = client.get(f'/uploads/blobs/{name}')
+    assert resp.headers['Cache-Control'] == 'public, max-age=31536000, immutable'
+    assert client.get('/uploads/../etc/passwd').status_code == 404
+
+
+def test_offload_sends_headers_only(client):
+    app = client.application
+    write_upload(app, 'serve/offload.pdf')
+    app.config.update(FILE_OFFLOAD='x-accel-redirect')
+    try:
+        resp = client.get('/uploads/serve/offload.pdf')
+        assert resp.headers['X-Accel-Redirect'] == '/protected-uploads/serve/offload.pdf'
+        assert resp.data == b''
+        app.config.update(FILE_OFFLOAD='x-sendfile')
+        resp = client.get('/uploads/serve/offload.pdf')
+        assert resp.headers['X-Sendfile'].endswith(os.path.join('serve', 'offload.pdf'))
+    finally:
+        app.config.update(FILE_OFFLOAD='')
+
+
+def test_download_upload_is_private_attachment(client, db):
+    app = client.application
+    with app.app_context():
+        user_id, _ = create_user(db, 'download@example.com')
+        upload = DailyUpload(user_id=user_id, file_name='My Report.pdf', file_url='/uploads/serve/dl.pdf')
+        db.session.add(upload)
+        db.session.commit()
+        upload_id = upload.id
+    write_upload(app, 'serve/dl.pdf')
+    headers = auth_headers(client, 'download@example.com')
+    resp = client.get(f'/student/uploads/{upload_id}/download', headers={**headers, 'Range': 'bytes=0-3'})
+    assert resp.status_code == 206
+    assert resp.data == CONTENT[:4]
+    assert resp.headers['Cache-Control'] == 'private, no-cache'
+    assert resp.headers['Content-Disposition'] == "attachment; filename*=UTF-8''My%20Report.pdf"
@@ -0,0 +1,69 @@
+from sqlalchemy import event
+from backend.cache import IdentityCache, identity_cache
+from backend.db import db as _db
+from backend.models import Profile
+from backend.tests.conftest import auth_headers, create_user
+
+
+def test_lru_eviction_and_ttl():
+    cache = IdentityCache(maxsize=2, ttl=60)
+    loads = []
+
+    def loader(key):
+        loads.append(key)
+        return key.upper()
+
+    assert cache.get('a', loader) == 'A'
+    assert cache.get('b', loader) == 'B'
+    assert cache.get('a', loader) == 'A'  # hit, 'b' becomes least recent
+    cache.get('c', loader)
+    assert cache.get('a', loader) == 'A'
+    cache.get('b', loader)
+    assert loads == ['a', 'b', 'c', 'b']
+    stats = cache.stats()
+    assert stats['hits'] == 2 and stats['misses'] == 4 and stats['evictions'] == 2
+
+    cache.configure(ttl=0)
+    cache.get('a', loader)
+    cache.get('a', loader)
+    assert loads[-2:] == ['a', 'a']
+
+
+def test_profile_reads_are_cached_and_invalidated_on_update(client, db):
+    with client.application.app_context():
+        create_user(db, 'cached@example.com', full_name='Cached Student')
+        engine = _db.engine
+    headers = auth_headers(client, 'cached@example.com')
+    assert client.get('/student/profile', headers=headers).status_code == 200
+
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        before = identity_cache.stats()['hits']
+        assert client.get('/auth/me', headers=headers).get_json()['user']['email'] == 'cached@example.com'
+        resp = client.get('/student/profile', headers=headers)
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+    assert resp.get_json()['full_name'] == 'Cached Student'
+    assert identity_cache.stats()['hits'] == before + 2
+    assert not any('FROM users' in s or 'FROM profiles' in s for s in statements)
+
+    resp = client.put('/student/profile', headers=headers, json={'fullName': 'Renamed Student'})
+    assert resp.status_code == 200
+    assert client.get('/student/profile', headers=headers).get_json()['full_name'] == 'Renamed Student'
+
+
+def test_bulk_update_clears_cache(client, db):
+    with client.application.app_context():
+        user_id, _ = create_user(db, 'cached-bulk@example.com')
+        client.get('/student/profile', headers=auth_headers(client, 'cached-bulk@example.com'))
+        db.session.query(Profile).filter(Profile.user_id == user_id).update(
+            {Profile.full_name: 'Bulk Renamed'}, synchronize_session=False
+        )
+        db.session.commit()
+    headers = auth_headers(client, 'cached-bulk@example.com')
+    assert client.get('/student/profile', headers=headers).get_json()['full_name'] == 'Bulk Renamed'
@@ -0,0 +1,79 @@
+import io
+import pytest
+from datetime import datetime
+from backend.jobs import run_pending
+from backend.models import ImageVariant
+from backend.storage import get_storage
+from backend.tests.conftest import auth_headers, create_user
+from backend.variants import variant_key, build_variants
+
+PNG = b'\x89PNG\r\n\x1a\n' + b'0' * 1024
+
+
+def upload(client, headers, data, name):
+    resp = client.post('/student/uploads', headers=headers, data={'file': (io.BytesIO(data), name)},
+                       content_type='multipart/form-data')
+    assert resp.status_code == 200, resp.get_json()
+    return resp.get_json()['upload']
+
+
+def test_variant_urls_are_listed_once_generated(client, db):
+    app = client.application
+    with app.app_context():
+        create_user(db, 'variants@example.com')
+        create_user(db, 'variants-admin@example.com', role='admin')
+    headers = auth_headers(client, 'variants@example.com')
+    admin = auth_headers(client, 'variants-admin@example.com')
+
+    uploaded = upload(client, headers, PNG, 'avatar.png')
+    url = uploaded['file_url']
+    assert client.put('/student/profile', json={'avatarUrl': url}, headers=headers).status_code == 200
+    listing = client.get('/student/uploads', headers=headers)
+    assert [u['variants'] for u in listing.get_json() if u['id'] == uploaded['id']] == [{}]
+
+    # what the background job records once the thumbnail is written
+    source = url[len('/uploads/'):]
+    thumb = variant_key(source, 'thumb', 'WEBP')
+    with app.app_context():
+        get_storage().put_bytes(thumb, b'RIFF....WEBP')
+        db.session.add(ImageVariant(source_key=source, name='thumb', key=thumb, width=96, height=96, size=12,
+                                    created_at=datetime.utcnow()))
+        db.session.commit()
+
+    resp = client.get('/student/uploads', headers={**headers, 'If-None-Match': listing.headers['ETag']})
+    assert resp.status_code == 200
+    assert [u['variants'] for u in resp.get_json() if u['id'] == uploaded['id']] == [{'thumb': f'/uploads/{thumb}'}]
+    assert client.get('/student/profile', headers=headers).get_json()['avatar_variants'] == {
+        'thumb': f'/uploads/{thumb}'
+    }
+    students = client.get('/admin/students', headers=admin).get_json()
+    assert [s['avatar_variants'] for s in students if s['email'] == 'variants@example.com'] == [
+        {'thumb': f'/uploads/{thumb}'}
+    ]
+
+    resp = client.get(f'/uploads/{thumb}')
+    assert resp.status_code == 200
+    assert 'immutable' in resp.headers['Cache-Control']
+
+
+def test_build_variants_writes_bounded_copies(client, db):
+    Image = pytest.importorskip('PIL.Image')
+    app = client.application
+    with app.app_context():
+        create_user(db, 'variants-build@example.com')
+    headers = auth_headers(client, 'variants-build@example.com')
+    out = io.BytesIO()
+    Image.new('RGB', (1200, 800), (200, 30, 30)).save(out, format='PNG')
+
+    url = upload(client, headers, out.getvalue(), 'photo.png')['file_url']
+    source = url[len('/uploads/'):]
+    with app.app_context():
+        # the upload queued the work; nothing is decoded in the request
+        assert not ImageVariant.query.filter_by(source_key=source).count()
+        assert run_pending(types=['build_variants']) == 1
+        rows = {v.name: v for v in ImageVariant.query.filter_by(source_key=source)}
+        assert set(rows) == set(app.config['IMAGE_VARIANTS'])
+        assert max(rows['thumb'].width, rows['thumb'].height) == app.config['IMAGE_VARIANTS']['thumb']
+        assert get_storage().exists(rows['thumb'].key)
+        # already complete: nothing to do
+        assert build_variants(source) == 0
@@ -0,0 +1,12 @@
+from backend.indexes import ensure_indexes, explain_route_queries
+
+
+def test_route_queries_use_declared_indexes(app):
+    with app.app_context():
+        # create_all in the fixture already built every declared index
+        assert ensure_indexes(dry_run=True) == []
+        for route, plan in explain_route_queries().items():
+            steps = [d for d in plan if d.startswith(('SCAN', 'SEARCH'))]
+            # every table access, correlated subqueries included, goes through an index
+            assert steps and all('INDEX' in d for d in steps), (route, plan)
+            assert not any('TEMP B-TREE' in d for d in plan), (route, plan)
@@ -0,0 +1,142 @@
+import io
+import json
+import os
+from backend.jobs import claim, enqueue, job_handler, run_job, run_pending
+from backend.models import DailyUpload, Job
+from backend.storage import LocalStorage, get_storage, init_storage
+from backend.tests.conftest import auth_headers, create_user
+
+calls = []
+
+
+@job_handler('test_flaky', max_attempts=3)
+def flaky(fail_times, name):
+    calls.append(name)
+    if calls.count(name) <= fail_times:
+        raise RuntimeError(f'{name} attempt {calls.count(name)} failed')
+
+
+@job_handler('test_limited', concurrency=1)
+def limited():
+    pass
+
+
+class RemoteLocalStorage(LocalStorage):
+    """Local files, treated like a remote backend."""
+    remote = True
+
+
+def test_failed_jobs_retry_then_fail(app, db):
+    app.config['JOB_RETRY_BASE_DELAY'] = 0
+    try:
+        recovers = enqueue('test_flaky', {'fail_times': 1, 'name': 'recovers'}).id
+        gives_up = enqueue('test_flaky', {'fail_times': 5, 'name': 'gives-up'}).id
+        db.session.commit()
+        assert run_pending(types=['test_flaky']) == 5
+    finally:
+        app.config['JOB_RETRY_BASE_DELAY'] = 10.0
+
+    done = db.session.get(Job, recovers)
+    assert (done.status, done.attempts, done.last_error) == ('done', 2, None)
+    failed = db.session.get(Job, gives_up)
+    assert (failed.status, failed.attempts) == ('failed', 3)
+    assert failed.last_error == 'RuntimeError: gives-up attempt 3 failed'
+
+
+def test_retry_is_delayed(app, db):
+    job_id = enqueue('test_flaky', {'fail_times': 1, 'name': 'delayed'}).id
+    db.session.commit()
+    assert run_pending(types=['test_flaky']) == 1
+    job = db.session.get(Job, job_id)
+    assert job.status == 'queued' and job.run_at > job.created_at
+    # not due yet
+    assert run_pending(types=['test_flaky']) == 0
+
+
+def test_concurrency_limit_per_type(app, db):
+    enqueue('test_limited')
+    enqueue('test_limited')
+    db.session.commit()
+    first = claim('worker-a', ['test_limited'])
+    assert first is not None
+    assert claim('worker-b', ['test_limited']) is None
+
+    app.config['JOB_CONCURRENCY'] = {'test_limited': 2}
+    try:
+        second = claim('worker-b', ['test_limited'])
+    finally:
+        app.config['JOB_CONCURRENCY'] = {}
+    assert second is not None
+    assert run_job('worker-a', *first) and run_job('worker-b', *second)
+    assert claim('worker-a', ['test_limited']) is None
+
+
+def test_expired_lease_is_claimed_again(app, db):
+    job_id = enqueue('test_limited').id
+    db.session.commit()
+    assert claim('crashed', ['test_limited'])[0] == job_id
+    app.config['JOB_LEASE_SECONDS'] = -1
+    try:
+        claimed = claim('rescuer', ['test_limited'])
+    finally:
+        app.config['JOB_LEASE_SECONDS'] = 300
+    assert claimed[0] == job_id
+    assert db.session.get(Job, job_id).attempts == 2
+    assert run_job('rescuer', *claimed)
+
+
+def test_delete_student_queues_file_removal(client, db):
+    user_id, profile_id = create_user(db, 'jobs-delete@example.com')
+    create_user(db, 'jobs-admin@example.com', role='admin')
+    storage = get_storage()
+    storage.put_bytes(f'{user_id}/legacy.pdf', b'%PDF-1.4 legacy')
+    db.session.add(DailyUpload(user_id=user_id, file_name='legacy.pdf', file_url=f'/uploads/{user_id}/legacy.pdf'))
+    db.session.commit()
+
+    resp = client.delete(f'/admin/students/{profile_id}', headers=auth_headers(client, 'jobs-admin@example.com'))
+    assert resp.status_code == 200
+    assert storage.exists(f'{user_id}/legacy.pdf')
+    assert Job.query.filter_by(type='delete_objects', status='queued').count() >= 1
+
+    assert run_pending(types=['delete_objects']) >= 1
+    assert not storage.exists(f'{user_id}/legacy.pdf')
+
+
+def test_forgot_username_queues_email(client, db):
+    create_user(db, 'jobs-forgot@example.com', username='jobs-forgot')
+    resp = client.post('/auth/forgot-username', json={'email': 'jobs-forgot@example.com'})
+    assert resp.status_code == 200
+    job = Job.query.filter_by(type='send_email').filter(Job.payload.like('%jobs-forgot@example.com%')).one()
+    assert 'jobs-forgot' in job.payload
+    # unknown addresses get the same answer and queue nothing
+    resp = client.post('/auth/forgot-username', json={'email': 'nobody@example.com'})
+    assert resp.status_code == 200
+    assert Job.query.filter(Job.payload.like('%nobody@example.com%')).count() == 0
+
+    run_pending(types=['send_email'])
+    db.session.expire_all()
+    assert db.session.get(Job, job.id).status == 'done'
+
+
+def test_remote_feedback_attachments_are_stored_by_a_job(client, db):
+    app = client.application
+    create_user(db, 'jobs-feedback@example.com')
+    headers = auth_headers(client, 'jobs-feedback@example.com')
+    previous = get_storage()
+    init_storage(app, RemoteLocalStorage(app.config['UPLOAD_FOLDER']))
+    try:
+        resp = client.post('/student/feedback', headers=headers, content_type='multipart/form-data', data={
+            'category': 'general', 'subject': 'Deferred', 'message': 'attachment', 'rating': '4',
+            'files': (io.BytesIO(b'%PDF-1.4 deferred attachment'), 'notes.pdf'),
+        })
+        assert resp.status_code == 200, resp.get_json()
+        job = Job.query.filter_by(type='store_blob', status='queued').one()
+        url = [u for u in client.get('/student/feedback', headers=headers).get_json()
+               if u['subject'] == 'Deferred'][0]['attachments'][0]
+        assert client.get(url).status_code == 404
+
+        assert run_pending(types=['store_blob']) == 1
+        assert client.get(url).data == b'%PDF-1.4 deferred attachment'
+        assert not os.path.exists(json.loads(job.payload)['path'])
+    finally:
+        init_storage(app, previous)
@@ -0,0 +1,82 @@
+from sqlalchemy import create_engine, inspect
+from backend.migrations import MIGRATIONS, foreign_key_violations, upgrade
+
+
+def test_upgrade_legacy_database(app, tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with engine.begin() as conn:
+        # profiles as created before the course/city columns existed
+        conn.exec_driver_sql(
+            'CREATE TABLE profiles (id VARCHAR PRIMARY KEY, user_id VARCHAR NOT NULL, username VARCHAR, '
+            'full_name VARCHAR NOT NULL, email VARCHAR NOT NULL, contact_number VARCHAR, college_name VARCHAR, '
+            'college_id VARCHAR, college_email VARCHAR, status VARCHAR, avatar_url VARCHAR, '
+            'created_at DATETIME, updated_at DATETIME)'
+        )
+        for i in range(3):
+            conn.exec_driver_sql(
+                "INSERT INTO profiles (id, user_id, full_name, email, updated_at) "
+                f"VALUES ('p{i}', 'u{i}', 'Legacy', 'l{i}@example.com', '2024-01-0{i + 1} 00:00:00.000000')"
+            )
+
+    with app.app_context():
+        dry = upgrade(engine=engine, dry_run=True, log=lambda msg: None)
+        assert dry == [m[0] for m in MIGRATIONS]
+        assert not inspect(engine).has_table('schema_migrations')
+
+        applied = upgrade(engine=engine, batch_size=2, batch_pause=0, log=lambda msg: None)
+        assert applied == [m[0] for m in MIGRATIONS]
+        assert upgrade(engine=engine, log=lambda msg: None) == []
+
+    inspector = inspect(engine)
+    columns = {c['name'] for c in inspector.get_columns('profiles')}
+    assert {'course_name', 'course_mode', 'course_duration', 'city', 'pincode'} <= columns
+    assert 'ix_profiles_user_id' in {ix['name'] for ix in inspector.get_indexes('profiles')}
+    assert inspector.has_table('daily_uploads')
+    with engine.connect() as conn:
+        rows = conn.exec_driver_sql('SELECT created_at, updated_at FROM profiles').fetchall()
+    assert all(created == updated for created, updated in rows)
+
+
+def test_upgrade_canonicalizes_stored_urls(app, tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'urls.db'}")
+    root = app.config['UPLOAD_FOLDER']
+    avatars = {
+        'p0': (f'{root}/u0/1_a.png', '/uploads/u0/1_a.png'),
+        'p1': ('u1\\2_b.png', '/uploads/u1/2_b.png'),
+        'p2': ('/uploads/u2/3_c.png', '/uploads/u2/3_c.png'),
+        'p3': ('https://cdn.example.com/d.png', 'https://cdn.example.com/d.png'),
+        'p4': ('data:image/png;base64,AAAA', 'data:image/png;base64,AAAA'),
+        'p5': ('/elsewhere/e.png', '/elsewhere/e.png'),
+    }
+    with engine.begin() as conn:
+        conn.exec_driver_sql(
+            'CREATE TABLE profiles (id VARCHAR PRIMARY KEY, user_id VARCHAR NOT NULL, username VARCHAR, '
+            'full_name VARCHAR NOT NULL, email VARCHAR NOT NULL, contact_number VARCHAR, college_name VARCHAR, '
+            'college_id VARCHAR, college_email VARCHAR, status VARCHAR, avatar_url VARCHAR, '
+            'created_at DATETIME, updated_at DATETIME)'
+        )
+        for pid, (stored, _) in avatars.items():
+            conn.exec_driver_sql(
+                "INSERT INTO profiles (id, user_id, full_name, email, avatar_url) VALUES (?, ?, 'Legacy', ?, ?)",
+                (pid, f'u{pid}', f'{pid}@example.com', stored),
+            )
+
+    with app.app_context():
+        upgrade(engine=engine, batch_size=2, batch_pause=0, log=lambda msg: None)
+
+    with engine.connect() as conn:
+        rows = dict(conn.exec_driver_sql('SELECT id, avatar_url FROM profiles').fetchall())
+    assert rows == {pid: expected for pid, (_, expected) in avatars.items()}
+
+
+def test_foreign_key_violations_are_reported(app, tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'orphans.db'}")
+    with app.app_context():
+        upgrade(engine=engine, batch_pause=0, log=lambda msg: None)
+    with engine.begin() as conn:
+        assert foreign_key_violations(conn) == []
+        # written while enforcement was off: the user no longer exists
+        conn.exec_driver_sql(
+            "INSERT INTO daily_uploads (id, user_id, file_name, file_url) VALUES ('d1', 'gone', 'a.pdf', '/uploads/a.pdf')"
+        )
+        assert foreign_key_violations(conn) == [('daily_uploads', 'users', 1)]
@@ -0,0 +1,41 @@
+import io
+from backend.app import create_app
+from backend.db import db, sync_replica, _recent_writes
+from backend.models import Profile
+
+
+def test_reads_route_to_replica_with_read_your_writes(tmp_path):
+    app = create_app({
+        'TESTING': True,
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'primary.db'}",
+        'SQLALCHEMY_BINDS': {'replica': f"sqlite:///{tmp_path / 'replica.db'}"},
+        'UPLOAD_FOLDER': str(tmp_path / 'uploads'),
+        'JWT_SECRET_KEY': 'test-secret',
+        'READ_YOUR_WRITES_SECONDS': 60,
+    })
+    client = app.test_client()
+    with app.app_context():
+        db.create_all()
+        sync_replica()
+
+    client.post('/auth/signup', json={'email': 'replica@example.com', 'password': 'pw', 'full_name': 'Replica User'})
+    with app.app_context():
+        Profile.query.filter_by(email='replica@example.com').update({'status': 'active'})
+        db.session.commit()
+    token = client.post('/auth/login', json={'email': 'replica@example.com', 'password': 'pw'}).get_json()['access_token']
+    headers = {'Authorization': f'Bearer {token}'}
+
+    data = {'file': (io.BytesIO(b'%PDF-1.4 test'), 'notes.pdf')}
+    resp = client.post('/student/uploads', data=data, headers=headers, content_type='multipart/form-data')
+    assert resp.status_code == 200
+
+    # own write is visible immediately even though the replica is stale
+    assert len(client.get('/student/uploads', headers=headers).get_json()) == 1
+
+    # outside the window reads hit the replica, which has not been synced yet
+    _recent_writes.clear()
+    assert client.get('/student/uploads', headers=headers).get_json() == []
+
+    with app.app_context():
+        sync_replica()
+    assert len(client.get('/student/uploads', headers=headers).get_json()) == 1
@@ -0,0 +1,62 @@
+import hashlib
+import os
+from datetime import datetime, timedelta
+from backend.models import DailyUpload, UploadSession
+from backend.resumable import expire_sessions, part_path
+from backend.tests.conftest import student_headers
+
+
+def test_chunked_upload_resumes_and_completes(client, db):
+    headers = student_headers(client, db, 'resumable@example.com')
+    payload = os.urandom(300 * 1024)
+    resp = client.post('/student/uploads/sessions', headers=headers, json={
+        'fileName': 'thesis.pdf', 'fileType': 'application/pdf', 'fileSize': len(payload), 'description': 'draft',
+    })
+    assert resp.status_code == 201, resp.get_json()
+    session_id = resp.get_json()['session']['id']
+    url = f'/student/uploads/sessions/{session_id}'
+
+    resp = client.put(url, headers={**headers, 'Upload-Offset': '0'}, data=payload[:100 * 1024])
+    assert resp.status_code == 200
+    assert resp.headers['Upload-Offset'] == str(100 * 1024)
+
+    # a retransmitted chunk is refused with the offset to resume from
+    resp = client.put(url, headers={**headers, 'Upload-Offset': '0'}, data=payload[:100 * 1024])
+    assert resp.status_code == 409
+    offset = int(client.get(url, headers=headers).headers['Upload-Offset'])
+    assert offset == 100 * 1024
+
+    assert client.post(f'{url}/complete', headers=headers).status_code == 409
+    resp = client.put(url, headers={**headers, 'Upload-Offset': str(offset)}, data=payload[offset:] + b'extra')
+    assert resp.status_code == 413
+    resp = client.put(url, headers={**headers, 'Upload-Offset': str(offset)}, data=payload[offset:])
+    assert resp.status_code == 200
+
+    resp = client.post(f'{url}/complete', headers=headers)
+    assert resp.status_code == 200, resp.get_json()
+    body = resp.get_json()
+    assert body['upload']['file_url'].startswith('/uploads/blobs/')
+    assert client.get(body['upload']['file_url']).data == payload
+    with client.application.app_context():
+        upload = db.session.get(DailyUpload, body['upload']['id'])
+        assert upload.file_size == len(payload)
+        assert upload.sha256 == hashlib.sha256(payload).hexdigest()
+        assert upload.description == 'draft'
+        assert db.session.get(UploadSession, session_id) is None
+        assert not os.path.exists(part_path(session_id))
+    assert client.get(url, headers=headers).status_code == 404
+
+
+def test_expired_sessions_are_removed(client, db):
+    headers = student_headers(client, db, 'resumable-expire@example.com')
+    resp = client.post('/student/uploads/sessions', headers=headers,
+                       json={'fileName': 'a.pdf', 'fileType': 'application/pdf', 'fileSize': 10})
+    session_id = resp.get_json()['session']['id']
+    with client.application.app_context():
+        db.session.get(UploadSession, session_id).expires_at = datetime.utcnow() - timedelta(seconds=1)
+        db.session.commit()
+    assert client.get(f'/student/uploads/sessions/{session_id}', headers=headers).status_code == 404
+    with client.application.app_context():
+        assert expire_sessions(log=lambda msg: None) >= 1
+        assert db.session.get(UploadSession, session_id) is None
+        assert not os.path.exists(part_path(session_id))
@@ -0,0 +1,50 @@
+import json
+from collections import namedtuple
+from datetime import datetime
+from backend.models import DailyUpload, Feedback
+from backend.serializers import UPLOAD_FIELDS, serialize_upload, serialize_feedback, json_response
+from backend.storage import canonical_url
+
+
+def test_serialize_upload_from_model_and_row(app):
+    created = datetime(2025, 5, 1, 12, 30)
+    upload = DailyUpload(id='u1', user_id='s1', file_name='a.pdf', file_url='/uploads/s1/a.pdf',
+                         status='pending', upload_date=created, created_at=created)
+    Row = namedtuple('Row', UPLOAD_FIELDS)
+    row = Row(**{name: getattr(upload, name) for name in UPLOAD_FIELDS})
+
+    for source in (upload, row):
+        data = serialize_upload(source, 'Student', with_student=True)
+        assert data['file_url'] == '/uploads/s1/a.pdf'
+        assert data['created_at'] == '2025-05-01T12:30:00'
+        assert data['reviewed_at'] is None
+        assert data['student_name'] == 'Student'
+
+    assert serialize_upload(upload, variants={'s1/a.pdf': {'thumb': '/uploads/t.webp'}})['variants'] == {
+        'thumb': '/uploads/t.webp'
+    }
+
+
+def test_canonical_url_forms():
+    root = '/srv/uploads'
+    assert canonical_url('/uploads/s1\\a.pdf', root) == '/uploads/s1/a.pdf'
+    assert canonical_url('/srv/uploads/s1/b.pdf', root) == '/uploads/s1/b.pdf'
+    assert canonical_url('s1/c.pdf', root) == '/uploads/s1/c.pdf'
+    assert canonical_url('C:\\srv\\uploads\\s1\\d.pdf', 'C:\\srv\\uploads') == '/uploads/s1/d.pdf'
+    for unchanged in ('https://cdn.example.com/a.png', 'data:image/png;base64,AA', '/etc/passwd', None, ''):
+        assert canonical_url(unchanged, root) == unchanged
+
+
+def test_serialize_feedback_attachments_and_response(app):
+    fb = Feedback(id='f1', user_id='s1', category='Mentor', subject='s', message='m', rating=4.5,
+                  attachments=json.dumps(['/uploads/x.png']))
+    data = serialize_feedback(fb, 'Name', 'n@example.com', with_student=True)
+    assert data['attachments'] == ['/uploads/x.png']
+    assert data['student_email'] == 'n@example.com'
+    assert serialize_feedback(Feedback(attachments='not json'))['attachments'] == []
+
+    with app.test_request_context():
+        resp = json_response([data], status=201)
+        assert resp.status_code == 201
+        assert resp.mimetype == 'application/json'
+        assert json.loads(resp.get_data()) == [data]
@@ -0,0 +1,179 @@
+import io
+import pytest
+from datetime import datetime, timezone
+from backend.blobstore import migrate_legacy_files, copy_blobs
+from backend.models import Profile, DailyUpload, BlobRef
+from backend.storage import LocalStorage, S3Storage, FallbackStorage, Storage, get_storage
+from backend.tests.conftest import auth_headers, create_user
+
+CONTENT = bytes(range(256)) * 8  # 2048 bytes
+
+
+class ClientError(Exception):
+    def __init__(self, code):
+        super().__init__(code)
+        self.response = {'Error': {'Code': code}}
+
+
+class FakeS3:
+    """The subset of the boto3 S3 client that S3Storage uses, kept in memory."""
+
+    PAGE_SIZE = 2
+
+    def __init__(self):
+        self.objects = {}
+
+    def put_object(self, Bucket, Key, Body):
+        self.objects[(Bucket, Key)] = (bytes(Body), datetime.now(timezone.utc))
+
+    def upload_file(self, Filename, Bucket, Key):
+        with open(Filename, 'rb') as f:
+            self.put_object(Bucket, Key, f.read())
+
+    def _get(self, Bucket, Key):
+        if (Bucket, Key) not in self.objects:
+            raise ClientError('404')
+        return self.objects[(Bucket, Key)]
+
+    def head_object(self, Bucket, Key):
+        data, modified = self._get(Bucket, Key)
+        return {'ContentLength': len(data), 'LastModified': modified, 'ETag': f'"{len(data)}"'}
+
+    def get_object(self, Bucket, Key, Range=None):
+        data, _ = self._get(Bucket, Key)
+        if Range:
+            start, stop = Range[len('bytes='):].split('-')
+            data = data[int(start):int(stop) + 1 if stop else None]
+        return {'Body': io.BytesIO(data)}
+
+    def delete_object(self, Bucket, Key):
+        self.objects.pop((Bucket, Key), None)
+
+    def list_objects_v2(self, Bucket, Prefix='', ContinuationToken=None):
+        keys = sorted(k for b, k in self.objects if b == Bucket and k.startswith(Prefix))
+        start = int(ContinuationToken or 0)
+        page = keys[start:start + self.PAGE_SIZE]
+        result = {'Contents': [
+            {'Key': k, 'Size': len(self.objects[(Bucket, k)][0]), 'LastModified': self.objects[(Bucket, k)][1],
+             'ETag': '"x"'} for k in page
+        ]}
+        if start + self.PAGE_SIZE < len(keys):
+            result.update(IsTruncated=True, NextContinuationToken=str(start + self.PAGE_SIZE))
+        return result
+
+    def generate_presigned_url(self, method, Params, ExpiresIn):
+        return f"https://s3.test/{Params['Bucket']}/{Params['Key']}?expires={ExpiresIn}"
+
+
+def test_local_storage_operations(tmp_path):
+    storage = LocalStorage(str(tmp_path))
+    storage.put_bytes('a/b/file.bin', CONTENT)
+    obj = storage.stat('a/b/file.bin')
+    assert obj.size == len(CONTENT)
+    assert b''.join(storage.stream('a/b/file.bin', 10, 20)) == CONTENT[10:20]
+    assert [o.key for o in storage.iter_objects('a/')] == ['a/b/file.bin']
+    assert storage.stat('.incoming/x') is None
+    storage.delete('a/b/file.bin')
+    assert not storage.exists('a/b/file.bin')
+
+
+def test_s3_storage_operations():
+    client = FakeS3()
+    storage = S3Storage('bucket', prefix='studenthub', client=client)
+    for i in range(3):
+        storage.put_bytes(f'blobs/{i}.bin', CONTENT)
+    assert ('bucket', 'studenthub/blobs/0.bin') in client.objects
+    assert storage.stat('blobs/0.bin').size == len(CONTENT)
+    assert storage.stat('blobs/missing.bin') is None
+    assert b''.join(storage.stream('blobs/0.bin', 100, 200)) == CONTENT[100:200]
+    assert b''.join(storage.stream('blobs/0.bin')) == CONTENT
+    # listing follows continuation tokens
+    assert [o.key for o in storage.iter_objects('blobs/')] == ['blobs/0.bin', 'blobs/1.bin', 'blobs/2.bin']
+    assert storage.presign('blobs/0.bin', 60).startswith('https://s3.test/bucket/studenthub/blobs/0.bin')
+    storage.delete('blobs/0.bin')
+    assert not storage.exists('blobs/0.bin')
+
+
+def test_s3_backend_serves_uploads_with_local_fallback(client, db):
+    app = client.application
+    s3 = S3Storage('bucket', client=FakeS3())
+    local = LocalStorage(app.config['UPLOAD_FOLDER'])
+    local.put_bytes('legacy-user/old.pdf', CONTENT)
+    with app.app_context():
+        create_user(db, 'storage-s3@example.com')
+    headers = auth_headers(client, 'storage-s3@example.com')
+    app.extensions['storage'] = FallbackStorage(s3, local)
+    try:
+        # not copied yet: still served from disk
+        assert client.get('/uploads/legacy-user/old.pdf').data == CONTENT
+
+        resp = client.post('/student/uploads', headers=headers, content_type='multipart/form-data',
+                           data={'file': (io.BytesIO(b'%PDF-1.4 ' + CONTENT), 'remote.pdf')})
+        assert resp.status_code == 200, resp.get_json()
+        url = resp.get_json()['upload']['file_url']
+        key = url[len('/uploads/'):]
+        assert s3.exists(key) and not local.exists(key)
+
+        resp = client.get(url)
+        assert resp.status_code == 302
+        assert resp.headers['Location'].startswith(f'https://s3.test/bucket/{key}')
+
+        app.config['STORAGE_PRESIGN_DOWNLOADS'] = False
+        resp = client.get(url, headers={'Range': 'bytes=0-8'})
+        assert resp.status_code == 206
+        assert resp.data == b'%PDF-1.4 '
+        assert client.get(url).data == b'%PDF-1.4 ' + CONTENT
+    finally:
+        app.config['STORAGE_PRESIGN_DOWNLOADS'] = True
+        app.extensions.pop('storage', None)
+
+
+def test_migrate_legacy_files_rewrites_rows(client, db):
+    app = client.application
+    local = LocalStorage(app.config['UPLOAD_FOLDER'])
+    with app.app_context():
+        user_id, _ = create_user(db, 'storage-legacy@example.com')
+        rel = f'{user_id}/1700000000_report.pdf'
+        local.put_bytes(rel, CONTENT)
+        upload = DailyUpload(user_id=user_id, file_name='report.pdf', file_url=rel, file_type='application/pdf',
+                             file_size=len(CONTENT))
+        db.session.add(upload)
+        missing = DailyUpload(user_id=user_id, file_name='gone.pdf', file_url=f'{user_id}/gone.pdf',
+                              file_type='application/pdf', file_size=1)
+        db.session.add(missing)
+        Profile.query.filter_by(user_id=user_id).update({'avatar_url': f'/uploads/{rel}'})
+        db.session.commit()
+        upload_id = upload.id
+
+        # other tests may have left legacy rows behind
+        preview = migrate_legacy_files(batch_size=1, dry_run=True, log=lambda msg: None)
+        assert preview['uploads'] >= 1 and preview['missing'] >= 1
+        assert db.session.get(DailyUpload, upload_id).file_url == rel
+
+        stats = migrate_legacy_files(batch_size=1, delete_source=True, log=lambda msg: None)
+        assert stats['uploads'] >= 1 and stats['avatars'] >= 1
+        migrated = db.session.get(DailyUpload, upload_id)
+        assert migrated.file_url.startswith('/uploads/blobs/')
+        assert migrated.sha256 and migrated.file_size == len(CONTENT)
+        assert BlobRef.query.filter_by(owner_type='upload', owner_id=upload_id).count() == 1
+        assert Profile.query.filter_by(user_id=user_id).first().avatar_url == migrated.file_url
+        assert not local.exists(rel)
+        # nothing left to do on a second run
+        assert migrate_legacy_files(log=lambda msg: None)['uploads'] == 0
+        key = migrated.file_url[len('/uploads/'):]
+
+        s3 = S3Storage('bucket', client=FakeS3())
+        assert copy_blobs(local, s3, log=lambda msg: None)['copied'] >= 1
+        assert s3.exists(key)
+        assert copy_blobs(local, s3, log=lambda msg: None)['copied'] == 0
+        assert get_storage().exists(key)
+    assert client.get(f'/uploads/{key}').data == CONTENT
+
+
+def test_incomplete_backend_fails_on_construction():
+    class ReadOnlyStorage(Storage):
+        def stat(self, key):
+            return None
+
+    with pytest.raises(TypeError):
+        ReadOnlyStorage()
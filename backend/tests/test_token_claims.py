@@ -0,0 +1,102 @@
+from flask_jwt_extended import decode_token
+from sqlalchemy import event
+from backend.db import db as _db
+from backend.models import User, Profile
+from backend.tests.conftest import auth_headers, create_user
+
+
+def login(client, email):
+    resp = client.post('/auth/login', json={'email': email, 'password': 'pw'})
+    assert resp.status_code == 200
+    return resp.get_json()
+
+
+def test_login_tokens_carry_claims(client, db):
+    with client.application.app_context():
+        create_user(db, 'claims@example.com')
+        data = login(client, 'claims@example.com')
+        claims = decode_token(data['access_token'])
+    assert claims['role'] == 'student'
+    assert 'status' not in claims
+    assert claims['tv'] == 0
+
+
+def test_admin_check_uses_claims_not_database(client, db):
+    with client.application.app_context():
+        create_user(db, 'claims-admin@example.com', role='admin')
+    headers = auth_headers(client, 'claims-admin@example.com')
+    client.get('/admin/feedback/missing', headers=headers)  # warm the token version cache
+
+    statements = []
+    with client.application.app_context():
+        engine = _db.engine
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        resp = client.get('/admin/feedback/missing', headers=headers)
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+    assert resp.status_code == 404
+    assert not any('FROM users' in s for s in statements)
+
+
+def test_suspend_revokes_existing_tokens(client, db):
+    with client.application.app_context():
+        create_user(db, 'claims-admin2@example.com', role='admin')
+        _, profile_id = create_user(db, 'suspend-me@example.com')
+    admin = auth_headers(client, 'claims-admin2@example.com')
+    tokens = login(client, 'suspend-me@example.com')
+    student = {'Authorization': f"Bearer {tokens['access_token']}"}
+    assert client.get('/student/uploads', headers=student).status_code == 200
+
+    resp = client.post(f'/admin/students/{profile_id}/suspend', headers=admin)
+    assert resp.status_code == 200
+    assert client.get('/student/uploads', headers=student).status_code == 401
+    refresh = client.post('/auth/refresh', headers={'Authorization': f"Bearer {tokens['refresh_token']}"})
+    assert refresh.status_code == 401
+
+    # a student token cannot reach admin routes even with a valid signature
+    client.post(f'/admin/students/{profile_id}/activate', headers=admin)
+    student = auth_headers(client, 'suspend-me@example.com')
+    assert client.get('/admin/students', headers=student).status_code == 403
+
+
+def test_feedback_from_deleted_account_is_404(client, db):
+    from flask_jwt_extended import create_access_token
+    with client.application.app_context():
+        create_user(db, 'claims-gone@example.com')
+        user = User.query.filter_by(email='claims-gone@example.com').first()
+        user_id = user.id
+        # issued before version claims existed, so the blocklist does not check it
+        token = create_access_token(identity=user_id)
+        Profile.query.filter_by(user_id=user_id).delete()
+        db.session.delete(user)
+        db.session.commit()
+    resp = client.post('/student/feedback', headers={'Authorization': f'Bearer {token}'},
+                       json={'category': 'general', 'subject': 's', 'message': 'm', 'rating': 4})
+    assert resp.status_code == 404
+
+
+def test_revocation_by_another_worker_within_the_cache_window(client, db, monkeypatch):
+    with client.application.app_context():
+        create_user(db, 'claims-window@example.com')
+    student = auth_headers(client, 'claims-window@example.com')
+    assert client.get('/student/uploads', headers=student).status_code == 200
+
+    def bump_elsewhere():
+        # what a suspension on another worker leaves behind: only the row changes
+        with client.application.app_context():
+            user = User.query.filter_by(email='claims-window@example.com').first()
+            db.session.query(User).filter(User.id == user.id).update(
+                {User.token_version: User.token_version + 1}, synchronize_session=False
+            )
+            db.session.commit()
+
+    bump_elsewhere()
+    # the cached version is still trusted inside TOKEN_VERSION_CACHE_SECONDS
+    assert client.get('/student/uploads', headers=student).status_code == 200
+    monkeypatch.setitem(client.application.config, 'TOKEN_VERSION_CACHE_SECONDS', 0)
+    assert client.get('/student/uploads', headers=student).status_code == 401
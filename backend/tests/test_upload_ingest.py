@@ -0,0 +1,48 @@
+import hashlib
+import io
+import os
+from backend.models import DailyUpload
+from backend.tests.conftest import student_headers
+
+
+def incoming_files(app):
+    incoming = os.path.join(app.config['UPLOAD_FOLDER'], '.incoming')
+    if not os.path.isdir(incoming):
+        return []
+    return [name for name in os.listdir(incoming) if os.path.isfile(os.path.join(incoming, name))]
+
+
+def test_upload_is_hashed_and_renamed_into_place(client, db):
+    app = client.application
+    headers = student_headers(client, db, 'ingest@example.com')
+    payload = os.urandom(600 * 1024)
+    resp = client.post(
+        '/student/uploads',
+        headers=headers,
+        data={'file': (io.BytesIO(payload), 'big.pdf'), 'description': 'ingest'},
+        content_type='multipart/form-data',
+    )
+    assert resp.status_code == 200, resp.get_json()
+    upload_id = resp.get_json()['upload']['id']
+    with app.app_context():
+        upload = db.session.get(DailyUpload, upload_id)
+        assert upload.file_size == len(payload)
+        assert upload.sha256 == hashlib.sha256(payload).hexdigest()
+        assert upload.file_url.startswith('/uploads/blobs/')
+        rel = upload.file_url[len('/uploads/'):]
+    with open(os.path.join(app.config['UPLOAD_FOLDER'], *rel.split('/')), 'rb') as f:
+        assert f.read() == payload
+    assert incoming_files(app) == []
+    assert client.get('/uploads/.incoming/anything.part').status_code == 404
+
+
+def test_rejected_upload_leaves_no_spool(client, db):
+    headers = student_headers(client, db, 'ingest-reject@example.com')
+    resp = client.post(
+        '/student/uploads',
+        headers=headers,
+        data={'file': (io.BytesIO(b'not an allowed file'), 'notes.exe')},
+        content_type='multipart/form-data',
+    )
+    assert resp.status_code == 400
+    assert incoming_files(client.application) == []
@@ -0,0 +1,52 @@
+import pytest
+from flask import g
+from sqlalchemy.exc import OperationalError
+from backend.writer import run_write, writer_stats, WriteConflict
+
+
+def locked_error():
+    return OperationalError('INSERT INTO x', {}, Exception('database is locked'))
+
+
+def test_run_write_retries_lock_errors(app, monkeypatch):
+    monkeypatch.setitem(app.config, 'WRITE_RETRY_BASE_DELAY', 0.001)
+    calls = []
+
+    def work():
+        calls.append(1)
+        if len(calls) < 3:
+            raise locked_error()
+        return 'done'
+
+    with app.test_request_context():
+        before = writer_stats()
+        assert run_write(work) == 'done'
+        after = writer_stats()
+        assert len(calls) == 3
+        assert after['retries'] - before['retries'] == 2
+        assert after['writes'] - before['writes'] == 1
+        assert g.db_lock_wait_ms >= 0
+
+
+def test_run_write_gives_up_after_budget(app, monkeypatch):
+    monkeypatch.setitem(app.config, 'WRITE_RETRY_BASE_DELAY', 0.001)
+
+    def work():
+        raise locked_error()
+
+    with app.test_request_context():
+        with pytest.raises(WriteConflict):
+            run_write(work)
+
+
+def test_run_write_does_not_retry_other_errors(app):
+    calls = []
+
+    def work():
+        calls.append(1)
+        raise OperationalError('SELECT', {}, Exception('no such table: nope'))
+
+    with app.test_request_context():
+        with pytest.raises(OperationalError):
+            run_write(work)
+    assert len(calls) == 1
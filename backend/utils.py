@@ -1,7 +1,6 @@
 from werkzeug.security import generate_password_hash, check_password_hash
 from flask import current_app
-import os
-from werkzeug.utils import secure_filename
+import binascii
 
 ALLOWED_EXTENSIONS = set(['pdf', 'doc', 'docx', 'zip', 'jpg', 'jpeg', 'png', 'gif', 'bmp', 'webp', 'svg', 'tif', 'tiff', 'avif', 'ico', 'heic', 'jfif'])
 
@@ -28,15 +27,56 @@ def allowed_file(filename: str, mimetype: str = '') -> bool:
     return False
 
 
-def save_upload_file(file, user_id: str) -> str:
-    uploads_root = current_app.config.get('UPLOAD_FOLDER')
-    user_folder = os.path.join(uploads_root, user_id)
-    os.makedirs(user_folder, exist_ok=True)
-    filename = secure_filename(file.filename)
-    # store a relative path to the file under the uploads root
-    rel_path = os.path.join(user_id, f"{int(__import__('time').time())}_{filename}")
-    full_path = os.path.join(uploads_root, rel_path)
-    file.save(full_path)
-    # return relative path with forward slashes for URL (use in served URL: /uploads/<rel_path>)
-    # Convert Windows backslashes to forward slashes for URLs
-    return rel_path.replace('\\', '/')
+def sniff_image_type(head: bytes):
+    """Name of the image format recognised from a file's first bytes, or None."""
+    magic = head[:16]
+    if magic.startswith(b'\xff\xd8'):
+        return 'jpeg'
+    if magic.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'png'
+    if magic.startswith(b'GIF8'):
+        return 'gif'
+    if magic.startswith(b'RIFF') and magic[8:12] == b'WEBP':
+        return 'webp'
+    if magic.startswith(b'II*\x00') or magic.startswith(b'MM\x00*'):
+        return 'tiff'
+    if magic.startswith(b'BM'):
+        return 'bmp'
+    if magic.startswith(b'\x00\x00\x01\x00'):
+        return 'ico'
+    if b'ftyp' in head and (b'avif' in head or b'heic' in head or b'qt  ' in head):
+        return 'avif/heic'
+    return None
+
+
+def check_upload_type(file):
+    """Validate an uploaded FileStorage by extension, MIME type, then magic bytes.
+
+    Returns None when the file is acceptable, otherwise the error payload the
+    upload routes send back (without 'success').
+    """
+    mimetype = (file.content_type or file.mimetype or '')
+    if allowed_file(file.filename, mimetype):
+        return None
+    # Try to sniff the file header (magic bytes) as a fallback for browsers that omit mimetype or extension
+    try:
+        head = file.read(64)
+        # Reset stream position so the file can still be stored
+        file.seek(0)
+    except Exception:
+        current_app.logger.exception('Error sniffing file header')
+        return {'message': 'Invalid file type and header sniff failed', 'filename': file.filename}
+    magic_hex = binascii.hexlify(head[:16]).decode('ascii')
+    sniffed = sniff_image_type(head)
+    if sniffed:
+        current_app.logger.debug(f"Sniffed file type {sniffed} from magic bytes for filename={file.filename!r}")
+        return None
+    current_app.logger.debug(f"Rejected upload: filename={file.filename!r}, mimetype={mimetype!r}, magic={magic_hex}")
+    return {
+        'message': f'Invalid file type for {file.filename or "file"}',
+        'filename': file.filename,
+        'mimetype': mimetype,
+        'magic_hex': magic_hex,
+        'allowed_extensions': sorted(list(ALLOWED_EXTENSIONS)),
+    }
+
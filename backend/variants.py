@@ -0,0 +1,181 @@
+"""Size-bounded variants of uploaded images.
+
+Avatars and image uploads point at full-resolution originals, which lists
+such as the admin student grid only show as small thumbnails. When an image
+blob is stored, ``schedule_variants`` queues a ``build_variants`` job
+(backend/tasks.py) in the same transaction. A job worker, not the web
+process, decodes the image once and writes one re-encoded copy per entry of ``IMAGE_VARIANTS`` (name ->
+longest side in pixels), e.g. ``variants/ab/cd/<sha256>.thumb.webp``. Originals are
+kept, and the ``image_variants`` table maps each blob to its variants.
+
+Variants are derived from the content hash, so they are served as immutable.
+Serializers add a ``variants`` (uploads) or ``avatar_variants`` (profiles) map
+of name -> URL once they exist. Clients should fall back to the original URL
+while the map is empty.
+
+Pillow is optional. Without it nothing is generated and every map stays
+empty. ``python -m backend.scripts.build_variants`` backfills variants for
+images stored before this existed or while Pillow was missing.
+"""
+import io
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import func
+from .blobstore import BLOB_DIR
+from .db import db
+from .jobs import enqueue
+from .models import Blob, ImageVariant
+from .storage import get_storage, upload_key
+from .writer import run_write
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # optional: variants are skipped without Pillow
+    Image = None
+
+VARIANT_DIR = 'variants'
+# formats Pillow decodes without plugins; svg is vector, heic/avif need extras
+RASTER_EXTENSIONS = {'jpg', 'jpeg', 'jfif', 'png', 'gif', 'bmp', 'webp', 'tif', 'tiff', 'ico'}
+FORMAT_EXTENSIONS = {'WEBP': 'webp', 'JPEG': 'jpg', 'PNG': 'png'}
+
+
+def available() -> bool:
+    return Image is not None
+
+
+def is_variant_source(key: str) -> bool:
+    """True for image blobs that variants can be generated from."""
+    if not key or not key.startswith(BLOB_DIR + '/'):
+        return False
+    name = key.rsplit('/', 1)[-1]
+    return '.' in name and name.rsplit('.', 1)[1].lower() in RASTER_EXTENSIONS
+
+
+def variant_key(source_key: str, name: str, fmt: str) -> str:
+    sha256 = source_key.rsplit('/', 1)[-1].split('.', 1)[0]
+    ext = FORMAT_EXTENSIONS.get(fmt.upper(), fmt.lower())
+    return f'{VARIANT_DIR}/{sha256[:2]}/{sha256[2:4]}/{sha256}.{name}.{ext}'
+
+
+def _encode(image, max_side: int, fmt: str, quality: int):
+    copy = image.copy()
+    copy.thumbnail((max_side, max_side))
+    if fmt.upper() == 'JPEG' and copy.mode not in ('RGB', 'L'):
+        copy = copy.convert('RGB')
+    elif copy.mode not in ('RGB', 'RGBA', 'L', 'LA'):
+        copy = copy.convert('RGBA')
+    out = io.BytesIO()
+    copy.save(out, format=fmt.upper(), quality=quality)
+    return out.getvalue(), copy.size
+
+
+def build_variants(source_key: str, log=None) -> int:
+    """Generate the missing variants of one image blob; returns how many were
+    written. Decode failures are logged and skipped (the original still serves)."""
+    if Image is None or not is_variant_source(source_key):
+        return 0
+    log = log or current_app.logger.warning
+    config = current_app.config
+    sizes = config.get('IMAGE_VARIANTS', {})
+    existing = {
+        row.name for row in db.session.query(ImageVariant.name).filter(ImageVariant.source_key == source_key)
+    }
+    db.session.rollback()
+    wanted = {name: side for name, side in sizes.items() if name not in existing}
+    if not wanted:
+        return 0
+
+    storage = get_storage()
+    fmt = config.get('IMAGE_VARIANT_FORMAT', 'WEBP')
+    quality = config.get('IMAGE_VARIANT_QUALITY', 80)
+    rows = []
+    try:
+        # remote bodies are not seekable; originals are bounded by MAX_CONTENT_LENGTH
+        image = Image.open(io.BytesIO(b''.join(storage.stream(source_key))))
+        # only the first frame of animations; phone photos carry their rotation in EXIF
+        image.seek(0)
+        image = ImageOps.exif_transpose(image)
+        for name, side in wanted.items():
+            data, (width, height) = _encode(image, side, fmt, quality)
+            key = variant_key(source_key, name, fmt)
+            storage.put_bytes(key, data)
+            rows.append(ImageVariant(source_key=source_key, name=name, key=key, width=width, height=height,
+                                     size=len(data), created_at=datetime.utcnow()))
+    except (OSError, ValueError, Image.DecompressionBombError) as e:
+        log(f'image variants for {source_key} failed: {e}')
+        return 0
+
+    def record():
+        # the original may have been collected meanwhile; its variants are then swept
+        if db.session.get(Blob, source_key) is None:
+            return 0
+        for row in rows:
+            db.session.merge(row)
+        return len(rows)
+
+    return run_write(record)
+
+
+def schedule_variants(keys):
+    """Queue variant generation for the image blobs among ``keys``.
+
+    Call in the transaction that records the rows referencing them, so the
+    job commits (or rolls back) with them.
+    """
+    keys = [upload_key(k) for k in keys]
+    keys = [k for k in dict.fromkeys(keys) if is_variant_source(k)]
+    if not keys or Image is None:
+        return
+    enqueue('build_variants', {'keys': keys})
+
+
+def variant_urls(session, urls) -> dict:
+    """{source key: {variant name: URL}} for the given upload/avatar URLs, in one query."""
+    keys = {upload_key(url) for url in urls if url}
+    keys = [k for k in keys if is_variant_source(k)]
+    result = {}
+    if not keys:
+        return result
+    rows = (
+        session.query(ImageVariant.source_key, ImageVariant.name, ImageVariant.key)
+        .filter(ImageVariant.source_key.in_(keys))
+        .order_by(ImageVariant.source_key, ImageVariant.name)
+    )
+    for source_key, name, key in rows:
+        result.setdefault(source_key, {})[name] = f'/uploads/{key}'
+    return result
+
+
+def variants_changed_at(session):
+    """Scalar subquery for list validators: new variants change the payload."""
+    return session.query(func.max(ImageVariant.created_at)).scalar_subquery()
+
+
+def delete_variants(source_key: str, storage=None):
+    """Drop the variant rows of a collected blob (current transaction) and their objects."""
+    storage = storage or get_storage()
+    keys = [row.key for row in db.session.query(ImageVariant.key).filter(ImageVariant.source_key == source_key)]
+    if keys:
+        db.session.query(ImageVariant).filter(ImageVariant.source_key == source_key).delete(
+            synchronize_session=False
+        )
+        for key in keys:
+            storage.delete(key)
+    return len(keys)
+
+
+def missing_variant_sources(session, limit: int = None):
+    """Image blob keys with fewer variants than IMAGE_VARIANTS defines."""
+    wanted = len(current_app.config.get('IMAGE_VARIANTS', {}))
+    counts = (
+        session.query(ImageVariant.source_key, func.count().label('n'))
+        .group_by(ImageVariant.source_key)
+        .subquery()
+    )
+    q = (
+        session.query(Blob.key)
+        .outerjoin(counts, counts.c.source_key == Blob.key)
+        .filter(func.coalesce(counts.c.n, 0) < wanted)
+        .order_by(Blob.key)
+    )
+    return [key for (key,) in q if is_variant_source(key)][:limit]
@@ -0,0 +1,114 @@
+"""Per-process write coordination for SQLite.
+
+SQLite allows one writer at a time. Instead of letting concurrent requests
+race for the database lock and fail with "database is locked", routes hand
+their mutations to ``run_write``: commits are serialized behind a process-wide
+lock (other requests queue on it), and lock errors raised by writers in other
+processes are retried with jittered exponential backoff. Time spent waiting
+is recorded per request and in process-wide counters shown by /debug/db.
+"""
+import random
+import threading
+import time
+from flask import current_app, g, jsonify
+from sqlalchemy.exc import OperationalError
+from .db import db
+
+_write_lock = threading.Lock()
+_stats_lock = threading.Lock()
+_stats = {
+    'writes': 0,
+    'retries': 0,
+    'failures': 0,
+    'lock_wait_ms_total': 0.0,
+    'lock_wait_ms_max': 0.0,
+}
+
+
+class WriteConflict(Exception):
+    """The write could not get the database lock within the retry budget."""
+
+
+def is_lock_error(exc) -> bool:
+    message = str(getattr(exc, 'orig', exc)).lower()
+    return 'database is locked' in message or 'database is busy' in message
+
+
+def _record(**increments):
+    with _stats_lock:
+        for key, value in increments.items():
+            if key == 'lock_wait_ms_max':
+                _stats[key] = max(_stats[key], value)
+            else:
+                _stats[key] += value
+
+
+def _note_wait(waited_ms: float):
+    _record(lock_wait_ms_total=waited_ms, lock_wait_ms_max=waited_ms)
+    g.db_lock_wait_ms = g.get('db_lock_wait_ms', 0.0) + waited_ms
+
+
+def writer_stats() -> dict:
+    with _stats_lock:
+        return dict(_stats)
+
+
+def run_write(work, *args, **kwargs):
+    """Call ``work(*args, **kwargs)`` to stage changes on db.session, then commit.
+
+    ``work`` is re-run from scratch after a lock error (the failed transaction
+    is rolled back), so it must build its changes inside the call. Returns
+    whatever ``work`` returns. Raises WriteConflict once retries run out.
+    """
+    config = current_app.config
+    attempts = config.get('WRITE_RETRY_ATTEMPTS', 5)
+    base_delay = config.get('WRITE_RETRY_BASE_DELAY', 0.05)
+    max_delay = config.get('WRITE_RETRY_MAX_DELAY', 1.0)
+    queue_timeout = config.get('WRITE_QUEUE_TIMEOUT', 30.0)
+
+    for attempt in range(1, attempts + 1):
+        started = time.monotonic()
+        acquired = _write_lock.acquire(timeout=queue_timeout)
+        _note_wait((time.monotonic() - started) * 1000)
+        if not acquired:
+            _record(failures=1)
+            raise WriteConflict('Timed out waiting for the write queue')
+        try:
+            result = work(*args, **kwargs)
+            db.session.commit()
+            _record(writes=1)
+            return result
+        except OperationalError as e:
+            db.session.rollback()
+            if not is_lock_error(e):
+                raise
+            if attempt == attempts:
+                _record(failures=1)
+                raise WriteConflict('Database is busy') from e
+            _record(retries=1)
+        except Exception:
+            db.session.rollback()
+            raise
+        finally:
+            _write_lock.release()
+        # full jitter keeps retrying workers from waking up in lockstep
+        delay = random.uniform(0, min(max_delay, base_delay * (2 ** (attempt - 1))))
+        started = time.monotonic()
+        time.sleep(delay)
+        _note_wait((time.monotonic() - started) * 1000)
+
+
+def busy_response():
+    """503 returned by write routes when run_write gives up."""
+    resp = jsonify({'success': False, 'message': 'The server is busy, please retry shortly.'})
+    resp.status_code = 503
+    resp.headers['Retry-After'] = '1'
+    return resp
+
+
+def add_lock_wait_header(response):
+    """after_request hook exposing the time this request spent queued for writes."""
+    waited = g.get('db_lock_wait_ms')
+    if waited is not None:
+        response.headers['X-DB-Lock-Wait-Ms'] = f'{waited:.1f}'
+    return response
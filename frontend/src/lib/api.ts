@@ -173,10 +173,12 @@ export const adminApi = {
   },
 
   getStudentUploads: async (userId: string): Promise<DailyUpload[]> => {
-    const res = await fetch(`${API_URL}/admin/uploads`, { headers: { ...getAuthHeaders() } });
+    const res = await fetch(`${API_URL}/admin/uploads?user_id=${encodeURIComponent(userId)}&limit=500`, {
+      headers: { ...getAuthHeaders() },
+    });
     if (!res.ok) throw new Error('Failed to fetch uploads');
-    const all = await res.json();
-    return (all || []).filter((u: DailyUpload) => u.user_id === userId);
+    const data = await res.json();
+    return Array.isArray(data) ? data : [];
   },
 
   updateUploadStatus: async (uploadId: string, status: 'reviewed' | 'approved' | 'rejected', feedback?: string) => {